@@ -1,9 +1,14 @@
 import heapq
+import itertools
 import math
+import numpy as np
 import pandas as pd
 from data import all_nodes, df_existing, df_traffic, transit_routes, df_neighborhoods
+from congestion import get_congestion_table, add_traffic_listener
+from route_cache import RouteCache
 
-route_cache = {}
+route_cache = RouteCache(maxsize=4096)
+add_traffic_listener(route_cache.on_traffic_update)
 
 def a_star(start, goal, graph, priority=False):
     """
@@ -74,6 +79,234 @@ def reconstruct_path(came_from, current):
     path.reverse()
     return path
 
+def a_star_csr(network, start, goal, priority=False):
+    """
+    A* on a compiled RoadNetwork, with the same semantics as a_star.
+
+    Args:
+        network (RoadNetwork): Compiled network whose base weights are the edge 'weight'.
+        start: Starting node ID (as used when the network was compiled).
+        goal: Destination node ID.
+        priority (bool): If True, reduces edge weights by 50% for priority mode.
+
+    Returns:
+        list: Shortest path of node IDs from start to goal, or empty list if no path exists.
+
+    Time Complexity: O(E log V).
+    """
+    offsets, targets, weights = network.adjacency()
+    xs, ys = network.coordinates()
+    source = network.index[start]
+    target = network.index[goal]
+    gx, gy = xs[target], ys[target]
+    scale = 0.5 if priority else 1.0
+    g_costs = [math.inf] * network.num_nodes
+    came_from = [-1] * network.num_nodes
+    g_costs[source] = 0.0
+    open_list = [(math.hypot(gx - xs[source], gy - ys[source]), 0.0, source)]
+    while open_list:
+        _, g_cost, current = heapq.heappop(open_list)
+        if current == target:
+            return [network.node_ids[i] for i in tree_path(came_from, current)]
+        if g_cost > g_costs[current]:
+            continue
+        lo, hi = offsets[current], offsets[current + 1]
+        for neighbor, weight in zip(targets[lo:hi], weights[lo:hi]):
+            tentative_g_cost = g_cost + weight * scale
+            if tentative_g_cost < g_costs[neighbor]:
+                g_costs[neighbor] = tentative_g_cost
+                came_from[neighbor] = current
+                f_cost = tentative_g_cost + math.hypot(gx - xs[neighbor], gy - ys[neighbor])
+                heapq.heappush(open_list, (f_cost, tentative_g_cost, neighbor))
+    return []
+
+def tree_path(came_from, current):
+    """
+    Reconstructs a path from a predecessor list indexed by node index.
+
+    Args:
+        came_from (list): Predecessor index per node, -1 for the root and unreached nodes.
+        current (int): Node index to walk back from.
+
+    Returns:
+        list: Node indices from the root to current.
+    """
+    path = [current]
+    while came_from[current] != -1:
+        current = came_from[current]
+        path.append(current)
+    path.reverse()
+    return path
+
+def csr_dijkstra(network, source, weights, target=None):
+    """
+    Dijkstra's algorithm over a compiled RoadNetwork using integer node indices.
+
+    Args:
+        network (RoadNetwork): Compiled network.
+        source (int): Source node index.
+        weights (list): Travel time per CSR arc.
+        target (int, optional): Stop as soon as this node index is settled.
+
+    Returns:
+        tuple: (distances, came_from) lists indexed by node index; unreached nodes
+               have distance inf and predecessor -1.
+
+    Time Complexity: O(E log V).
+    """
+    offsets, targets, _ = network.adjacency()
+    distances = [math.inf] * network.num_nodes
+    came_from = [-1] * network.num_nodes
+    distances[source] = 0.0
+    queue = [(0.0, source)]
+    while queue:
+        current_time, node = heapq.heappop(queue)
+        if node == target:
+            break
+        if current_time > distances[node]:
+            continue
+        lo, hi = offsets[node], offsets[node + 1]
+        for neighbor, weight in zip(targets[lo:hi], weights[lo:hi]):
+            new_time = current_time + weight
+            if new_time < distances[neighbor]:
+                distances[neighbor] = new_time
+                came_from[neighbor] = node
+                heapq.heappush(queue, (new_time, neighbor))
+    return distances, came_from
+
+def reverse_csr_dijkstra(network, target, weights):
+    """
+    Dijkstra's algorithm towards one target over the incoming arcs of a compiled RoadNetwork.
+
+    Gives every node its fastest next arc to the target, so one search serves
+    all trips that share the destination.
+
+    Args:
+        network (RoadNetwork): Compiled network.
+        target (int): Target node index.
+        weights (list): Travel time per CSR arc.
+
+    Returns:
+        tuple: (distances, next_arc) lists indexed by node index; nodes that cannot
+               reach the target have distance inf and next arc -1, as does the target.
+
+    Time Complexity: O(E log V).
+    """
+    offsets, sources, arcs = network.reverse_adjacency()
+    distances = [math.inf] * network.num_nodes
+    next_arc = [-1] * network.num_nodes
+    distances[target] = 0.0
+    queue = [(0.0, target)]
+    while queue:
+        current_time, node = heapq.heappop(queue)
+        if current_time > distances[node]:
+            continue
+        lo, hi = offsets[node], offsets[node + 1]
+        for tail, arc in zip(sources[lo:hi], arcs[lo:hi]):
+            new_time = current_time + weights[arc]
+            if new_time < distances[tail]:
+                distances[tail] = new_time
+                next_arc[tail] = arc
+                heapq.heappush(queue, (new_time, tail))
+    return distances, next_arc
+
+def time_dependent_dijkstra_csr(network, start_name, end_name, time_of_day, table):
+    """
+    time_dependent_dijkstra on a compiled RoadNetwork.
+
+    Args:
+        network (RoadNetwork): Network compiled with 'distance' as base weight.
+        start_name (str): Starting node name.
+        end_name (str): Destination node name.
+        time_of_day (str): Time period ('Morning', 'Afternoon', 'Evening', 'Night').
+        table (CongestionTable): Congestion table for the current traffic snapshot.
+
+    Returns:
+        tuple: (total_time, path_names) or (inf, []) if no path exists.
+
+    Time Complexity: O(E log V).
+    """
+    start = network.name_index[start_name]
+    end = network.name_index[end_name]
+    distances, came_from = csr_dijkstra(network, start, network.travel_time_list(table, time_of_day), end)
+    if distances[end] == math.inf:
+        return float('inf'), []
+    return distances[end], [network.names[i] for i in tree_path(came_from, end)]
+
+def repair_shortest_path_tree(network, distances, came_from, old_weights, weights, changed_arcs):
+    """
+    Updates a csr_dijkstra shortest-path tree after some arc weights change.
+
+    Only the part of the tree that can change is recomputed. Nodes below a
+    tree arc that got more expensive (or closed, weight inf) are detached and
+    re-seeded from their unaffected in-neighbours; heads of arcs that got
+    cheaper are re-queued. A Dijkstra pass over the queued nodes then restores
+    the tree. Unaffected nodes keep valid labels, so the work is bounded by
+    the size of the changed region rather than the whole network.
+
+    Args:
+        network (RoadNetwork): Compiled network.
+        distances (list): Distances from csr_dijkstra under old_weights.
+        came_from (list): Predecessors from csr_dijkstra under old_weights.
+        old_weights (list): Travel time per CSR arc the tree was built with.
+        weights (list): New travel time per CSR arc.
+        changed_arcs (iterable): CSR arc indices whose weight differs.
+
+    Returns:
+        tuple: New (distances, came_from) lists; the inputs are not modified.
+
+    Time Complexity: O(V) to copy the input lists plus O(E_A log A) where A is
+    the number of nodes whose label changes and E_A the arcs incident to them.
+    """
+    offsets, targets, _ = network.adjacency()
+    rev_offsets, rev_sources, rev_arcs = network.reverse_adjacency()
+    sources = network.sources
+    distances = list(distances)
+    came_from = list(came_from)
+    changed_arcs = list(changed_arcs)
+    queue = []
+    roots = [targets[arc] for arc in changed_arcs
+             if weights[arc] > old_weights[arc] and came_from[targets[arc]] == int(sources[arc])]
+    if roots:
+        affected = set()
+        stack = roots
+        while stack:
+            node = stack.pop()
+            if node not in affected:
+                affected.add(node)
+                stack.extend(child for child in targets[offsets[node]:offsets[node + 1]] if came_from[child] == node)
+        for node in affected:
+            distances[node] = math.inf
+            came_from[node] = -1
+        for node in affected:
+            for i in range(rev_offsets[node], rev_offsets[node + 1]):
+                u = rev_sources[i]
+                if u not in affected:
+                    new_time = distances[u] + weights[rev_arcs[i]]
+                    if new_time < distances[node]:
+                        distances[node] = new_time
+                        came_from[node] = u
+            if distances[node] < math.inf:
+                heapq.heappush(queue, (distances[node], node))
+    for arc in changed_arcs:
+        u, v = int(sources[arc]), targets[arc]
+        if weights[arc] < old_weights[arc] and distances[u] + weights[arc] < distances[v]:
+            distances[v] = distances[u] + weights[arc]
+            came_from[v] = u
+            heapq.heappush(queue, (distances[v], v))
+    while queue:
+        current_time, node = heapq.heappop(queue)
+        if current_time > distances[node]:
+            continue
+        lo, hi = offsets[node], offsets[node + 1]
+        for neighbor, weight in zip(targets[lo:hi], weights[lo:hi]):
+            new_time = current_time + weight
+            if new_time < distances[neighbor]:
+                distances[neighbor] = new_time
+                came_from[neighbor] = node
+                heapq.heappush(queue, (new_time, neighbor))
+    return distances, came_from
+
 def initialize_disjoint_set(nodes):
     """
     Initializes a disjoint-set data structure for Kruskal's algorithm.
@@ -97,9 +330,12 @@ def find(parent, node):
     Returns:
         Node ID of the root.
     """
-    if parent[node] != node:
-        parent[node] = find(parent, parent[node])
-    return parent[node]
+    root = node
+    while parent[root] != root:
+        root = parent[root]
+    while parent[node] != root:
+        parent[node], node = root, parent[node]
+    return root
 
 def union(parent, node1, node2):
     """
@@ -115,10 +351,63 @@ def union(parent, node1, node2):
     if root1 != root2:
         parent[root2] = root1
 
+class DisjointSet:
+    """
+    Array-backed disjoint set over integer indices 0..n-1.
+
+    Uses union by rank and iterative path halving, so operations are
+    effectively constant time and never recurse.
+
+    Attributes:
+        parent (list): Parent index per element.
+        rank (list): Upper bound on tree height per root.
+        components (int): Number of disjoint sets.
+    """
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.rank = [0] * n
+        self.components = n
+
+    def find(self, i):
+        """
+        Returns the root of element i, halving the path on the way up.
+
+        Time Complexity: O(α(n)) amortized.
+        """
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        """
+        Merges the sets of i and j.
+
+        Returns:
+            bool: True if they were in different sets.
+
+        Time Complexity: O(α(n)) amortized.
+        """
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j:
+            return False
+        if self.rank[root_i] < self.rank[root_j]:
+            root_i, root_j = root_j, root_i
+        self.parent[root_j] = root_i
+        if self.rank[root_i] == self.rank[root_j]:
+            self.rank[root_i] += 1
+        self.components -= 1
+        return True
+
 def modified_kruskal(all_edges, all_nodes, mandatory_connections=None):
     """
     Kruskal’s algorithm for Minimum Spanning Tree with mandatory connections.
 
+    Node IDs are mapped to dense indices for a DisjointSet, edges are read as
+    NumPy columns and mandatory edges are found through a hashed edge index.
+
     Args:
         all_edges (pd.DataFrame): DataFrame with columns ['FromID', 'ToID', 'Cost', 'Type'].
         all_nodes (pd.DataFrame): DataFrame with node IDs and attributes.
@@ -129,92 +418,211 @@ def modified_kruskal(all_edges, all_nodes, mandatory_connections=None):
 
     Time Complexity: O(E log E) due to edge sorting.
     """
-    parent = initialize_disjoint_set(all_nodes['ID'])
+    node_ids = pd.Index(all_nodes['ID'])
+    sources = node_ids.get_indexer(all_edges['FromID'])
+    targets = node_ids.get_indexer(all_edges['ToID'])
+    unknown = (sources < 0) | (targets < 0)
+    if unknown.any():
+        row = int(np.flatnonzero(unknown)[0])
+        raise KeyError(all_edges['FromID'].iloc[row] if sources[row] < 0 else all_edges['ToID'].iloc[row])
+    costs = all_edges['Cost'].to_numpy()
+    dsu = DisjointSet(len(node_ids))
     mst_edges = []
     total_cost = 0
-    all_edges_sorted = all_edges.sort_values(by='Cost')
     if mandatory_connections:
-        for u, v in mandatory_connections:
-            if find(parent, u) != find(parent, v):
-                edge = all_edges[
-                    ((all_edges['FromID'] == u) & (all_edges['ToID'] == v)) |
-                    ((all_edges['FromID'] == v) & (all_edges['ToID'] == u))
-                ]
-                if not edge.empty:
-                    cost = edge['Cost'].values[0]
+        edge_index = pd.MultiIndex.from_arrays([all_edges['FromID'], all_edges['ToID']])
+        first = ~edge_index.duplicated()
+        edge_index, rows = edge_index[first], np.flatnonzero(first)
+        forward = edge_index.get_indexer(list(mandatory_connections))
+        backward = edge_index.get_indexer([(v, u) for u, v in mandatory_connections])
+        for (u, v), f, b in zip(mandatory_connections, forward.tolist(), backward.tolist()):
+            i, j = node_ids.get_loc(u), node_ids.get_loc(v)
+            if dsu.find(i) != dsu.find(j):
+                # First row in all_edges joining u and v in either direction
+                matches = [rows[k] for k in (f, b) if k >= 0]
+                if matches:
+                    cost = costs[min(matches)]
                     total_cost += cost
                     mst_edges.append((u, v, cost))
-                union(parent, u, v)
-    for _, edge in all_edges_sorted.iterrows():
-        u, v = edge['FromID'], edge['ToID']
-        if find(parent, u) != find(parent, v):
-            union(parent, u, v)
-            mst_edges.append((u, v, edge['Cost']))
-            total_cost += edge['Cost']
+                dsu.union(i, j)
+    from_ids = all_edges['FromID'].tolist()
+    to_ids = all_edges['ToID'].tolist()
+    cost_values = costs.tolist()
+    parent, rank = dsu.parent, dsu.rank
+    components = dsu.components
+    sources, targets = sources.tolist(), targets.tolist()
+    # DisjointSet.find/union inlined: this loop runs once per candidate edge
+    for row in np.argsort(costs, kind='quicksort').tolist():
+        if components == 1:
+            break
+        i, j = sources[row], targets[row]
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        while parent[j] != j:
+            parent[j] = parent[parent[j]]
+            j = parent[j]
+        if i == j:
+            continue
+        if rank[i] < rank[j]:
+            i, j = j, i
+        parent[j] = i
+        if rank[i] == rank[j]:
+            rank[i] += 1
+        components -= 1
+        cost = cost_values[row]
+        mst_edges.append((from_ids[row], to_ids[row], cost))
+        total_cost += cost
+    dsu.components = components
     return mst_edges, total_cost
 
-def time_dependent_dijkstra(graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name):
+def time_dependent_dijkstra_tree(graph, start_name, time_of_day, df_traffic, df_existing, name_to_id, targets=None, closed_roads=None):
     """
-    Dijkstra’s algorithm with time-varying traffic congestion.
+    One-to-many Dijkstra with time-varying traffic congestion.
+
+    Builds a shortest-path tree from one source, stopping once every target
+    is settled. The heap holds (time, node) pairs only; paths are recovered
+    afterwards from the predecessor map with reconstruct_path.
 
     Args:
         graph (nx.Graph): Graph with 'distance' edge attributes.
         start_name (str): Starting node name.
-        end_name (str): Destination node name.
         time_of_day (str): Time period ('Morning', 'Afternoon', 'Evening', 'Night').
         df_traffic (pd.DataFrame): Traffic data.
         df_existing (pd.DataFrame): Existing roads data.
         name_to_id (dict): Name to ID mapping.
-        id_to_name (dict): ID to name mapping.
+        targets (iterable, optional): Node IDs to settle; defaults to all nodes.
+        closed_roads (iterable, optional): (from_id, to_id) pairs to skip in both directions.
 
     Returns:
-        tuple: (total_time, path_names) or (inf, []) if no path exists.
+        tuple: (distances, came_from) dicts keyed by node ID. distances holds every
+               reached node (settled targets are exact); came_from maps each reached
+               node except the source to its predecessor.
 
     Time Complexity: O(E log V).
     """
     start = name_to_id[start_name]
-    end = name_to_id[end_name]
-    queue = [(0, start, [start_name])]
+    table = get_congestion_table(df_traffic, df_existing, name_to_id)
+    factors = table.column(time_of_day)
+    arc_ids = table.arc_ids
+    remaining = None if targets is None else set(targets)
+    closed = {frozenset(pair) for pair in closed_roads} if closed_roads else None
+    # Node IDs mix ints and 'F1'-style strings, so ties are broken by push order
+    counter = itertools.count()
+    queue = [(0, next(counter), start)]
     visited = set()
-    distances = {node: float('inf') for node in graph.nodes()}
-    distances[start] = 0
+    distances = {start: 0}
+    came_from = {}
     while queue:
-        current_time, node, path_names = heapq.heappop(queue)
-        if node == end:
-            return current_time, path_names
+        current_time, _, node = heapq.heappop(queue)
         if node in visited:
             continue
         visited.add(node)
+        if remaining is not None:
+            remaining.discard(node)
+            if not remaining:
+                break
         for neighbor in graph.neighbors(node):
-            road_name = f"{id_to_name[node]}-{id_to_name[neighbor]}"
+            if closed is not None and frozenset((node, neighbor)) in closed:
+                continue
             distance = graph[node][neighbor]['distance']
-            congestion = get_traffic_speed(road_name, time_of_day, name_to_id)
-            travel_time = distance * congestion
-            if distances[neighbor] > current_time + travel_time:
-                distances[neighbor] = current_time + travel_time
-                heapq.heappush(queue, (distances[neighbor], neighbor, path_names + [id_to_name[neighbor]]))
-    return float('inf'), []
+            arc = arc_ids.get((node, neighbor))
+            congestion = 1.0 if arc is None else factors[arc]
+            new_time = current_time + distance * congestion
+            if new_time < distances.get(neighbor, float('inf')):
+                distances[neighbor] = new_time
+                came_from[neighbor] = node
+                heapq.heappush(queue, (new_time, next(counter), neighbor))
+    return distances, came_from
+
+def time_dependent_dijkstra(graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name, closed_roads=None):
+    """
+    Dijkstra’s algorithm with time-varying traffic congestion.
+
+    Args:
+        graph (nx.Graph): Graph with 'distance' edge attributes.
+        start_name (str): Starting node name.
+        end_name (str): Destination node name.
+        time_of_day (str): Time period ('Morning', 'Afternoon', 'Evening', 'Night').
+        df_traffic (pd.DataFrame): Traffic data.
+        df_existing (pd.DataFrame): Existing roads data.
+        name_to_id (dict): Name to ID mapping.
+        id_to_name (dict): ID to name mapping.
+        closed_roads (iterable, optional): (from_id, to_id) pairs treated as closed.
+
+    Returns:
+        tuple: (total_time, path_names) or (inf, []) if no path exists.
+
+    Time Complexity: O(E log V).
+    """
+    end = name_to_id[end_name]
+    distances, came_from = time_dependent_dijkstra_tree(graph, start_name, time_of_day, df_traffic, df_existing, name_to_id, [end], closed_roads)
+    if end not in distances:
+        return float('inf'), []
+    return distances[end], [id_to_name[node] for node in reconstruct_path(came_from, end)]
+
+def time_dependent_dijkstra_many(graph, start_name, end_names, time_of_day, df_traffic, df_existing, name_to_id, id_to_name):
+    """
+    Routes from one start to several destinations with a single search.
+
+    Args:
+        graph (nx.Graph): Graph with 'distance' edge attributes.
+        start_name (str): Starting node name.
+        end_names (list, optional): Destination node names; None for every node.
+        time_of_day (str): Time period ('Morning', 'Afternoon', 'Evening', 'Night').
+        df_traffic (pd.DataFrame): Traffic data.
+        df_existing (pd.DataFrame): Existing roads data.
+        name_to_id (dict): Name to ID mapping.
+        id_to_name (dict): ID to name mapping.
 
-def time_dependent_dijkstra_cached(graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name):
+    Returns:
+        dict: Destination name to (total_time, path_names), or (inf, []) if unreachable.
+
+    Time Complexity: O(E log V + P) where P is the total length of the returned paths.
+    """
+    if end_names is None:
+        end_names = [id_to_name[node] for node in graph.nodes()]
+    targets = [name_to_id[name] for name in end_names]
+    distances, came_from = time_dependent_dijkstra_tree(graph, start_name, time_of_day, df_traffic, df_existing, name_to_id, targets)
+    routes = {}
+    for name, node in zip(end_names, targets):
+        if node in distances:
+            routes[name] = (distances[node], [id_to_name[n] for n in reconstruct_path(came_from, node)])
+        else:
+            routes[name] = (float('inf'), [])
+    return routes
+
+def time_dependent_dijkstra_cached(graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name,
+                                   table=None):
     """
     Cached version of Dijkstra’s for repeated queries.
 
+    Results are keyed on the congestion table's snapshot number and kept in the
+    size-bounded route_cache; update_road_volumes drops only the affected routes.
+    Finding the current table fingerprints df_traffic and df_existing, so callers
+    making many queries should pass the table they already hold.
+
     Args:
-        Same as time_dependent_dijkstra.
+        Same as time_dependent_dijkstra, plus:
+        table (CongestionTable, optional): Current table from get_congestion_table;
+            looked up from the frames if not given.
 
     Returns:
         tuple: Cached or computed (total_time, path_names).
 
-    Time Complexity: O(1) for cache hit, O(E log V) for computation.
+    Time Complexity: O(1) for a cache hit with table given, O(R) vectorized hashing of the
+                     R traffic and road rows for a hit without it, O(E log V) for computation.
     """
-    key = (start_name, end_name, time_of_day, tuple(sorted(df_traffic['RoadName'])))
-    if key in route_cache:
-        return route_cache[key]
-    result = time_dependent_dijkstra(graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name)
-    route_cache[key] = result
+    if table is None:
+        table = get_congestion_table(df_traffic, df_existing, name_to_id)
+    key = (start_name, end_name, time_of_day, table.snapshot)
+    result = route_cache.get(key)
+    if result is None:
+        result = time_dependent_dijkstra(graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name)
+        route_cache.put(key, result)
     return result
 
-def get_traffic_speed(road_name, time_of_day, name_to_id):
+def get_traffic_speed(road_name, time_of_day, name_to_id, table=None):
     """
     Computes traffic speed factor based on congestion.
 
@@ -222,21 +630,18 @@ def get_traffic_speed(road_name, time_of_day, name_to_id):
         road_name (str): Road name (e.g., 'Maadi-Downtown Cairo').
         time_of_day (str): Time period.
         name_to_id (dict): Name to ID mapping.
+        table (CongestionTable, optional): Current table from get_congestion_table;
+            looked up from df_traffic and df_existing if not given.
 
     Returns:
         float: Congestion factor (0.5 to 2.0).
+
+    Time Complexity: O(1) with table given; otherwise O(R) vectorized hashing of the
+                     traffic and road rows to find the current table.
     """
-    traffic = df_traffic[df_traffic['RoadName'] == road_name]
-    if traffic.empty:
-        return 1.0
-    traffic_volume = traffic[time_of_day].values[0]
-    u, v = road_name.split('-')
-    u_id, v_id = name_to_id[u], name_to_id[v]
-    capacity = df_existing[
-        ((df_existing['FromID'] == u_id) & (df_existing['ToID'] == v_id)) |
-        ((df_existing['FromID'] == v_id) & (df_existing['ToID'] == u_id))
-    ]['Capacity'].values[0]
-    return max(0.5, min(2.0, traffic_volume / capacity))
+    if table is None:
+        table = get_congestion_table(df_traffic, df_existing, name_to_id)
+    return table.road_factor(road_name, time_of_day)
 
 def public_transport_dp(stations, routes, time_slots, start_station, max_vehicles, transit_routes):
     """
@@ -268,63 +673,177 @@ def public_transport_dp(stations, routes, time_slots, start_station, max_vehicle
                         if new_time < dp[dst][time + 1]:
                             dp[dst][time + 1] = new_time
                             paths[dst][time + 1] = src
-    schedule_dp = {}
-    def schedule(route_idx, vehicles_left, time_slot):
-        if route_idx >= len(transit_routes) or time_slot >= time_slots:
-            return 0
-        state = (route_idx, vehicles_left, time_slot)
-        if state in schedule_dp:
-            return schedule_dp[state]
-        max_coverage = schedule(route_idx + 1, vehicles_left, time_slot)
-        if vehicles_left > 0:
-            route = transit_routes[route_idx]
-            pop = sum(df_neighborhoods[df_neighborhoods['Name'].isin(route['stops'])]['Population'])
-            if pop <= route['capacity'] * vehicles_left:
-                coverage = pop / route['frequency']
-                if time_slot + route['frequency'] <= time_slots:
-                    max_coverage = max(max_coverage, coverage + schedule(route_idx, vehicles_left - 1, time_slot + route['frequency']))
-        schedule_dp[state] = max_coverage
-        return max_coverage
-    coverage = schedule(0, max_vehicles, 0)
+    coverage, _ = schedule_vehicles(transit_routes, time_slots, max_vehicles)
     return dp, paths, coverage
 
-def optimize_maintenance(df_existing, budget):
+def route_populations(transit_routes, df_neighborhoods=df_neighborhoods):
+    """
+    Sums the neighborhood population served by each transit route.
+
+    Args:
+        transit_routes (list): List of transit route dictionaries.
+        df_neighborhoods (pd.DataFrame): Neighborhoods with 'Name' and 'Population'.
+
+    Returns:
+        np.ndarray: Population per route; stops that are not neighborhoods count 0.
+    """
+    population = df_neighborhoods.groupby('Name')['Population'].sum().to_dict()
+    return np.array([sum(population.get(stop, 0) for stop in set(route['stops'])) for route in transit_routes],
+                    dtype=np.float64)
+
+def schedule_vehicles(transit_routes, time_slots, max_vehicles, populations=None):
     """
-    Dynamic Programming for road maintenance allocation.
+    Assigns vehicles to transit routes to maximize coverage, with a bottom-up DP.
+
+    A route dispatches its vehicles one after another from some start slot, one
+    every 'frequency' slots, and each dispatch covers population / frequency.
+    A dispatch needs the vehicles still available to carry the route's
+    population, and routes are considered in order, each starting where the
+    previous one left off in time. F[r][v, t] is the best coverage from route
+    r on with v vehicles at slot t; a route that takes j vehicles moves to
+    F[r + 1][v - j, t + j * frequency], so each route is one vectorized pass
+    per possible j instead of one recursive call per state.
+
+    Args:
+        transit_routes (list): List of transit route dictionaries; frequencies are whole slots.
+        time_slots (int): Number of time slots.
+        max_vehicles (int): Maximum number of vehicles.
+        populations (np.ndarray, optional): Output of route_populations, computed if not given.
+
+    Returns:
+        tuple: (coverage, schedule) where schedule lists (route_id, start_slot, vehicles)
+               for every route given vehicles, in route order.
+
+    Time Complexity: O(R * (T / F) * V * T) vectorized, with O(R * V * T) bytes for the choice table.
+    """
+    if populations is None:
+        populations = route_populations(transit_routes)
+    routes, vehicles, slots = len(transit_routes), max_vehicles + 1, time_slots + 1
+    best = np.zeros((vehicles, slots))
+    max_take = max([time_slots // route['frequency'] for route in transit_routes], default=0)
+    choice = np.zeros((routes, vehicles, slots), dtype=np.min_scalar_type(max(max_take, 1)))
+    v = np.arange(vehicles)[:, None]
+    t = np.arange(slots)[None, :]
+    for r in range(routes - 1, -1, -1):
+        route = transit_routes[r]
+        frequency, population = route['frequency'], populations[r]
+        coverage = population / frequency
+        # Fewest vehicles that can still carry the route's population
+        needed = 1
+        if population > 0 and route['capacity'] <= 0:
+            needed = vehicles
+        elif population > 0:
+            needed = max(1, int(np.ceil(population / route['capacity'])))
+            while needed > 1 and population <= route['capacity'] * (needed - 1):
+                needed -= 1
+            while population > route['capacity'] * needed:
+                needed += 1
+        current = best.copy()
+        for j in range(1, min(time_slots // frequency, max_vehicles) + 1):
+            shift = j * frequency
+            # j dispatches need needed <= v - j + 1 vehicles at the last one and t + shift <= time_slots
+            valid = (v - j + 1 >= needed) & (t + shift <= time_slots) & (t < time_slots)
+            candidate = np.full((vehicles, slots), -np.inf)
+            candidate[j:, :slots - shift] = best[:vehicles - j, shift:] + j * coverage
+            improved = valid & (candidate > current)
+            current[improved] = candidate[improved]
+            choice[r][improved] = j
+        best = current
+    schedule = []
+    remaining, slot = max_vehicles, 0
+    for r in range(routes):
+        if slot >= time_slots:
+            break
+        j = int(choice[r, remaining, slot])
+        if j:
+            schedule.append((transit_routes[r]['route_id'], slot, j))
+            remaining -= j
+            slot += j * transit_routes[r]['frequency']
+    return float(best[max_vehicles, 0]) if time_slots > 0 else 0.0, schedule
+
+def maintenance_knapsack(df_existing, budget, resolution=1.0):
+    """
+    Runs the maintenance knapsack DP over an integer budget grid.
+
+    Costs and budget are scaled to an integer grid of the given resolution
+    and a single value row is rolled over the roads with NumPy. Each road's
+    take decisions are kept as a packed bitset for reconstruction. Costs are
+    rounded up to the grid, so selections never exceed the budget; when
+    every cost is a multiple of resolution the results are exact.
+
+    Args:
+        df_existing (pd.DataFrame): Existing roads with maintenance costs and conditions.
+        budget (float): Largest budget in million EGP.
+        resolution (float): Budget grid step in million EGP.
+
+    Returns:
+        tuple: (best, taken, costs) where best[b] is the maximum improvement within
+               b grid units, taken is the (roads, ceil((B + 1) / 8)) packed bitset of
+               take decisions and costs are the road costs in grid units.
+               best is empty if budget is negative.
+
+    Time Complexity: O(N * B) vectorized, where N is roads and B is budget / resolution.
+    Space Complexity: O(B + N * B / 8) bytes.
+    """
+    costs = np.ceil(df_existing["Maintenance_Cost"].to_numpy(dtype=float) / resolution - 1e-9).astype(np.int64)
+    costs = np.maximum(costs, 0)
+    improvements = 10 - df_existing["Condition"].to_numpy()
+    capacity = max(int(math.floor(budget / resolution + 1e-9)), -1)
+    best = np.zeros(capacity + 1, dtype=improvements.dtype)
+    taken = np.zeros((len(costs), (capacity + 8) // 8), dtype=np.uint8)
+    for i, (cost, improvement) in enumerate(zip(costs.tolist(), improvements.tolist())):
+        if cost > capacity:
+            continue
+        candidate = best[:capacity + 1 - cost] + improvement
+        better = candidate > best[cost:]
+        best[cost:] = np.where(better, candidate, best[cost:])
+        mask = np.zeros(capacity + 1, dtype=bool)
+        mask[cost:] = better
+        taken[i] = np.packbits(mask)
+    return best, taken, costs
+
+def knapsack_selection(taken, costs, units):
+    """
+    Backtracks the rows chosen for one budget from a maintenance_knapsack bitset.
+
+    Args:
+        taken (np.ndarray): Packed take decisions from maintenance_knapsack.
+        costs (np.ndarray): Road costs in grid units.
+        units (int): Budget in grid units.
+
+    Returns:
+        list: Chosen row positions, last road first.
+
+    Time Complexity: O(N).
+    """
+    rows = []
+    for i in range(len(costs) - 1, -1, -1):
+        if taken[i, units >> 3] & (0x80 >> (units & 7)):
+            rows.append(i)
+            units -= int(costs[i])
+    return rows
+
+def optimize_maintenance(df_existing, budget, resolution=1.0):
+    """
+    Dynamic Programming for road maintenance allocation (0/1 knapsack).
 
     Args:
         df_existing (pd.DataFrame): Existing roads with maintenance costs and conditions.
         budget (float): Available budget in million EGP.
+        resolution (float): Budget grid step in million EGP; see maintenance_knapsack.
 
     Returns:
         tuple: (max_improvement, selected_roads) where selected_roads is a list of (FromID, ToID).
 
-    Time Complexity: O(N * B) where N is roads, B is budget.
+    Time Complexity: O(N * B) vectorized, where N is roads and B is budget / resolution.
     """
-    roads = df_existing[["FromID", "ToID", "Maintenance_Cost", "Condition"]].to_dict('records')
-    dp = {(0, budget): 0}
-    choices = {}
-    for i in range(len(roads)):
-        for curr_budget in list(dp.keys()):
-            idx, budget_left = curr_budget
-            if idx != i:
-                continue
-            dp[(i + 1, budget_left)] = dp.get((i + 1, budget_left), 0)
-            cost = roads[i]["Maintenance_Cost"]
-            if budget_left >= cost:
-                improvement = 10 - roads[i]["Condition"]
-                new_state = (i + 1, budget_left - cost)
-                new_value = dp[curr_budget] + improvement
-                if new_value > dp.get(new_state, 0):
-                    dp[new_state] = new_value
-                    choices[new_state] = (roads[i]["FromID"], roads[i]["ToID"])
-    max_improvement = max(dp.values())
-    selected_roads = []
-    curr_state = max(dp, key=lambda k: dp[k])
-    while curr_state in choices:
-        selected_roads.append(choices[curr_state])
-        curr_state = (curr_state[0] - 1, curr_state[1] + roads[curr_state[0] - 1]["Maintenance_Cost"])
-    return max_improvement, selected_roads
+    best, taken, costs = maintenance_knapsack(df_existing, budget, resolution)
+    if len(best) == 0:
+        return 0, []
+    from_ids = df_existing["FromID"].tolist()
+    to_ids = df_existing["ToID"].tolist()
+    rows = knapsack_selection(taken, costs, len(best) - 1)
+    return best[-1].item(), [(from_ids[i], to_ids[i]) for i in rows]
 
 def greedy_maintenance(df_existing, budget):
     """
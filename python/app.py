@@ -1,19 +1,23 @@
+from startup import PAGES, render_page, startup_timings
 import streamlit as st
-from emergency_routing import emergency_vehicle_routing
-from urban_planning import urban_planning_optimization
-from public_transit import public_transit_optimization
 import matplotlib
 matplotlib.use('Agg')
 
+def show_startup_timings():
+    timings = startup_timings()
+    with st.sidebar.expander("Startup timings"):
+        if 'cold_start' in timings:
+            st.write(f"Cold start: {timings['cold_start']:.2f} s")
+        for label in PAGES:
+            if label in timings:
+                import_seconds, render_seconds = timings[label]
+                st.write(f"{label}: import {import_seconds:.2f} s, first render {render_seconds:.2f} s")
+
 def main():
     st.title("SMARTCAI : Cairo Transportation and Urban Planning")
-    module = st.sidebar.selectbox("Select Module", ["Urban Planning Optimization" , "Emergency Vehicle Routing" , "Public Transit Optimization"])
-    if module == "Emergency Vehicle Routing":
-        emergency_vehicle_routing()
-    elif module == "Urban Planning Optimization":
-        urban_planning_optimization()
-    else:
-        public_transit_optimization()
+    module = st.sidebar.selectbox("Select Module", list(PAGES))
+    render_page(module)
+    show_startup_timings()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,356 @@
+import heapq
+import math
+import numpy as np
+import pandas as pd
+from datastore import get_table
+from network import DATA_DIR
+
+WAIT_FACTOR = 0.5        # expected wait as a share of the headway (random arrivals)
+PEAK_HOUR_SHARE = 0.1    # share of daily demand travelling in the peak hour
+
+_assignment_cache = {}
+
+class ODMatrix:
+    """
+    Sparse origin-destination demand in coordinate form, grouped by destination.
+
+    Attributes:
+        origins (np.ndarray): Int64 origin stop index per pair.
+        destinations (np.ndarray): Int64 destination stop index per pair, ascending.
+        flows (np.ndarray): Float64 daily passengers per pair.
+        unmatched (float): Daily passengers whose origin or destination is not a known stop.
+    """
+
+    def __init__(self, origins, destinations, flows, unmatched=0.0):
+        origins = np.asarray(origins, dtype=np.int64)
+        destinations = np.asarray(destinations, dtype=np.int64)
+        flows = np.asarray(flows, dtype=np.float64)
+        keep = (origins != destinations) & (flows > 0)
+        origins, destinations, flows = origins[keep], destinations[keep], flows[keep]
+        # Merge duplicate pairs and sort by destination, then origin
+        pairs, inverse = np.unique(np.stack([destinations, origins]), axis=1, return_inverse=True)
+        self.destinations, self.origins = pairs[0], pairs[1]
+        self.flows = np.bincount(inverse.ravel(), weights=flows, minlength=pairs.shape[1])
+        self.unmatched = float(unmatched)
+
+    def __len__(self):
+        return len(self.flows)
+
+    @property
+    def total(self):
+        return float(self.flows.sum())
+
+    def by_destination(self):
+        """
+        Yields the demand towards each destination.
+
+        Yields:
+            tuple: (destination, origins, flows) with NumPy arrays.
+        """
+        if not len(self.flows):
+            return
+        starts = np.flatnonzero(np.r_[True, self.destinations[1:] != self.destinations[:-1]])
+        ends = np.r_[starts[1:], len(self.flows)]
+        for lo, hi in zip(starts.tolist(), ends.tolist()):
+            yield int(self.destinations[lo]), self.origins[lo:hi], self.flows[lo:hi]
+
+def load_od_matrix(node_index, data_dir=DATA_DIR):
+    """
+    Reads data/transit_demand.csv into an ODMatrix over timetable stops.
+
+    The file is read through datastore, which checks on conversion that every
+    origin and destination is a known node. Known nodes missing from
+    node_index, such as facilities off the transit network, count as unmatched.
+
+    Args:
+        node_index (dict): Node ID to stop index, e.g. RoadNetwork.index.
+        data_dir (str): Directory holding the CSV file.
+
+    Returns:
+        ODMatrix: Daily passenger flows.
+
+    Raises:
+        ValueError: If transit_demand.csv does not match its schema or names an unknown node.
+    """
+    demand = get_table('transit_demand', data_dir)
+    lookup = pd.Series({str(node): i for node, i in node_index.items()})
+    origins = lookup.reindex(demand.node_ids('from').astype(str)).to_numpy()
+    destinations = lookup.reindex(demand.node_ids('to').astype(str)).to_numpy()
+    flows = np.asarray(demand['daily_passengers'], dtype=np.float64)
+    known = ~(np.isnan(origins) | np.isnan(destinations))
+    return ODMatrix(origins[known], destinations[known], flows[known], flows[~known].sum())
+
+class TransitAssignmentGraph:
+    """
+    Stop and route-stop graph of a TransitTimetable for frequency-based assignment.
+
+    Nodes 0..S-1 are stops and node S + p is position p of route_stops.
+    Boarding links (stop -> route-stop) carry the route's frequency; in-vehicle
+    links (route-stop -> next route-stop) carry the ride time and are the line
+    segments; alighting links (route-stop -> stop) are free.
+
+    Attributes:
+        timetable (TransitTimetable): Source timetable.
+        tails (np.ndarray): Int64 link tail node.
+        heads (np.ndarray): Int64 link head node.
+        costs (np.ndarray): Float64 link time in minutes.
+        frequencies (np.ndarray): Float64 vehicles per minute on boarding links, inf elsewhere;
+            0 for routes with a single trip, which have no headway to wait on and are never boarded.
+        segments (np.ndarray): Int64 in-vehicle link per route position; -1 at the last stop.
+        boardings (np.ndarray): Int64 boarding link per route position; -1 at the last stop.
+    """
+
+    def __init__(self, timetable):
+        self.timetable = timetable
+        stops = timetable.num_stops
+        route_offsets = timetable.route_offsets
+        positions = np.arange(len(timetable.route_stops))
+        route_of = np.searchsorted(route_offsets, positions, side='right') - 1
+        last = positions == route_offsets[route_of + 1] - 1
+        first = positions == route_offsets[route_of]
+        ride = np.diff(timetable.stop_offsets, append=0.0)
+        moving = positions[~last]
+        alighting = positions[~first]
+        frequency = 1.0 / timetable.route_headways[route_of[moving]]
+        self.tails = np.concatenate([timetable.route_stops[moving], stops + moving, stops + alighting]).astype(np.int64)
+        self.heads = np.concatenate([stops + moving, stops + moving + 1, timetable.route_stops[alighting]]).astype(np.int64)
+        self.costs = np.concatenate([np.zeros(len(moving)), ride[moving], np.zeros(len(alighting))])
+        self.frequencies = np.concatenate([frequency, np.full(len(moving) + len(alighting), np.inf)])
+        self.boardings = np.full(len(positions), -1, dtype=np.int64)
+        self.boardings[moving] = np.arange(len(moving))
+        self.segments = np.full(len(positions), -1, dtype=np.int64)
+        self.segments[moving] = len(moving) + np.arange(len(moving))
+        self.route_of = route_of
+        self.num_nodes = stops + len(positions)
+        order = np.argsort(self.heads, kind='stable')
+        self._incoming_offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.heads, minlength=self.num_nodes), out=self._incoming_offsets[1:])
+        self._incoming = order
+        self._lists = None
+
+    @property
+    def num_links(self):
+        return len(self.tails)
+
+    def _arrays(self, strategies):
+        if self._lists is None:
+            # All-or-nothing: waiting becomes a fixed boarding cost and every link is taken alone
+            boarding = np.isfinite(self.frequencies)
+            fixed_costs = self.costs.copy()
+            with np.errstate(divide='ignore'):
+                fixed_costs[boarding] += WAIT_FACTOR / self.frequencies[boarding]
+            self._lists = {
+                'links': (self.tails.tolist(), self.heads.tolist(), self._incoming_offsets.tolist(), self._incoming.tolist()),
+                True: (self.costs.tolist(), self.frequencies.tolist()),
+                False: (fixed_costs.tolist(), [math.inf] * self.num_links),
+            }
+        return self._lists['links'] + self._lists[bool(strategies)]
+
+    def strategy(self, destination, strategies=True):
+        """
+        Computes travel strategies towards one destination stop (Spiess & Florian).
+
+        Links are examined in increasing order of u_head + cost. A boarding link
+        joins the attractive set of its stop while it lowers the stop's expected
+        time, which mixes waiting for several lines by their frequencies;
+        continuous links simply replace the label. With strategies=False every
+        boarding link costs its expected wait and the result is a shortest-path tree.
+
+        Args:
+            destination (int): Destination stop index.
+            strategies (bool): Optimal strategies if True, all-or-nothing otherwise.
+
+        Returns:
+            tuple: (labels, attractive, combined, order) where labels are expected
+                   minutes to the destination per node, attractive maps node to its
+                   chosen links, combined is the summed frequency of those links per
+                   node and order lists chosen links in the order they were examined.
+
+        Time Complexity: O(L log L) for L links.
+        """
+        tails, heads, incoming_offsets, incoming, costs, frequencies = self._arrays(strategies)
+        inf = math.inf
+        labels = [inf] * self.num_nodes
+        combined = [0.0] * self.num_nodes
+        attractive = {}
+        order = []
+        labels[destination] = 0.0
+        heap = [(costs[b], b) for b in incoming[incoming_offsets[destination]:incoming_offsets[destination + 1]]]
+        heapq.heapify(heap)
+        while heap:
+            key, link = heapq.heappop(heap)
+            if key != labels[heads[link]] + costs[link]:
+                continue
+            node = tails[link]
+            if node == destination or labels[node] <= key or combined[node] == inf:
+                continue
+            frequency = frequencies[link]
+            if frequency == 0.0:
+                continue
+            if frequency == inf:
+                labels[node] = key
+                combined[node] = inf
+                attractive[node] = [link]
+            else:
+                if combined[node] == 0.0:
+                    labels[node] = WAIT_FACTOR / frequency + key
+                else:
+                    labels[node] = (combined[node] * labels[node] + frequency * key) / (combined[node] + frequency)
+                combined[node] += frequency
+                attractive.setdefault(node, []).append(link)
+            order.append(link)
+            label = labels[node]
+            for b in incoming[incoming_offsets[node]:incoming_offsets[node + 1]]:
+                heapq.heappush(heap, (label + costs[b], b))
+        return labels, attractive, combined, order
+
+    def load(self, destination, origins, flows, volumes, strategies=True):
+        """
+        Assigns the demand towards one destination and adds it to volumes.
+
+        Args:
+            destination (int): Destination stop index.
+            origins (np.ndarray): Origin stop indices.
+            flows (np.ndarray): Passengers per origin.
+            volumes (np.ndarray): Float64 per-link volumes, updated in place.
+            strategies (bool): Optimal strategies if True, all-or-nothing otherwise.
+
+        Returns:
+            tuple: (assigned, unassigned, passenger_minutes) for this destination.
+        """
+        labels, attractive, combined, order = self.strategy(destination, strategies)
+        tails, heads, _, _, _, frequencies = self._arrays(strategies)
+        demand = {}
+        unassigned = assigned = minutes = 0.0
+        for origin, flow in zip(origins.tolist(), flows.tolist()):
+            if labels[origin] == math.inf:
+                unassigned += flow
+            else:
+                demand[origin] = demand.get(origin, 0.0) + flow
+                assigned += flow
+                minutes += flow * labels[origin]
+        # Push volumes downstream in reverse examination order: every link into a
+        # node was examined after all links out of it, so its volume is complete
+        for link in reversed(order):
+            node = tails[link]
+            volume = demand.get(node, 0.0)
+            if volume <= 0.0 or link not in attractive[node]:
+                continue
+            total = combined[node]
+            share = volume if total == math.inf else volume * frequencies[link] / total
+            volumes[link] += share
+            head = heads[link]
+            if head != destination:
+                demand[head] = demand.get(head, 0.0) + share
+        return assigned, unassigned, minutes
+
+class AssignmentResult:
+    """
+    Transit loads from assign_transit.
+
+    Attributes:
+        segments (pd.DataFrame): One row per line segment and direction with 'Line',
+            'Route', 'From', 'To', 'Load' (daily), 'PeakLoad', 'PeakCapacity',
+            'Utilization' and 'Overcrowded'.
+        routes (pd.DataFrame): One row per line and direction with 'Line', 'Route',
+            'Boardings', 'PassengerMinutes', 'MaxLoad', 'PeakCapacity' and
+            'OvercrowdedSegments'.
+        assigned (float): Daily passengers assigned.
+        unassigned (float): Daily passengers without a transit connection.
+        average_minutes (float): Demand-weighted expected travel time in minutes.
+    """
+
+    def __init__(self, segments, routes, assigned, unassigned, average_minutes):
+        self.segments = segments
+        self.routes = routes
+        self.assigned = assigned
+        self.unassigned = unassigned
+        self.average_minutes = average_minutes
+
+def assign_transit(graph, od, strategies=True, peak_hour_share=PEAK_HOUR_SHARE):
+    """
+    Assigns OD demand to transit lines and flags overcrowded segments.
+
+    With strategies=True demand follows optimal strategies: at each stop it
+    boards the first arriving vehicle among the attractive lines, in
+    proportion to their frequencies. With strategies=False it follows the
+    single fastest path including expected waits (all-or-nothing).
+
+    A segment is overcrowded when its peak-hour load (daily load times
+    peak_hour_share) exceeds the peak-hour capacity of its line, the
+    vehicle capacity times the vehicles per hour.
+
+    Args:
+        graph (TransitAssignmentGraph): Assignment graph.
+        od (ODMatrix): Daily demand.
+        strategies (bool): Optimal strategies if True, all-or-nothing otherwise.
+        peak_hour_share (float): Share of daily demand in the peak hour.
+
+    Returns:
+        AssignmentResult: Segment and route loads.
+
+    Time Complexity: O(D * L log L) for D destinations and L links.
+    """
+    timetable = graph.timetable
+    volumes = np.zeros(graph.num_links)
+    assigned = unassigned = minutes = 0.0
+    for destination, origins, flows in od.by_destination():
+        a, u, m = graph.load(destination, origins, flows, volumes, strategies)
+        assigned, unassigned, minutes = assigned + a, unassigned + u, minutes + m
+    unassigned += od.unmatched
+
+    positions = np.flatnonzero(graph.segments >= 0)
+    route_of = graph.route_of[positions]
+    loads = volumes[graph.segments[positions]]
+    peak_capacity = timetable.route_capacities * 60.0 / timetable.route_headways
+    names = np.asarray(timetable.names, dtype=object)
+    line_ids = np.asarray(timetable.route_lines, dtype=object)
+    segments = pd.DataFrame({
+        'Line': line_ids[route_of],
+        'Route': route_of,
+        'From': names[timetable.route_stops[positions]],
+        'To': names[timetable.route_stops[positions + 1]],
+        'Load': loads,
+        'PeakLoad': loads * peak_hour_share,
+        'PeakCapacity': peak_capacity[route_of],
+    })
+    segments['Utilization'] = segments['PeakLoad'] / segments['PeakCapacity']
+    segments['Overcrowded'] = segments['Utilization'] > 1.0
+
+    num_routes = timetable.num_routes
+    boardings = np.bincount(route_of, weights=volumes[graph.boardings[positions]], minlength=num_routes)
+    ride = np.diff(timetable.stop_offsets, append=0.0)[positions]
+    passenger_minutes = np.bincount(route_of, weights=loads * ride, minlength=num_routes)
+    max_load = np.zeros(num_routes)
+    np.maximum.at(max_load, route_of, loads)
+    routes = pd.DataFrame({
+        'Line': timetable.route_lines,
+        'Route': np.arange(num_routes),
+        'Boardings': boardings,
+        'PassengerMinutes': passenger_minutes,
+        'MaxLoad': max_load,
+        'PeakCapacity': peak_capacity,
+        'OvercrowdedSegments': np.bincount(route_of, weights=segments['Overcrowded'].to_numpy(dtype=np.float64),
+                                           minlength=num_routes).astype(np.int64),
+    })
+    average = minutes / assigned if assigned else 0.0
+    return AssignmentResult(segments, routes, assigned, unassigned, average)
+
+def get_transit_assignment(network, timetable, strategies=True):
+    """
+    Returns the assignment of transit_demand.csv on a timetable, recomputed only when the timetable changes.
+
+    Args:
+        network (RoadNetwork): Network the timetable was built on; its index maps demand nodes to stops.
+        timetable (TransitTimetable): Timetable, e.g. from get_transit_timetable.
+        strategies (bool): Optimal strategies if True, all-or-nothing otherwise.
+
+    Returns:
+        AssignmentResult: Cached or new result.
+    """
+    cached = _assignment_cache.get(strategies)
+    if cached is None or cached[0] is not timetable:
+        graph = TransitAssignmentGraph(timetable)
+        cached = (timetable, assign_transit(graph, load_od_matrix(network.index), strategies))
+        _assignment_cache[strategies] = cached
+    return cached[1]
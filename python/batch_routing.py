@@ -0,0 +1,312 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from algorithms import a_star_csr
+from compute_cache import ComputationCache
+from congestion import TIME_PERIODS, get_congestion_table
+from data import all_nodes, df_existing, df_traffic, facilities, transit_routes
+from emergency_routing import find_emergency_route, get_emergency_graph
+from network import RoadNetwork
+from raptor import get_transit_timetable
+from travel_matrix import get_road_network, get_travel_matrix
+
+QUERY_TYPES = ('emergency', 'road', 'transit')
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_TIME_OF_DAY = 'Morning'
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+# Fields that decide a query's answer; repeated queries are answered from the result cache
+ROUTE_FIELDS = ('from', 'to', 'time_of_day', 'departure', 'priority', 'facility_type')
+# JSON types accepted per route field besides strings
+FIELD_TYPES = {'departure': (str, int, float), 'priority': (str, bool, int, float)}
+
+_worker = {}
+
+class BatchRouter:
+    """
+    Answers routing queries from the data.py tables without the Streamlit app.
+
+    Each query is a dict with a 'type' and the fields that type uses:
+
+    - 'emergency': 'from', optional 'to', 'priority' and 'facility_type'. With a
+      'to' it runs A* to that location, otherwise it finds the nearest critical
+      facility (of 'facility_type' if given: 'hospital', 'fire' or 'police').
+    - 'road': 'from', 'to' and 'time_of_day'; congested shortest path, looked
+      up in the travel-time matrix of that period.
+    - 'transit': 'from', 'to', 'departure' ('HH:MM' or minutes after midnight)
+      and 'time_of_day'; earliest-arrival RAPTOR journey.
+
+    An optional 'id' is echoed back. Matrices and timetables are built on the
+    first query of each time period and reused for the rest of the batch, and
+    answers are kept in a memory-bounded LRU since trip tables repeat OD pairs.
+
+    Args:
+        cache_bytes (int): Memory budget of the result cache.
+    """
+
+    def __init__(self, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.results = ComputationCache(cache_bytes)
+        self.name_to_id = dict(zip(all_nodes['Name'], all_nodes['ID']))
+        self.table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        self.network = get_road_network(all_nodes, df_existing)
+        self.emergency_graph = get_emergency_graph()
+        self.emergency_network = RoadNetwork.from_graph(self.emergency_graph)
+
+    def matrix(self, time_of_day):
+        return get_travel_matrix(self.network, self.table, time_of_day)
+
+    def timetable(self, time_of_day):
+        return get_transit_timetable(self.network, self.matrix(time_of_day), self.name_to_id, transit_routes)
+
+    def route(self, query):
+        """
+        Answers one query.
+
+        Args:
+            query (dict): Query fields, see the class docstring.
+
+        Returns:
+            dict: The query's 'id' and 'type', plus the route fields of its type, or an
+                  'error' message when the query is invalid or has no route.
+
+        Time Complexity: O(P) for road queries once their matrix is built, O(E log V)
+                         for emergency queries and one RAPTOR search for transit.
+        """
+        result = {'id': query.get('id'), 'type': query.get('type', 'road')}
+        try:
+            if 'invalid' in query:
+                raise ValueError(query['invalid'])
+            check_fields(query)
+            if result['type'] not in QUERY_TYPES:
+                raise ValueError(f"unknown query type '{result['type']}'")
+            if not query.get('from'):
+                raise ValueError("missing 'from'")
+            key = tuple(str(query.get(field)) for field in ROUTE_FIELDS)
+            result.update(self.results.get_or_build(result['type'], key, lambda: getattr(self, f"_{result['type']}")(query)))
+        except (KeyError, ValueError) as error:
+            message = f"unknown location {error}" if isinstance(error, KeyError) else str(error)
+            result['error'] = message
+        return result
+
+    def _emergency(self, query):
+        priority = parse_flag(query.get('priority'))
+        start = query['from']
+        if query.get('to'):
+            path = a_star_csr(self.emergency_network, start, query['to'], priority)
+            if not path:
+                return {'error': 'no route'}
+            scale = 0.5 if priority else 1.0
+            cost = sum(self.emergency_graph[u][v]['weight'] for u, v in zip(path, path[1:])) * scale
+            return {'path': path, 'cost': cost}
+        if start not in self.emergency_graph:
+            raise KeyError(start)
+        path, facility = find_emergency_route(start, facilities, self.emergency_graph, priority,
+                                              query.get('facility_type') or None)
+        if path is None:
+            return {'error': 'no reachable facility'}
+        return {'path': path, 'facility': facility['name']}
+
+    def _road(self, query):
+        total_time, path = self.matrix(parse_time_of_day(query)).route(query['from'], query['to'])
+        if not path:
+            return {'error': 'no route'}
+        return {'path': path, 'minutes': total_time}
+
+    def _transit(self, query):
+        journey = self.timetable(parse_time_of_day(query)).earliest_arrival(
+            query['from'], query['to'], parse_departure(query.get('departure')))
+        if journey is None:
+            return {'error': 'no transit connection'}
+        return {'departure': journey.departure, 'arrival': journey.arrival, 'minutes': journey.duration,
+                'transfers': journey.transfers, 'legs': [list(leg) for leg in journey.legs]}
+
+def check_fields(query):
+    """
+    Checks that a query's route fields have usable JSON types.
+
+    Locations, periods and facility types are strings; 'departure' may also
+    be a number of minutes and 'priority' a boolean or number.
+
+    Args:
+        query (dict): Query fields.
+
+    Raises:
+        ValueError: If a field has another type, such as a list or an object.
+    """
+    for field in ROUTE_FIELDS:
+        value = query.get(field)
+        if value is not None and not isinstance(value, FIELD_TYPES.get(field, str)):
+            raise ValueError(f"'{field}' must be {'a string' if field not in FIELD_TYPES else 'a string or number'}")
+
+def parse_flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def parse_time_of_day(query):
+    time_of_day = query.get('time_of_day') or DEFAULT_TIME_OF_DAY
+    if time_of_day not in TIME_PERIODS:
+        raise ValueError(f"unknown time_of_day '{time_of_day}'")
+    return time_of_day
+
+def parse_departure(value):
+    """
+    Parses a departure given as 'HH:MM' or minutes after midnight.
+
+    Args:
+        value: 'HH:MM' string, number of minutes, or None for 08:00.
+
+    Returns:
+        float: Minutes after midnight.
+
+    Raises:
+        ValueError: If the value does not parse.
+    """
+    if value is None or value == '':
+        return 8 * 60.0
+    if isinstance(value, str) and ':' in value:
+        hours, minutes = value.split(':', 1)
+        return int(hours) * 60 + float(minutes)
+    return float(value)
+
+def read_queries(stream, fmt='jsonl'):
+    """
+    Streams queries from a JSONL or CSV text stream.
+
+    CSV files need a header row naming the query fields (type, from, to,
+    time_of_day, departure, priority, facility_type, id). JSONL lines that
+    are not a JSON object are passed on with an 'invalid' message, so they
+    come out as errors in their place instead of stopping the batch.
+
+    Args:
+        stream (io.TextIOBase): Input stream.
+        fmt (str): 'jsonl' or 'csv'.
+
+    Yields:
+        dict: One query per line or row.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key.strip(): value.strip() for key, value in row.items() if key and value is not None}
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            query = json.loads(line)
+        except ValueError:
+            query = None
+        if not isinstance(query, dict):
+            query = {'id': f"line {number}", 'type': None, 'invalid': "not a JSON object"}
+        yield query
+
+def _init_worker(cache_bytes):
+    _worker['router'] = BatchRouter(cache_bytes)
+
+def _route_chunk(queries):
+    router = _worker['router']
+    return [router.route(query) for query in queries]
+
+def _chunks(queries, chunk_size):
+    queries = iter(queries)
+    while True:
+        chunk = list(islice(queries, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def route_stream(queries, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, cache_bytes=DEFAULT_CACHE_BYTES, router=None):
+    """
+    Routes a stream of queries, yielding results in input order.
+
+    Queries are cut into chunks and routed across a process pool. At most
+    two chunks per worker are in flight, so memory stays bounded however
+    long the input is. With one worker the queries are routed in-process.
+
+    Args:
+        queries (iterable): Query dicts, see BatchRouter.
+        workers (int): Worker processes.
+        chunk_size (int): Queries per task sent to a worker.
+        cache_bytes (int): Result cache budget per worker.
+        router (BatchRouter, optional): Router for in-process runs; built if not given.
+
+    Yields:
+        dict: One result per query, as from BatchRouter.route.
+    """
+    if workers <= 1:
+        router = router or BatchRouter(cache_bytes)
+        for query in queries:
+            yield router.route(query)
+        return
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cache_bytes,)) as pool:
+        pending = deque()
+        for chunk in _chunks(queries, chunk_size):
+            pending.append(pool.submit(_route_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def write_results(results, stream, progress=0, log=None):
+    """
+    Writes results as JSONL and measures throughput.
+
+    Args:
+        results (iterable): Result dicts.
+        stream (io.TextIOBase): Output stream.
+        progress (int): Log throughput every this many results; 0 for only the total.
+        log (callable, optional): Receives throughput lines.
+
+    Returns:
+        tuple: (count, errors, seconds).
+    """
+    started = time.perf_counter()
+    count = errors = 0
+    for result in results:
+        for key, value in result.items():
+            if isinstance(value, float) and math.isinf(value):
+                result[key] = None
+        stream.write(json.dumps(result) + '\n')
+        count += 1
+        errors += 'error' in result
+        if log and progress and count % progress == 0:
+            seconds = time.perf_counter() - started
+            log(f"{count} queries, {count / seconds:.0f} queries/s")
+    seconds = time.perf_counter() - started
+    if log:
+        log(f"Routed {count} queries ({errors} errors) in {seconds:.2f} s: {count / seconds if seconds else 0:.0f} queries/s")
+    return count, errors, seconds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route OD queries in batch and stream the results as JSONL.")
+    parser.add_argument('input', nargs='?', default='-', help="CSV or JSONL query file; '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL result file; '-' for stdout")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help="input format; inferred from the file extension")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_BYTES // 2**20, help="result cache size per worker")
+    parser.add_argument('--progress', type=int, default=0, help="report throughput every N queries")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    source = sys.stdin if args.input == '-' else open(args.input, newline='' if fmt == 'csv' else None)
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w')
+    log = lambda line: print(line, file=sys.stderr)
+    try:
+        results = route_stream(read_queries(source, fmt), args.workers, args.chunk_size, args.cache_mb * 2**20)
+        write_results(results, sink, args.progress, log)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import networkx as nx
+import numpy as np
+import pandas as pd
+from synthetic import generate_city
+
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+class CountingGraph(nx.Graph):
+    """
+    nx.Graph that records which nodes had their adjacency read.
+
+    Both a_star (``graph[node]``) and time_dependent_dijkstra
+    (``graph.neighbors(node)``) read a node's adjacency when they expand it,
+    so the size of ``expanded`` is the number of distinct nodes expanded by
+    the current query. end_query adds it to ``expansions``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.expanded = set()
+        self.expansions = 0
+        super().__init__(*args, **kwargs)
+
+    def end_query(self):
+        self.expansions += len(self.expanded)
+        self.expanded.clear()
+
+    def __getitem__(self, n):
+        self.expanded.add(n)
+        return super().__getitem__(n)
+
+    def neighbors(self, n):
+        self.expanded.add(n)
+        return super().neighbors(n)
+
+def _query_pairs(names, count, rng):
+    picks = rng.integers(0, len(names), size=(count, 2))
+    return [(names[a], names[b]) for a, b in picks]
+
+def build_workloads(city, queries=20, maintenance_roads=None, transit_stations=200, scoring_nodes=500, seed=0):
+    """
+    Prepares one callable per algorithm on a synthetic city.
+
+    optimize_maintenance runs on every existing road with half their total
+    cost as budget; its knapsack rolls a single NumPy value row over the roads
+    and keeps one packed take bit per road and budget unit, so time and memory
+    grow with roads * budget. public_transport_dp runs on the first
+    transit_stations stations because it scans every route from every station
+    in every time slot. score_candidates runs on the first scoring_nodes
+    intersections, whose all-pairs matrix is computed once outside the timed
+    run.
+
+    Args:
+        city (SyntheticCity): Generated city.
+        queries (int): Origin-destination pairs per routing algorithm.
+        maintenance_roads (int, optional): Roads given to optimize_maintenance; defaults to all.
+        transit_stations (int): Stations given to public_transport_dp.
+        scoring_nodes (int): Intersections given to score_candidates.
+        seed (int): Random seed for query sampling.
+
+    Returns:
+        dict: Algorithm name to (run, graph) where run() executes the workload and
+              graph is the CountingGraph it searches, or None.
+    """
+    from algorithms import a_star, time_dependent_dijkstra, modified_kruskal, optimize_maintenance, public_transport_dp
+    rng = np.random.default_rng(seed)
+    names = city.nodes['Name'].tolist()
+    name_to_id, id_to_name = city.name_to_id, city.id_to_name
+    workloads = {}
+
+    emergency_graph = city.emergency_graph(CountingGraph)
+    a_star_pairs = _query_pairs(names, queries, rng)
+    def run_a_star():
+        for start, goal in a_star_pairs:
+            a_star(start, goal, emergency_graph)
+            emergency_graph.end_query()
+    workloads['a_star'] = (run_a_star, emergency_graph)
+
+    traffic_graph = city.traffic_graph(CountingGraph)
+    dijkstra_pairs = _query_pairs(names, queries, rng)
+    def run_dijkstra():
+        for start, end in dijkstra_pairs:
+            time_dependent_dijkstra(traffic_graph, start, end, 'Morning', city.traffic, city.existing, name_to_id, id_to_name)
+            traffic_graph.end_query()
+    workloads['time_dependent_dijkstra'] = (run_dijkstra, traffic_graph)
+
+    existing_edges = city.existing[['FromID', 'ToID']].assign(Cost=city.existing['Maintenance_Cost'], Type='Existing')
+    potential_edges = city.potential[['FromID', 'ToID']].assign(Cost=city.potential['Cost'], Type='Potential')
+    all_edges = pd.concat([existing_edges, potential_edges])
+    def run_kruskal():
+        modified_kruskal(all_edges, city.nodes)
+    workloads['modified_kruskal'] = (run_kruskal, None)
+
+    roads = city.existing if maintenance_roads is None else city.existing.head(maintenance_roads)
+    budget = float(roads['Maintenance_Cost'].sum()) / 2
+    def run_maintenance():
+        optimize_maintenance(roads, budget)
+    workloads['optimize_maintenance'] = (run_maintenance, None)
+
+    station_nodes = city.nodes.head(transit_stations)
+    stations = dict(zip(station_nodes['Name'], zip(station_nodes['X'], station_nodes['Y'])))
+    routes = {}
+    for u, v, d in zip(city.existing['FromID'], city.existing['ToID'], city.existing['Distance']):
+        a, b = id_to_name[u], id_to_name[v]
+        if a in stations and b in stations:
+            routes[(a, b)] = d
+            routes[(b, a)] = d
+    start_station = names[0]
+    def run_transit():
+        public_transport_dp(stations, routes, 24, start_station, 5, city.transit_routes)
+    workloads['public_transport_dp'] = (run_transit, None)
+
+    from congestion import build_congestion_table
+    from network import RoadNetwork
+    from scenarios import score_candidates, trip_weights
+    from travel_matrix import compute_travel_matrix
+    scoring_ids = set(city.nodes['ID'].head(scoring_nodes).tolist())
+    scoring_roads = city.existing[city.existing['FromID'].isin(scoring_ids) & city.existing['ToID'].isin(scoring_ids)]
+    scoring_network = RoadNetwork.from_frames(city.nodes.head(scoring_nodes), scoring_roads)
+    scoring_table = build_congestion_table(city.traffic, scoring_roads, name_to_id)
+    scoring_matrix = compute_travel_matrix(scoring_network, scoring_table, 'Morning', processes=1)
+    candidates = city.potential[city.potential['FromID'].isin(scoring_ids) & city.potential['ToID'].isin(scoring_ids)]
+    weights = trip_weights(scoring_network, city.nodes)
+    def run_scoring():
+        score_candidates(scoring_matrix, candidates, weights, processes=1)
+    workloads['score_candidates'] = (run_scoring, None)
+    return workloads
+
+def measure(run, graph=None, repeat=3):
+    """
+    Measures one workload.
+
+    Wall time is the best of repeat untraced runs; peak memory comes from a
+    separate run under tracemalloc so tracing overhead does not skew timings.
+
+    Args:
+        run (callable): Workload.
+        graph (CountingGraph, optional): Graph whose expansions are counted.
+        repeat (int): Timed runs.
+
+    Returns:
+        dict: seconds, peak_bytes and nodes_expanded summed over the queries
+              (None when not a graph search).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        if graph is not None:
+            graph.expansions = 0
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    expanded = graph.expansions if graph is not None else None
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak, 'nodes_expanded': expanded}
+
+def run_benchmarks(sizes=DEFAULT_SIZES, algorithms=None, queries=20, repeat=3, seed=0, log=None):
+    """
+    Runs every workload on synthetic cities of the given sizes.
+
+    Args:
+        sizes (iterable): Node counts.
+        algorithms (iterable, optional): Algorithm names to run; defaults to all.
+        queries (int): Origin-destination pairs per routing algorithm.
+        repeat (int): Timed runs per workload.
+        seed (int): Random seed for generation and sampling.
+        log (callable, optional): Called with a progress line per measurement.
+
+    Returns:
+        dict: {str(size): {algorithm: measurement}}.
+    """
+    results = {}
+    for size in sizes:
+        city = generate_city(size, seed=seed)
+        workloads = build_workloads(city, queries=queries, seed=seed)
+        results[str(size)] = {}
+        for name, (run, graph) in workloads.items():
+            if algorithms and name not in algorithms:
+                continue
+            results[str(size)][name] = measurement = measure(run, graph, repeat)
+            if log:
+                log(f"{size:>8} {name:<24} {measurement['seconds']:9.4f}s "
+                    f"{measurement['peak_bytes'] / 2**20:9.2f} MiB  expanded={measurement['nodes_expanded']}")
+    return results
+
+def compare(results, baseline, time_tolerance=0.5, memory_tolerance=0.25):
+    """
+    Flags measurements that are worse than the baseline.
+
+    Args:
+        results (dict): Output of run_benchmarks.
+        baseline (dict): Previously saved results (the 'results' entry of the baseline file).
+        time_tolerance (float): Allowed relative slowdown.
+        memory_tolerance (float): Allowed relative growth in peak memory.
+
+    Returns:
+        list: Human-readable regression descriptions; empty if none.
+    """
+    regressions = []
+    for size, algorithms in results.items():
+        for name, current in algorithms.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            label = f"{name} @ {size} nodes"
+            if current['seconds'] > previous['seconds'] * (1 + time_tolerance):
+                regressions.append(f"{label}: {current['seconds']:.4f}s vs {previous['seconds']:.4f}s")
+            if current['peak_bytes'] > previous['peak_bytes'] * (1 + memory_tolerance):
+                regressions.append(f"{label}: peak {current['peak_bytes']} B vs {previous['peak_bytes']} B")
+            if (current['nodes_expanded'] is not None and previous['nodes_expanded'] is not None
+                    and current['nodes_expanded'] > previous['nodes_expanded']):
+                regressions.append(f"{label}: expanded {current['nodes_expanded']} vs {previous['nodes_expanded']} nodes")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the algorithms module on synthetic cities.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="node counts, e.g. 1000 10000 100000 1000000")
+    parser.add_argument('--algorithms', nargs='+', help="subset of algorithms to run")
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--time-tolerance', type=float, default=0.5)
+    parser.add_argument('--memory-tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.algorithms, args.queries, args.repeat, args.seed, log=print)
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'platform': platform.platform(),
+                       'seed': args.seed, 'queries': args.queries, 'results': results}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.time_tolerance, args.memory_tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions against baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import math
+from algorithms import csr_dijkstra, repair_shortest_path_tree, tree_path
+
+_router_cache = {}
+
+def closed_road_pairs(closed_roads, name_to_id):
+    """
+    Converts road names such as 'Maadi-Giza' to node ID pairs.
+
+    Args:
+        closed_roads (iterable): Road names in 'From-To' form.
+        name_to_id (dict): Name to ID mapping.
+
+    Returns:
+        list: (from_id, to_id) tuples.
+    """
+    pairs = []
+    for road in closed_roads:
+        u, v = road.split('-')
+        pairs.append((name_to_id[u], name_to_id[v]))
+    return pairs
+
+class ClosureRouter:
+    """
+    Routes around closed roads by masking arcs instead of copying the graph.
+
+    One shortest-path tree is kept per source. When the set of closed roads
+    changes, the tree is repaired with repair_shortest_path_tree from the
+    previous closure state, so toggling a closure only recomputes the part
+    of the tree below the affected roads.
+
+    Attributes:
+        network (RoadNetwork): Network compiled with 'distance' as base weight.
+        time_of_day (str): Time period.
+        version (int): Congestion table version the base weights come from.
+        max_sources (int): Number of per-source trees kept.
+    """
+
+    def __init__(self, network, table, time_of_day, max_sources=64):
+        self.network = network
+        self.time_of_day = time_of_day
+        self.version = table.version
+        self.max_sources = max_sources
+        self._base = network.travel_time_list(table, time_of_day)
+        self._trees = {}
+
+    def _tree(self, source, closed_arcs):
+        state = self._trees.pop(source, None)
+        if state is None:
+            distances, came_from = csr_dijkstra(self.network, source, self._base)
+            state = (frozenset(), self._base, distances, came_from)
+        previous_arcs, previous_weights, distances, came_from = state
+        if closed_arcs != previous_arcs:
+            weights = self._base
+            if closed_arcs:
+                weights = list(self._base)
+                for arc in closed_arcs:
+                    weights[arc] = math.inf
+            distances, came_from = repair_shortest_path_tree(
+                self.network, distances, came_from, previous_weights, weights, previous_arcs ^ closed_arcs)
+            state = (closed_arcs, weights, distances, came_from)
+        self._trees[source] = state
+        while len(self._trees) > self.max_sources:
+            del self._trees[next(iter(self._trees))]
+        return state[2], state[3]
+
+    def route(self, start_name, end_name, closed_roads=()):
+        """
+        Finds the fastest route with the given roads closed.
+
+        Args:
+            start_name (str): Starting node name.
+            end_name (str): Destination node name.
+            closed_roads (iterable): (from_id, to_id) pairs closed in both directions.
+
+        Returns:
+            tuple: (total_time, path_names) or (inf, []) if no path exists.
+
+        Time Complexity: O(E log V) for a new source, otherwise proportional to
+        the part of the tree affected by closures added or removed since the
+        previous query from the same source.
+        """
+        network = self.network
+        start, end = network.name_index[start_name], network.name_index[end_name]
+        closed_arcs = frozenset(network.closure_arcs(closed_roads))
+        distances, came_from = self._tree(start, closed_arcs)
+        if distances[end] == math.inf:
+            return float('inf'), []
+        return distances[end], [network.names[i] for i in tree_path(came_from, end)]
+
+def get_closure_router(network, table, time_of_day):
+    """
+    Returns the ClosureRouter for a time period, replaced when the congestion table changes.
+
+    Args:
+        network (RoadNetwork): Network compiled with 'distance' as base weight.
+        table (CongestionTable): Congestion table for the current traffic snapshot.
+        time_of_day (str): Time period.
+
+    Returns:
+        ClosureRouter: Cached or new router.
+    """
+    key = (id(network), time_of_day)
+    router = _router_cache.get(key)
+    if router is None or router.network is not network or router.version != table.version:
+        router = ClosureRouter(network, table, time_of_day)
+        _router_cache[key] = router
+    return router
@@ -0,0 +1,199 @@
+import sys
+import threading
+from collections import OrderedDict
+import networkx as nx
+import numpy as np
+import pandas as pd
+from congestion import frame_fingerprint
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+GRAPH_ELEMENT_BYTES = 400  # rough networkx cost per node or edge with a few attributes
+
+def estimate_size(value):
+    """
+    Estimates the memory held by a cached value.
+
+    Args:
+        value: NumPy array, DataFrame, networkx graph, bytes, an object with an
+            'nbytes' attribute (e.g. RoadNetwork), or a tuple/list/dict of those.
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, nx.Graph):
+        return (value.number_of_nodes() + value.number_of_edges()) * GRAPH_ELEMENT_BYTES
+    if isinstance(value, (bytes, str)):
+        return sys.getsizeof(value)
+    if isinstance(getattr(value, 'nbytes', None), (int, np.integer)):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+class ComputationCache:
+    """
+    Process-wide LRU cache for derived objects, bounded by estimated memory.
+
+    Entries are keyed by (kind, key) where key holds the versions of the
+    source tables the value was derived from, so a changed table simply
+    misses and the stale entry ages out. Streamlit reruns and sessions share
+    the process, so every rerun after the first pays only for entries whose
+    inputs changed. Values are shared and must be treated as read-only.
+
+    Attributes:
+        max_bytes (int): Memory budget; least recently used entries are evicted beyond it.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to be built.
+        evictions (int): Entries dropped to respect max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, entry):
+        return entry in self._entries
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get_or_build(self, kind, key, build, size=None):
+        """
+        Returns a cached value, building and storing it on a miss.
+
+        Concurrent misses on the same entry may build it twice; the last
+        build is kept.
+
+        Args:
+            kind (str): Value family, e.g. 'traffic_graph'.
+            key (hashable): Source versions and parameters the value depends on.
+            build (callable): Zero-argument function producing the value.
+            size (int, optional): Size in bytes; estimated with estimate_size if not given.
+
+        Returns:
+            The cached or newly built value.
+
+        Time Complexity: O(1) on a hit, plus the cost of build on a miss.
+        """
+        entry = (kind, key)
+        with self._lock:
+            if entry in self._entries:
+                self._entries.move_to_end(entry)
+                self.hits += 1
+                return self._entries[entry][0]
+            self.misses += 1
+        value = build()
+        self.put(kind, key, value, size)
+        return value
+
+    def put(self, kind, key, value, size=None):
+        """
+        Stores a value, evicting least recently used entries beyond max_bytes.
+
+        A value larger than max_bytes on its own is returned to the caller by
+        get_or_build but not kept.
+
+        Args:
+            kind (str): Value family.
+            key (hashable): Source versions and parameters.
+            value: Value to store.
+            size (int, optional): Size in bytes; estimated if not given.
+        """
+        entry = (kind, key)
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            self._discard(entry)
+            if size > self.max_bytes:
+                return
+            self._entries[entry] = (value, size)
+            self._bytes += size
+            self._shrink()
+
+    def _discard(self, entry):
+        cached = self._entries.pop(entry, None)
+        if cached is not None:
+            self._bytes -= cached[1]
+
+    def _shrink(self):
+        while self._bytes > self.max_bytes and self._entries:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def set_limit(self, max_bytes):
+        """
+        Changes the memory budget, evicting entries at once if it shrank.
+
+        Args:
+            max_bytes (int): New budget in bytes.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def evict(self, kind=None):
+        """
+        Drops all entries, or only those of one kind.
+
+        Args:
+            kind (str, optional): Value family to drop.
+        """
+        with self._lock:
+            for entry in [e for e in self._entries if kind is None or e[0] == kind]:
+                self._discard(entry)
+
+    def stats(self):
+        """
+        Returns cache statistics.
+
+        Returns:
+            dict: entries, bytes, max_bytes, hits, misses, evictions, hit_rate and
+                  bytes_by_kind.
+        """
+        with self._lock:
+            by_kind = {}
+            for (kind, _), (_, size) in self._entries.items():
+                by_kind[kind] = by_kind.get(kind, 0) + size
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes_by_kind': by_kind,
+            }
+
+def table_versions(**tables):
+    """
+    Content versions of source tables, for use in cache keys.
+
+    Args:
+        **tables (pd.DataFrame): Tables by name.
+
+    Returns:
+        dict: Table name to content fingerprint; pick the ones a value depends on for its key.
+
+    Time Complexity: O(R) vectorized hashing over all rows.
+    """
+    return {name: frame_fingerprint(df) for name, df in tables.items()}
+
+computation_cache = ComputationCache()
@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+
+TIME_PERIODS = ('Morning', 'Afternoon', 'Evening', 'Night')
+
+_table_cache = {}
+_listeners = []
+
+class CongestionTable:
+    """
+    Congestion factors for every directed road, precomputed per traffic snapshot.
+
+    Each undirected road in df_existing gets an integer edge id ``k``; the
+    direction FromID -> ToID is arc ``2k`` and the reverse is arc ``2k + 1``.
+    ``factors[arc, period]`` holds the same value get_traffic_speed used to
+    compute on every call, so lookups are a dict hit plus an array index.
+
+    Attributes:
+        factors (np.ndarray): Float array of shape (2 * roads, len(TIME_PERIODS)).
+        capacities (np.ndarray): Road capacity per arc id.
+        arc_ids (dict): (from_id, to_id) to arc id mappings.
+        road_arcs (dict): Road name (e.g., 'Maadi-Downtown Cairo') to arc id mappings.
+        period_index (dict): Time period name to column index.
+        version (int): Change counter, incremented on every rebuild or in-place road update.
+        snapshot (int): Rebuild counter; unchanged by update_road_volumes, whose
+            changes are announced to traffic listeners instead.
+    """
+
+    def __init__(self, factors, capacities, arc_ids, road_arcs, version, snapshot=None):
+        self.factors = factors
+        self.capacities = capacities
+        self.arc_ids = arc_ids
+        self.road_arcs = road_arcs
+        self.period_index = {period: i for i, period in enumerate(TIME_PERIODS)}
+        self.version = version
+        self.snapshot = version if snapshot is None else snapshot
+
+    def column(self, time_of_day):
+        """
+        Returns the factor column for a time period.
+
+        Args:
+            time_of_day (str): Time period ('Morning', 'Afternoon', 'Evening', 'Night').
+
+        Returns:
+            np.ndarray: Congestion factor per arc id.
+        """
+        return self.factors[:, self.period_index[time_of_day]]
+
+    def factor(self, u, v, time_of_day):
+        """
+        Looks up the congestion factor for travelling from node u to node v.
+
+        Args:
+            u: Starting node ID.
+            v: Ending node ID.
+            time_of_day (str): Time period.
+
+        Returns:
+            float: Congestion factor (0.5 to 2.0), or 1.0 for roads without traffic data.
+
+        Time Complexity: O(1).
+        """
+        arc = self.arc_ids.get((u, v))
+        if arc is None:
+            return 1.0
+        return float(self.factors[arc, self.period_index[time_of_day]])
+
+    def road_factor(self, road_name, time_of_day):
+        """
+        Looks up the congestion factor by road name.
+
+        Args:
+            road_name (str): Road name (e.g., 'Maadi-Downtown Cairo').
+            time_of_day (str): Time period.
+
+        Returns:
+            float: Congestion factor (0.5 to 2.0), or 1.0 for unknown roads.
+
+        Time Complexity: O(1).
+        """
+        arc = self.road_arcs.get(road_name)
+        if arc is None:
+            return 1.0
+        return float(self.factors[arc, self.period_index[time_of_day]])
+
+def frame_fingerprint(df):
+    """
+    Computes a content hash of a DataFrame, used to detect traffic snapshot changes.
+
+    Args:
+        df (pd.DataFrame): Any DataFrame.
+
+    Returns:
+        tuple: (row count, column names, combined row hash).
+
+    Time Complexity: O(R) vectorized hashing over R rows.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return len(df), tuple(df.columns), int(row_hashes.sum())
+
+def build_congestion_table(df_traffic, df_existing, name_to_id, version=0):
+    """
+    Builds the congestion table with vectorized pandas/NumPy operations.
+
+    Args:
+        df_traffic (pd.DataFrame): Traffic data with 'RoadName' and one column per time period.
+        df_existing (pd.DataFrame): Existing roads with 'FromID', 'ToID' and 'Capacity'.
+        name_to_id (dict): Name to ID mapping.
+        version (int): Snapshot counter stored on the table.
+
+    Returns:
+        CongestionTable: Factors for both directions of every existing road.
+
+    Time Complexity: O(R + T) where R is existing roads and T is traffic rows.
+    """
+    id_to_name = {v: k for k, v in name_to_id.items()}
+    roads = df_existing[['FromID', 'ToID', 'Capacity']]
+    # Keep the first row of a road listed in both directions, as the old boolean filter did
+    pair_keys = [frozenset(pair) for pair in zip(roads['FromID'], roads['ToID'])]
+    roads = roads[~pd.Series(pair_keys, index=roads.index).duplicated().to_numpy()]
+    from_ids = roads['FromID'].tolist()
+    to_ids = roads['ToID'].tolist()
+    from_names = pd.Series([id_to_name.get(u, str(u)) for u in from_ids], dtype=object)
+    to_names = pd.Series([id_to_name.get(v, str(v)) for v in to_ids], dtype=object)
+    arc_names = np.empty(2 * len(roads), dtype=object)
+    arc_names[0::2] = (from_names + '-' + to_names).to_numpy()
+    arc_names[1::2] = (to_names + '-' + from_names).to_numpy()
+    capacity = np.repeat(roads['Capacity'].to_numpy(dtype=float), 2)
+    volumes = (df_traffic.drop_duplicates('RoadName')
+               .set_index('RoadName')
+               .reindex(arc_names)[list(TIME_PERIODS)]
+               .to_numpy(dtype=float))
+    factors = np.clip(volumes / capacity[:, None], 0.5, 2.0)
+    factors[np.isnan(factors)] = 1.0
+    arc_ids = {}
+    for k, (u, v) in enumerate(zip(from_ids, to_ids)):
+        arc_ids[(u, v)] = 2 * k
+        arc_ids[(v, u)] = 2 * k + 1
+    road_arcs = {name: arc for arc, name in enumerate(arc_names)}
+    return CongestionTable(factors, capacity, arc_ids, road_arcs, version)
+
+def _table_key(df_traffic, df_existing, name_to_id):
+    return frame_fingerprint(df_traffic), frame_fingerprint(df_existing), hash(frozenset(name_to_id.items()))
+
+def get_congestion_table(df_traffic, df_existing, name_to_id):
+    """
+    Returns the congestion table for the current traffic snapshot, rebuilding it
+    only when df_traffic, df_existing or the name mapping has changed.
+
+    Args:
+        df_traffic (pd.DataFrame): Traffic data.
+        df_existing (pd.DataFrame): Existing roads data.
+        name_to_id (dict): Name to ID mapping.
+
+    Returns:
+        CongestionTable: Cached or freshly built table.
+
+    Time Complexity: O(R) vectorized hashing on a hit, O(R + T) on a rebuild.
+    """
+    key = _table_key(df_traffic, df_existing, name_to_id)
+    cached = _table_cache.get('table')
+    if cached is not None and _table_cache.get('key') == key:
+        return cached
+    version = cached.version + 1 if cached is not None else 1
+    table = build_congestion_table(df_traffic, df_existing, name_to_id, version)
+    _table_cache['key'] = key
+    _table_cache['table'] = table
+    return table
+
+def add_traffic_listener(listener):
+    """
+    Registers a callback for in-place road volume updates.
+
+    Args:
+        listener (callable): Called as listener(road_name, changes) where changes maps
+            each affected time period to its (old_factor, new_factor).
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def update_road_volumes(df_traffic, df_existing, name_to_id, road_name, volumes):
+    """
+    Updates one road's traffic volumes in place and patches the cached congestion table.
+
+    The table keeps its snapshot number, so caches keyed on it stay valid;
+    registered listeners are told which factors changed so they can drop only
+    the entries that depend on this road.
+
+    Args:
+        df_traffic (pd.DataFrame): Traffic data, modified in place.
+        df_existing (pd.DataFrame): Existing roads data.
+        name_to_id (dict): Name to ID mapping.
+        road_name (str): Road name (e.g., 'Maadi-Downtown Cairo').
+        volumes (dict): Time period to new traffic volume.
+
+    Raises:
+        KeyError: If df_traffic has no record for road_name.
+
+    Time Complexity: O(R) vectorized hashing to keep the snapshot key current.
+    """
+    rows = df_traffic.index[df_traffic['RoadName'] == road_name]
+    if len(rows) == 0:
+        raise KeyError(road_name)
+    table = _table_cache.get('table')
+    if table is not None and _table_cache.get('key') != _table_key(df_traffic, df_existing, name_to_id):
+        table = None
+    for period, volume in volumes.items():
+        df_traffic.loc[rows[0], period] = volume
+    if table is None:
+        return
+    _table_cache['key'] = _table_key(df_traffic, df_existing, name_to_id)
+    arc = table.road_arcs.get(road_name)
+    if arc is None:
+        return
+    changes = {}
+    for period in volumes:
+        col = table.period_index[period]
+        old = float(table.factors[arc, col])
+        new = float(np.clip(df_traffic.loc[rows[0], period] / table.capacities[arc], 0.5, 2.0))
+        if new != old:
+            table.factors[arc, col] = new
+            changes[period] = (old, new)
+    if changes:
+        table.version += 1
+        for listener in _listeners:
+            listener(road_name, changes)
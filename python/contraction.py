@@ -0,0 +1,459 @@
+import heapq
+import math
+import time
+import numpy as np
+from congestion import TIME_PERIODS
+from network import RoadNetwork
+
+class HierarchyMetric:
+    """
+    Edge weights of a ContractionHierarchy for one metric (e.g., one time period).
+
+    Attributes:
+        up (np.ndarray): Weight of each hierarchy edge travelled from its lower to its higher node.
+        down (np.ndarray): Weight of each hierarchy edge travelled from its higher to its lower node.
+        up_via (np.ndarray): Middle node of the upward shortcut, -1 for original roads.
+        down_via (np.ndarray): Middle node of the downward shortcut, -1 for original roads.
+    """
+
+    def __init__(self, up, down, up_via, down_via):
+        self.up = up
+        self.down = down
+        self.up_via = up_via
+        self.down_via = down_via
+
+    @property
+    def nbytes(self):
+        return self.up.nbytes + self.down.nbytes + self.up_via.nbytes + self.down_via.nbytes
+
+class ContractionHierarchy:
+    """
+    Customizable Contraction Hierarchy over a RoadNetwork.
+
+    Preprocessing picks one node order (geometric nested dissection, or
+    minimum-degree elimination when coordinates are missing) and adds every
+    fill-in shortcut, so the hierarchy's topology does not depend on the edge
+    weights. Each congestion profile is then applied with customize(), which
+    only recomputes shortcut weights over lower triangles, and queries run as
+    bidirectional upward searches along the elimination tree.
+
+    Every hierarchy edge {u, v} with rank[u] < rank[v] is stored once as
+    ``up_targets[k] = v`` in u's upward slice, sorted by rank; a metric keeps
+    separate weights for the upward (u -> v) and downward (v -> u) directions.
+
+    Attributes:
+        network (RoadNetwork): Network the hierarchy was built over.
+        rank (np.ndarray): Contraction position per node index.
+        up_offsets (np.ndarray): CSR offsets of the upward edges.
+        up_targets (np.ndarray): Higher endpoint of every hierarchy edge.
+        edge_lows (np.ndarray): Lower endpoint of every hierarchy edge.
+        arc_edges (np.ndarray): Hierarchy edge of every network arc.
+        arc_upward (np.ndarray): True where the network arc runs from lower to higher rank.
+        triangles (tuple): Int32 arrays (edge x-a, edge x-b, edge a-b, x) for every lower
+            triangle x < a < b, grouped by elimination-tree level.
+        level_offsets (np.ndarray): Triangle slice boundaries per level.
+        preprocessing_seconds (float): Time spent building the hierarchy.
+    """
+
+    def __init__(self, network):
+        started = time.perf_counter()
+        self.network = network
+        n = network.num_nodes
+        sources = network.sources.astype(np.int64)
+        targets = network.targets.astype(np.int64)
+        neighbors = [set() for _ in range(n)]
+        for u, v in zip(sources.tolist(), targets.tolist()):
+            if u != v:
+                neighbors[u].add(v)
+                neighbors[v].add(u)
+        if n and np.isfinite(network.x).all() and np.isfinite(network.y).all():
+            order = self._nested_dissection_order(neighbors, network.x, network.y)
+        else:
+            order = self._minimum_degree_order(neighbors)
+        rank = np.empty(n, dtype=np.int64)
+        rank[np.array(order, dtype=np.int64)] = np.arange(n)
+        self.rank = rank
+        rank_list = rank.tolist()
+        # Fill-in: contracting a node connects all of its higher neighbors pairwise
+        upward = [None] * n
+        for node in order:
+            higher = sorted((v for v in neighbors[node] if rank_list[v] > rank_list[node]), key=rank_list.__getitem__)
+            upward[node] = higher
+            for i, a in enumerate(higher):
+                neighbors[a].update(higher[i + 1:])
+        counts = np.array([len(up) for up in upward], dtype=np.int64)
+        self.up_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.up_offsets[1:])
+        self.up_targets = np.fromiter((v for up in upward for v in up), dtype=np.int32, count=int(counts.sum()))
+        self.edge_lows = np.repeat(np.arange(n, dtype=np.int32), counts)
+        # Edges sorted by (low, rank of high), so a (low, high) pair is found by binary search
+        self._edge_keys = self.edge_lows.astype(np.int64) * n + rank[self.up_targets]
+        low = np.where(rank[sources] < rank[targets], sources, targets)
+        high = np.where(rank[sources] < rank[targets], targets, sources)
+        self.arc_upward = rank[sources] < rank[targets]
+        self.arc_edges = self._edge_id(low, high)
+        # Elimination-tree levels: an edge (x, a) is only updated through triangles whose
+        # lowest node is below x in the tree, so all triangles on one level are independent
+        level = np.zeros(n, dtype=np.int64)
+        self._parent = [up[0] if up else -1 for up in upward]
+        for node in order:
+            parent = self._parent[node]
+            if parent != -1:
+                level[parent] = max(level[parent], level[node] + 1)
+        chunks = []
+        for node in order:
+            degree = len(upward[node])
+            if degree < 2:
+                continue
+            i, j = np.triu_indices(degree, 1)
+            higher = np.array(upward[node], dtype=np.int64)
+            base = self.up_offsets[node]
+            chunks.append(((base + i).astype(np.int32), (base + j).astype(np.int32),
+                           self._edge_id(higher[i], higher[j]).astype(np.int32),
+                           np.full(len(i), node, dtype=np.int32), np.full(len(i), level[node], dtype=np.int32)))
+        if chunks:
+            columns = [np.concatenate(column) for column in zip(*chunks)]
+        else:
+            columns = [np.empty(0, dtype=np.int32) for _ in range(5)]
+        by_level = np.argsort(columns[4], kind='stable')
+        self.triangles = tuple(column[by_level] for column in columns[:4])
+        self.level_offsets = np.searchsorted(columns[4][by_level], np.arange(level.max() + 2 if n else 1))
+        self._target_ranks = rank[self.up_targets]
+        self.preprocessing_seconds = time.perf_counter() - started
+
+    def _edge_id(self, low, high):
+        """Hierarchy edge ids for arrays of (lower, higher) node pairs."""
+        return np.searchsorted(self._edge_keys, np.asarray(low, dtype=np.int64) * self.network.num_nodes + self.rank[high])
+
+    @staticmethod
+    def _minimum_degree_order(neighbors):
+        """
+        Orders nodes by simulated minimum-degree elimination.
+
+        Args:
+            neighbors (list): Adjacency sets per node index (not modified).
+
+        Returns:
+            list: Node indices in contraction order.
+        """
+        graph = [set(adj) for adj in neighbors]
+        eliminated = [False] * len(graph)
+        queue = [(len(adj), node) for node, adj in enumerate(graph)]
+        heapq.heapify(queue)
+        order = []
+        while queue:
+            degree, node = heapq.heappop(queue)
+            if eliminated[node] or degree != len(graph[node]):
+                continue
+            eliminated[node] = True
+            order.append(node)
+            remaining = list(graph[node])
+            for a in remaining:
+                graph[a].discard(node)
+                graph[a].update(b for b in remaining if b != a)
+                heapq.heappush(queue, (len(graph[a]), a))
+        return order
+
+    @staticmethod
+    def _nested_dissection_order(neighbors, x, y, leaf_size=16):
+        """
+        Orders nodes by geometric nested dissection.
+
+        Each part is split at the median of its wider coordinate axis; the nodes
+        on the smaller side of the cut that touch the other side form a separator
+        and are contracted after both halves. Road networks have small separators,
+        which keeps the fill-in and the upward search spaces small.
+
+        Args:
+            neighbors (list): Adjacency sets per node index.
+            x (np.ndarray): x coordinate per node index.
+            y (np.ndarray): y coordinate per node index.
+            leaf_size (int): Parts at most this large are ordered by degree.
+
+        Returns:
+            list: Node indices in contraction order.
+        """
+        order = []
+        # Explicit stack of (nodes, emitted); a part's separator is emitted after its halves
+        stack = [(np.arange(len(neighbors)), None)]
+        while stack:
+            nodes, separator = stack.pop()
+            if separator is not None:
+                order.extend(separator)
+                continue
+            if len(nodes) <= leaf_size:
+                order.extend(sorted(nodes.tolist(), key=lambda node: len(neighbors[node])))
+                continue
+            xs, ys = x[nodes], y[nodes]
+            coords = xs if np.ptp(xs) >= np.ptp(ys) else ys
+            ranked = nodes[np.argsort(coords, kind='stable')]
+            half = len(ranked) // 2
+            left, right = ranked[:half], ranked[half:]
+            left_set, right_set = set(left.tolist()), set(right.tolist())
+            left_cut = [node for node in left.tolist() if not neighbors[node].isdisjoint(right_set)]
+            right_cut = [node for node in right.tolist() if not neighbors[node].isdisjoint(left_set)]
+            if len(left_cut) <= len(right_cut):
+                cut, cut_set = left_cut, set(left_cut)
+                left = np.array([node for node in left.tolist() if node not in cut_set], dtype=np.int64)
+            else:
+                cut, cut_set = right_cut, set(right_cut)
+                right = np.array([node for node in right.tolist() if node not in cut_set], dtype=np.int64)
+            stack.append((None, cut))
+            stack.append((left, None))
+            stack.append((right, None))
+        return order
+
+    @classmethod
+    def from_graph(cls, graph, weight='distance'):
+        """
+        Builds the hierarchy over a networkx graph such as urban_planning.build_traffic_graph().
+
+        Args:
+            graph (nx.Graph): Road graph.
+            weight (str): Edge attribute used as base arc weight.
+
+        Returns:
+            ContractionHierarchy: Preprocessed hierarchy.
+        """
+        return cls(RoadNetwork.from_graph(graph, weight=weight))
+
+    @property
+    def num_shortcuts(self):
+        return len(self.up_targets) - len(np.unique(self.arc_edges))
+
+    @property
+    def nbytes(self):
+        """Bytes held by the weight-independent hierarchy arrays."""
+        arrays = (self.rank, self.up_offsets, self.up_targets, self.edge_lows, self.arc_edges, self.arc_upward, self.level_offsets, self._edge_keys) + self.triangles
+        return sum(a.nbytes for a in arrays)
+
+    def customize(self, arc_weights):
+        """
+        Applies a metric to the hierarchy.
+
+        Original roads seed the edge weights, then lower triangles are processed
+        level by level with vectorized minimum updates.
+
+        Args:
+            arc_weights (array-like): Weight per CSR arc of the underlying network.
+
+        Returns:
+            HierarchyMetric: Weights and shortcut middle nodes per hierarchy edge.
+
+        Time Complexity: O(T) where T is the number of lower triangles.
+        """
+        m = len(self.up_targets)
+        arc_weights = np.asarray(arc_weights, dtype=np.float64)
+        up = np.full(m, np.inf)
+        down = np.full(m, np.inf)
+        np.minimum.at(up, self.arc_edges[self.arc_upward], arc_weights[self.arc_upward])
+        np.minimum.at(down, self.arc_edges[~self.arc_upward], arc_weights[~self.arc_upward])
+        up_via = np.full(m, -1, dtype=np.int32)
+        down_via = np.full(m, -1, dtype=np.int32)
+        to_a, to_b, across, middle = self.triangles
+        for lo, hi in zip(self.level_offsets[:-1].tolist(), self.level_offsets[1:].tolist()):
+            if lo == hi:
+                continue
+            ta, tb, edges, xs = to_a[lo:hi], to_b[lo:hi], across[lo:hi], middle[lo:hi]
+            # a -> x -> b and b -> x -> a
+            for weights, via, candidate in ((up, up_via, down[ta] + up[tb]), (down, down_via, down[tb] + up[ta])):
+                before = weights[edges]
+                np.minimum.at(weights, edges, candidate)
+                improved = (candidate < before) & (candidate == weights[edges])
+                via[edges[improved]] = xs[improved]
+        return HierarchyMetric(up, down, up_via, down_via)
+
+    def customize_profiles(self, table, periods=TIME_PERIODS):
+        """
+        Customizes one metric per congestion profile, reusing the same node order.
+
+        Args:
+            table (CongestionTable): Congestion table for the current traffic snapshot.
+            periods (tuple): Time periods to customize.
+
+        Returns:
+            dict: Time period to HierarchyMetric.
+        """
+        return {period: self.customize(self.network.travel_times(table, period)) for period in periods}
+
+    def _chain(self, node):
+        """Returns node and its elimination-tree ancestors, in increasing rank."""
+        parent = self._parent
+        chain = []
+        while node != -1:
+            chain.append(node)
+            node = parent[node]
+        return chain
+
+    def _chain_search(self, chain, weights):
+        """
+        Upward search restricted to an elimination-tree chain.
+
+        Every upward neighbor of a node is one of its ancestors, so relaxing the
+        chain in rank order settles it without a priority queue.
+
+        Returns:
+            tuple: (distances, parent_edges) arrays over the chain positions.
+        """
+        chain_ranks = self.rank[chain]
+        distances = np.full(len(chain), np.inf)
+        parent_edges = np.full(len(chain), -1, dtype=np.int64)
+        distances[0] = 0.0
+        for i, node in enumerate(chain):
+            dist = distances[i]
+            lo, hi = self.up_offsets[node], self.up_offsets[node + 1]
+            if dist == np.inf or lo == hi:
+                continue
+            slots = np.searchsorted(chain_ranks, self._target_ranks[lo:hi])
+            candidate = dist + weights[lo:hi]
+            better = candidate < distances[slots]
+            distances[slots[better]] = candidate[better]
+            parent_edges[slots[better]] = lo + np.flatnonzero(better)
+        return distances, parent_edges
+
+    def _unpack(self, metric, edge, upward, path):
+        """Appends the original nodes of a hierarchy edge (excluding its start) to path."""
+        stack = [(edge, upward)]
+        while stack:
+            k, is_up = stack.pop()
+            via = int(metric.up_via[k] if is_up else metric.down_via[k])
+            low = int(self.edge_lows[k])
+            high = int(self.up_targets[k])
+            if via == -1:
+                path.append(high if is_up else low)
+                continue
+            to_low, to_high = self._edge_id([via, via], [low, high]).tolist()
+            if is_up:
+                # low -> via -> high
+                stack.append((to_high, True))
+                stack.append((to_low, False))
+            else:
+                # high -> via -> low
+                stack.append((to_low, True))
+                stack.append((to_high, False))
+        return path
+
+    def query(self, metric, source, target):
+        """
+        Bidirectional upward search between two node indices.
+
+        Args:
+            metric (HierarchyMetric): Metric returned by customize().
+            source (int): Source node index.
+            target (int): Target node index.
+
+        Returns:
+            tuple: (distance, path) with path as node indices, or (inf, []) if unreachable.
+
+        Time Complexity: O(S) where S is the number of upward edges of the two
+        elimination-tree chains, independent of the network size.
+        """
+        forward_chain = self._chain(source)
+        backward_chain = self._chain(target)
+        forward, forward_edges = self._chain_search(forward_chain, metric.up)
+        backward, backward_edges = self._chain_search(backward_chain, metric.down)
+        # Both chains end in the same ancestors once they meet
+        shared = 0
+        while (shared < min(len(forward_chain), len(backward_chain))
+               and forward_chain[-1 - shared] == backward_chain[-1 - shared]):
+            shared += 1
+        if shared == 0:
+            return math.inf, []
+        totals = forward[len(forward) - shared:] + backward[len(backward) - shared:]
+        best = int(np.argmin(totals))
+        if totals[best] == np.inf:
+            return math.inf, []
+        forward_position = {node: i for i, node in enumerate(forward_chain)}
+        backward_position = {node: i for i, node in enumerate(backward_chain)}
+        meeting = forward_chain[len(forward) - shared + best]
+        edges = []
+        node = meeting
+        while forward_edges[forward_position[node]] != -1:
+            k = int(forward_edges[forward_position[node]])
+            edges.append(k)
+            node = int(self.edge_lows[k])
+        path = [source]
+        for k in reversed(edges):
+            self._unpack(metric, k, True, path)
+        node = meeting
+        while backward_edges[backward_position[node]] != -1:
+            # Upward in the backward search means travelling down towards target
+            k = int(backward_edges[backward_position[node]])
+            self._unpack(metric, k, False, path)
+            node = int(self.edge_lows[k])
+        return float(totals[best]), path
+
+    def route(self, metric, start_name, end_name):
+        """
+        Name-based query with the same return shape as time_dependent_dijkstra.
+
+        Args:
+            metric (HierarchyMetric): Metric returned by customize().
+            start_name (str): Starting node name.
+            end_name (str): Destination node name.
+
+        Returns:
+            tuple: (total_time, path_names) or (inf, []) if no path exists.
+        """
+        distance, path = self.query(metric, self.network.name_index[start_name], self.network.name_index[end_name])
+        return distance, [self.network.names[i] for i in path]
+
+def benchmark_contraction(graph, df_traffic, df_existing, name_to_id, id_to_name, queries=100, seed=0):
+    """
+    Reports preprocessing time, index size and query speedup against time_dependent_dijkstra.
+
+    Args:
+        graph (nx.Graph): Road graph from urban_planning.build_traffic_graph().
+        df_traffic (pd.DataFrame): Traffic data.
+        df_existing (pd.DataFrame): Existing roads data.
+        name_to_id (dict): Name to ID mapping.
+        id_to_name (dict): ID to name mapping.
+        queries (int): Number of random origin-destination queries per time period.
+        seed (int): Random seed for the query sample.
+
+    Returns:
+        dict: Timings, sizes and speedups.
+    """
+    from algorithms import time_dependent_dijkstra
+    from congestion import get_congestion_table
+    table = get_congestion_table(df_traffic, df_existing, name_to_id)
+    hierarchy = ContractionHierarchy.from_graph(graph)
+    started = time.perf_counter()
+    metrics = hierarchy.customize_profiles(table)
+    customization_seconds = time.perf_counter() - started
+    rng = np.random.default_rng(seed)
+    names = hierarchy.network.names
+    pairs = [(names[a], names[b]) for a, b in rng.integers(0, len(names), size=(queries, 2))]
+    ch_seconds = dijkstra_seconds = 0.0
+    for period, metric in metrics.items():
+        started = time.perf_counter()
+        for start_name, end_name in pairs:
+            hierarchy.route(metric, start_name, end_name)
+        ch_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        for start_name, end_name in pairs:
+            time_dependent_dijkstra(graph, start_name, end_name, period, df_traffic, df_existing, name_to_id, id_to_name)
+        dijkstra_seconds += time.perf_counter() - started
+    total_queries = len(pairs) * len(metrics)
+    metric_bytes = sum(metric.nbytes for metric in metrics.values())
+    return {
+        'nodes': hierarchy.network.num_nodes,
+        'edges': hierarchy.network.num_arcs // 2,
+        'shortcuts': hierarchy.num_shortcuts,
+        'preprocessing_seconds': hierarchy.preprocessing_seconds,
+        'customization_seconds': customization_seconds,
+        'index_bytes': hierarchy.nbytes,
+        'metric_bytes': metric_bytes,
+        'ch_query_ms': 1000 * ch_seconds / total_queries,
+        'dijkstra_query_ms': 1000 * dijkstra_seconds / total_queries,
+        'speedup': dijkstra_seconds / ch_seconds if ch_seconds else math.inf,
+    }
+
+if __name__ == "__main__":
+    from data import all_nodes, df_existing, df_traffic
+    from urban_planning import build_traffic_graph
+    name_to_id = {row['Name']: row['ID'] for _, row in all_nodes.iterrows()}
+    id_to_name = {v: k for k, v in name_to_id.items()}
+    report = benchmark_contraction(build_traffic_graph(), df_traffic, df_existing, name_to_id, id_to_name)
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,322 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from network import DATA_DIR
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = '.cache'
+
+# Column kinds per CSV file: 'id' columns hold node IDs and are checked against
+# nodes.csv and facilities.csv; 'str' columns are kept as fixed-width text.
+SCHEMAS = {
+    'nodes': {'id': 'id', 'name': 'str', 'population': 'int64', 'type': 'str', 'x': 'float64', 'y': 'float64'},
+    'facilities': {'id': 'id', 'name': 'str', 'type': 'str', 'x': 'float64', 'y': 'float64'},
+    'existing_roads': {'from': 'id', 'to': 'id', 'distance': 'float64', 'capacity': 'int64', 'condition': 'int64'},
+    'potential_roads': {'from': 'id', 'to': 'id', 'distance': 'float64', 'capacity': 'int64', 'cost': 'int64'},
+    'edges': {'from': 'id', 'to': 'id', 'distance': 'float64', 'type': 'str'},
+    'traffic_flow': {'road': 'str', 'morning': 'int64', 'afternoon': 'int64', 'evening': 'int64', 'night': 'int64'},
+    'transit_demand': {'from': 'id', 'to': 'id', 'daily_passengers': 'int64'},
+    'bus_routes': {'id': 'str', 'stops': 'str', 'buses_assigned': 'int64', 'daily_passengers': 'int64'},
+    'metro_lines': {'id': 'str', 'name': 'str', 'stations': 'str', 'daily_passengers': 'int64'},
+}
+NODE_TABLES = ('nodes', 'facilities')
+# Text columns that hold separated node IDs: separator per table and column
+ID_LISTS = {
+    'traffic_flow': {'road': '-'},
+    'bus_routes': {'stops': ','},
+    'metro_lines': {'stations': ','},
+}
+
+_tables = {}
+
+class Table:
+    """
+    Read-only columnar view of one CSV file, backed by memory-mapped .npy files.
+
+    Columns are opened on first access, so touching one column of a large
+    table does not read the others.
+
+    Attributes:
+        name (str): Table name, the CSV file name without extension.
+        columns (list): Column names in schema order.
+        path (str): Cache directory of the table.
+    """
+
+    def __init__(self, name, path, columns, num_rows, arrays=None):
+        self.name = name
+        self.path = path
+        self.columns = list(columns)
+        self._num_rows = num_rows
+        self._arrays = dict(arrays or {})
+
+    def __len__(self):
+        return self._num_rows
+
+    def __getitem__(self, column):
+        """
+        Returns one column as stored: int64 or float64 numbers, fixed-width
+        text, and node IDs as int64 when they are all numeric or text otherwise.
+
+        Args:
+            column (str): Column name.
+
+        Returns:
+            np.ndarray: Memory-mapped column.
+
+        Time Complexity: O(1); pages are read on use.
+        """
+        if column not in self._arrays:
+            if column not in self.columns:
+                raise KeyError(column)
+            self._arrays[column] = np.load(os.path.join(self.path, f"{column}.npy"), mmap_mode='r')
+        return self._arrays[column]
+
+    def node_ids(self, column):
+        """
+        Returns an ID column in the form used by data.py.
+
+        Args:
+            column (str): Column of kind 'id'.
+
+        Returns:
+            np.ndarray: Int64 IDs, or an object array mixing ints and 'F1'-style strings.
+        """
+        return parse_node_ids(self[column])
+
+    def frame(self, columns=None):
+        """
+        Materializes columns as a DataFrame with data.py's ID form.
+
+        Args:
+            columns (list, optional): Columns to include; all by default.
+
+        Returns:
+            pd.DataFrame: Table contents; text columns hold Python strings.
+
+        Time Complexity: O(R) per column for R rows.
+        """
+        data = {}
+        for column in columns or self.columns:
+            values = self[column]
+            if SCHEMAS[self.name][column] == 'id':
+                data[column] = self.node_ids(column)
+            elif values.dtype.kind == 'U':
+                data[column] = values.astype(object)
+            else:
+                data[column] = np.array(values)
+        return pd.DataFrame(data)
+
+def parse_node_ids(values):
+    """
+    Vectorized parse_node_id.
+
+    Args:
+        values (np.ndarray): Int64 IDs, or text IDs.
+
+    Returns:
+        np.ndarray: Int64 IDs if all are numeric, otherwise an object array of ints and strings.
+    """
+    if values.dtype.kind != 'U':
+        return np.array(values, dtype=np.int64)
+    values = np.char.strip(values)
+    numeric = np.char.isdigit(values)
+    if numeric.all():
+        return values.astype(np.int64)
+    ids = values.astype(object)
+    ids[numeric] = values[numeric].astype(np.int64).astype(object)
+    return ids
+
+def _source_signature(data_dir, name):
+    stat = os.stat(os.path.join(data_dir, f"{name}.csv"))
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _signatures(data_dir, name):
+    # A table with node references is also stale when the node files change
+    names = [name]
+    if name not in NODE_TABLES and (ID_LISTS.get(name) or 'id' in SCHEMAS[name].values()):
+        names += NODE_TABLES
+    return {table: _source_signature(data_dir, table) for table in names}
+
+def read_csv(name, data_dir=DATA_DIR):
+    """
+    Reads one CSV file with its schema and returns its columns as arrays.
+
+    Args:
+        name (str): Table name in SCHEMAS.
+        data_dir (str): Directory holding the CSV files.
+
+    Returns:
+        dict: Column name to np.ndarray in the cached storage form.
+
+    Raises:
+        ValueError: If a schema column is missing or a value does not parse.
+    """
+    schema = SCHEMAS[name]
+    text = [column for column, kind in schema.items() if kind in ('id', 'str')]
+    path = os.path.join(data_dir, f"{name}.csv")
+    try:
+        df = pd.read_csv(path, usecols=list(schema), keep_default_na=False,
+                         dtype={column: str if column in text else kind for column, kind in schema.items()})
+    except ValueError as error:
+        raise ValueError(f"{path}: {error}") from error
+    columns = {}
+    for column, kind in schema.items():
+        values = df[column]
+        if kind == 'id':
+            values = values.str.strip()
+            # All-numeric IDs are stored as integers, which keeps lookups numeric
+            numeric = values.str.isdigit().all()
+            columns[column] = values.astype(np.int64).to_numpy() if numeric else values.to_numpy(dtype=str)
+        elif kind == 'str':
+            columns[column] = values.to_numpy(dtype=str)
+        else:
+            columns[column] = values.to_numpy()
+    return columns
+
+def locate_ids(known, values):
+    """
+    Finds node IDs in a list of known IDs.
+
+    Integer IDs are matched numerically, against the numeric part of known
+    when it also holds 'F1'-style IDs; text IDs are matched as text.
+
+    Args:
+        known (np.ndarray): Known node IDs, int64 or text.
+        values (np.ndarray): IDs to look up, int64 or text.
+
+    Returns:
+        np.ndarray: Int64 position of each value in known, or -1 if absent.
+
+    Time Complexity: O(K + R) hashing for K known and R looked-up IDs.
+    """
+    if values.dtype.kind != 'i':
+        return pd.Index(known.astype(str)).get_indexer(values.astype(str))
+    if known.dtype.kind == 'i':
+        return pd.Index(known).get_indexer(values)
+    known = known.astype(str)
+    numeric = np.flatnonzero(np.char.isdigit(known))
+    found = pd.Index(known[numeric].astype(np.int64)).get_indexer(values)
+    return np.where(found >= 0, numeric[found], -1)
+
+def validate_ids(name, columns, known):
+    """
+    Checks that every node reference in a table names a known node.
+
+    Args:
+        name (str): Table name in SCHEMAS.
+        columns (dict): Column arrays from read_csv.
+        known (np.ndarray): Known node IDs, int64 or text.
+
+    Raises:
+        ValueError: Listing up to five unknown IDs per column.
+    """
+    references = {column: columns[column] for column, kind in SCHEMAS[name].items() if kind == 'id'}
+    for column, separator in ID_LISTS.get(name, {}).items():
+        joined = separator.join(columns[column].tolist())
+        references[column] = np.char.strip(np.array(joined.split(separator) if joined else [], dtype=str))
+    for column, values in references.items():
+        unknown = np.unique(values[locate_ids(known, values) < 0]).astype(str)
+        if len(unknown):
+            raise ValueError(f"{name}.csv column '{column}' references unknown node IDs: "
+                             f"{', '.join(unknown[:5].tolist())}{' ...' if len(unknown) > 5 else ''}")
+
+def _write_cache(name, columns, signatures, path):
+    staging = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for column, values in columns.items():
+        np.save(os.path.join(staging, f"{column}.npy"), np.ascontiguousarray(values))
+    meta = {'version': CACHE_VERSION, 'schema': SCHEMAS[name], 'sources': signatures,
+            'rows': len(next(iter(columns.values())))}
+    with open(os.path.join(staging, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+
+def _cache_valid(path, name, signatures):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION or meta.get('schema') != SCHEMAS[name] or meta.get('sources') != signatures:
+        return None
+    return meta
+
+def load_table(name, data_dir=DATA_DIR, cache_dir=None):
+    """
+    Opens a CSV table through its columnar cache, converting it first if needed.
+
+    The first load reads the CSV with its schema, validates node IDs
+    against nodes.csv and facilities.csv, and writes one .npy file per
+    column. Later loads only read a small metadata file and memory-map the
+    columns on access. The cache is rebuilt when the CSV, the node files
+    or the schema change.
+
+    Args:
+        name (str): Table name in SCHEMAS, e.g. 'existing_roads'.
+        data_dir (str): Directory holding the CSV files.
+        cache_dir (str, optional): Cache directory; defaults to data_dir/.cache.
+
+    Returns:
+        Table: Columnar view of the table.
+
+    Raises:
+        ValueError: If the CSV does not match its schema or references unknown nodes.
+
+    Time Complexity: O(1) from cache; O(R + K) on conversion for R rows and K known nodes.
+    """
+    if name not in SCHEMAS:
+        raise KeyError(name)
+    cache_dir = cache_dir or os.path.join(data_dir, CACHE_DIRNAME)
+    path = os.path.join(cache_dir, name)
+    signatures = _signatures(data_dir, name)
+    meta = _cache_valid(path, name, signatures)
+    if meta is None:
+        columns = read_csv(name, data_dir)
+        if len(signatures) > 1:
+            validate_ids(name, columns, known_ids(data_dir, cache_dir))
+        elif name in NODE_TABLES and not pd.Index(columns['id']).is_unique:
+            raise ValueError(f"{name}.csv has duplicate IDs")
+        try:
+            _write_cache(name, columns, signatures, path)
+        except OSError:
+            # Read-only data directory: serve this process from memory
+            return Table(name, path, SCHEMAS[name], len(next(iter(columns.values()))), columns)
+        meta = _cache_valid(path, name, signatures)
+    return Table(name, path, SCHEMAS[name], meta['rows'])
+
+def known_ids(data_dir=DATA_DIR, cache_dir=None):
+    """
+    Returns the IDs of nodes.csv followed by facilities.csv.
+
+    Args:
+        data_dir (str): Directory holding the CSV files.
+        cache_dir (str, optional): Cache directory; defaults to data_dir/.cache.
+
+    Returns:
+        np.ndarray: Int64 IDs if all are numeric, otherwise text IDs.
+    """
+    ids = [np.asarray(load_table(table, data_dir, cache_dir)['id']) for table in NODE_TABLES]
+    return np.concatenate(ids if all(part.dtype.kind == 'i' for part in ids) else [part.astype(str) for part in ids])
+
+def get_table(name, data_dir=DATA_DIR):
+    """
+    Returns the Table for a CSV file, reopened only when the file changes.
+
+    Args:
+        name (str): Table name in SCHEMAS.
+        data_dir (str): Directory holding the CSV files.
+
+    Returns:
+        Table: Cached or new table.
+    """
+    key = (name, os.path.abspath(data_dir))
+    signatures = _signatures(data_dir, name)
+    cached = _tables.get(key)
+    if cached is None or cached[0] != signatures:
+        cached = (signatures, load_table(name, data_dir))
+        _tables[key] = cached
+    return cached[1]
@@ -2,23 +2,50 @@ import streamlit as st
 import networkx as nx
 import heapq
 import math
-import matplotlib.pyplot as plt
 from pyvis.network import Network
 import os
 import tempfile
 from data import neighborhoods, facilities, roads
 
-# Create emergency graph
-G_emergency = nx.Graph()
-for neighborhood in neighborhoods.values():
-    G_emergency.add_node(neighborhood['name'], location_type="Neighborhood", x=neighborhood['x'], y=neighborhood['y'])
-for facility in facilities.values():
-    G_emergency.add_node(facility['name'], location_type="Facility", x=facility['x'], y=facility['y'])
-for road_id, road_data in roads.items():
-    road_weight = road_data["distance"] + (road_data["traffic"] * 0.1)
-    if road_data["condition"] == "poor":
-        road_weight *= 1.5
-    G_emergency.add_edge(road_data["from"], road_data["to"], weight=road_weight, traffic=road_data["traffic"], distance=road_data["distance"], condition=road_data["condition"])
+_graph_cache = {}
+
+def build_emergency_graph():
+    """
+    Builds the emergency routing graph from the neighborhoods, facilities and roads in data.py.
+
+    Returns:
+        nx.Graph: Nodes keyed by name with 'location_type', 'x' and 'y'; edges with
+                  'weight' (distance plus a traffic penalty, 1.5x on poor roads),
+                  'traffic', 'distance' and 'condition'.
+    """
+    graph = nx.Graph()
+    for neighborhood in neighborhoods.values():
+        graph.add_node(neighborhood['name'], location_type="Neighborhood", x=neighborhood['x'], y=neighborhood['y'])
+    for facility in facilities.values():
+        graph.add_node(facility['name'], location_type="Facility", x=facility['x'], y=facility['y'])
+    for road_id, road_data in roads.items():
+        road_weight = road_data["distance"] + (road_data["traffic"] * 0.1)
+        if road_data["condition"] == "poor":
+            road_weight *= 1.5
+        graph.add_edge(road_data["from"], road_data["to"], weight=road_weight, traffic=road_data["traffic"], distance=road_data["distance"], condition=road_data["condition"])
+    return graph
+
+def get_emergency_graph():
+    """
+    Returns the emergency routing graph, built on first use and shared by the whole process.
+
+    Returns:
+        nx.Graph: Output of build_emergency_graph.
+    """
+    if 'graph' not in _graph_cache:
+        _graph_cache['graph'] = build_emergency_graph()
+    return _graph_cache['graph']
+
+def __getattr__(name):
+    # G_emergency is kept as a module attribute but only built when first read
+    if name == 'G_emergency':
+        return get_emergency_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def a_star(start, goal, graph, priority=False):
     open_list = []
@@ -41,6 +68,7 @@ def a_star(start, goal, graph, priority=False):
     return []
 
 def heuristic(node, goal):
+    G_emergency = get_emergency_graph()
     x1, y1 = G_emergency.nodes[node]["x"], G_emergency.nodes[node]["y"]
     x2, y2 = G_emergency.nodes[goal]["x"], G_emergency.nodes[goal]["y"]
     return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
@@ -54,19 +82,52 @@ def reconstruct_path(came_from, current):
     path.reverse()
     return path
 
-def find_emergency_route(start, facilities, graph, priority=False):
-    shortest_path = None
-    closest_facility = None
-    min_distance = float('inf')
-    for facility in facilities.values():
-        path = a_star(start, facility['name'], graph, priority)
-        if path:
-            total_distance = sum(graph[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
-            if total_distance < min_distance:
-                min_distance = total_distance
-                shortest_path = path
-                closest_facility = facility
-    return shortest_path, closest_facility
+FACILITY_TYPES = {"Any": None, "Hospital": "hospital", "Fire Station": "fire", "Police Station": "police"}
+
+def find_emergency_route(start, facilities, graph, priority=False, facility_type=None):
+    """
+    Finds the closest critical facility with a single multi-target Dijkstra search.
+
+    The search settles nodes in order of travel cost from start and stops at the
+    first facility it settles, which is the nearest one, instead of running a
+    separate A* towards every facility.
+
+    Args:
+        start (str): Starting node name.
+        facilities (dict): Facility dictionaries with 'name', 'is_critical' and 'service' keys.
+        graph (nx.Graph): Weighted graph with 'weight' edge attributes.
+        priority (bool): If True, reduces edge weights by 50% for priority mode.
+        facility_type (str, optional): Only consider facilities with this service
+            ('hospital', 'fire' or 'police').
+
+    Returns:
+        tuple: (shortest_path, closest_facility), or (None, None) if no facility is reachable.
+
+    Time Complexity: O(E log V), independent of the number of facilities.
+    """
+    candidates = {
+        facility['name']: facility for facility in facilities.values()
+        if facility.get('is_critical', True) and (facility_type is None or facility.get('service') == facility_type)
+    }
+    scale = 0.5 if priority else 1.0
+    distances = {start: 0}
+    came_from = {}
+    visited = set()
+    queue = [(0, start)]
+    while queue:
+        current_cost, current = heapq.heappop(queue)
+        if current in visited:
+            continue
+        if current in candidates:
+            return reconstruct_path(came_from, current), candidates[current]
+        visited.add(current)
+        for neighbor in graph[current]:
+            new_cost = current_cost + graph[current][neighbor]["weight"] * scale
+            if new_cost < distances.get(neighbor, float('inf')):
+                distances[neighbor] = new_cost
+                came_from[neighbor] = current
+                heapq.heappush(queue, (new_cost, neighbor))
+    return None, None
 
 def create_interactive_graph(G, shortest_path=None):
     net = Network(height="600px", width="100%", directed=False, notebook=False)
@@ -85,6 +146,7 @@ def create_interactive_graph(G, shortest_path=None):
     return output_path
 
 def create_static_graph(G, shortest_path=None):
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 8))
     pos = {node: (data["x"], data["y"]) for node, data in G.nodes(data=True)}
     nx.draw_networkx_nodes(G, pos, node_color=["skyblue" if G.nodes[n]["location_type"] == "Neighborhood" else "lightcoral" for n in G.nodes], node_size=500)
@@ -98,10 +160,12 @@ def create_static_graph(G, shortest_path=None):
 
 def emergency_vehicle_routing():
     st.header("Cairo Emergency Vehicle Routing")
+    G_emergency = get_emergency_graph()
     start_location = st.selectbox("Select Starting Neighborhood", list(neighborhoods.keys()), key="emergency_start")
+    facility_label = st.selectbox("Facility Type", list(FACILITY_TYPES.keys()), key="emergency_facility_type")
     priority_mode = st.checkbox("Enable Emergency Priority at Intersections", key="emergency_priority")
     if st.button("Find Shortest Path"):
-        shortest_path, closest_facility = find_emergency_route(start_location, facilities, G_emergency, priority=priority_mode)
+        shortest_path, closest_facility = find_emergency_route(start_location, facilities, G_emergency, priority=priority_mode, facility_type=FACILITY_TYPES[facility_label])
         if shortest_path:
             st.success(f"Shortest Path: {' -> '.join(shortest_path)}")
             st.info(f"Closest Facility: {closest_facility['name']}")
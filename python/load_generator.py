@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlencode
+import numpy as np
+from congestion import TIME_PERIODS
+from data import all_nodes, neighborhoods
+from routing_service import DEFAULT_HOST, DEFAULT_PORT
+
+DEFAULT_MIX = {'route': 0.6, 'emergency': 0.2, 'transit': 0.2}
+
+def make_requests(count, mix=DEFAULT_MIX, sources=8, seed=0):
+    """
+    Generates request targets for the routing service.
+
+    Sources are drawn from a small pool, as a dispatch console sends many
+    requests from the same few places, so concurrent requests can share a batch.
+
+    Args:
+        count (int): Number of requests.
+        mix (dict): Endpoint name to share of the requests.
+        sources (int): Size of the source pool.
+        seed (int): Random seed.
+
+    Returns:
+        list: Request targets such as '/route?from=Maadi&to=Zamalek&time_of_day=Morning'.
+    """
+    rng = random.Random(seed)
+    names = all_nodes['Name'].tolist()
+    origins = rng.sample(names, min(sources, len(names)))
+    endpoints = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    requests = []
+    for endpoint in endpoints:
+        if endpoint == 'emergency':
+            params = {'from': rng.choice(list(neighborhoods)), 'priority': rng.choice(['0', '1'])}
+        else:
+            params = {'from': rng.choice(origins), 'to': rng.choice(names), 'time_of_day': rng.choice(TIME_PERIODS)}
+            if endpoint == 'transit':
+                params['departure'] = f"{rng.randrange(6, 22):02d}:00"
+        requests.append(f"/{endpoint}?{urlencode(params)}")
+    return requests
+
+async def fetch(reader, writer, host, target, body=None):
+    """
+    Sends one request over a kept-alive connection and reads the response.
+
+    A GET, or a POST when a body (bytes) is given.
+
+    Returns:
+        tuple: (status, payload dict).
+    """
+    if body is None:
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    else:
+        writer.write(f"POST {target} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def run_load(requests, host=DEFAULT_HOST, port=DEFAULT_PORT, concurrency=32):
+    """
+    Replays requests over concurrent kept-alive connections and measures latency.
+
+    Args:
+        requests (list): Request targets, e.g. from make_requests.
+        host (str): Service host.
+        port (int): Service port.
+        concurrency (int): Open connections, each with one request in flight.
+
+    Returns:
+        dict: 'requests', 'seconds', 'throughput' (requests/s), 'p50_ms', 'p99_ms',
+              'max_ms' and 'statuses' (status code to count).
+    """
+    queue = iter(requests)
+    latencies = []
+    statuses = {}
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for target in queue:
+                started = time.perf_counter()
+                status, _ = await fetch(reader, writer, host, target)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    millis = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'seconds': seconds,
+        'throughput': len(latencies) / seconds if seconds else 0.0,
+        'p50_ms': float(np.percentile(millis, 50)) if len(millis) else 0.0,
+        'p99_ms': float(np.percentile(millis, 99)) if len(millis) else 0.0,
+        'max_ms': float(millis.max()) if len(millis) else 0.0,
+        'statuses': statuses,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the routing service and report latency percentiles.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--sources', type=int, default=8, help="distinct origins the requests start from")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    requests = make_requests(args.requests, sources=args.sources, seed=args.seed)
+    report = asyncio.run(run_load(requests, args.host, args.port, args.concurrency))
+    print(f"{report['requests']} requests in {report['seconds']:.2f} s: {report['throughput']:.0f} requests/s")
+    print(f"latency p50 {report['p50_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms")
+    print("statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(report['statuses'].items())))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import bisect
+import numpy as np
+from algorithms import maintenance_knapsack, knapsack_selection
+from congestion import TIME_PERIODS, frame_fingerprint
+
+_curve_cache = {}
+_frontier_cache = {}
+
+class BudgetCurve:
+    """
+    Optimal maintenance plans for every budget from 0 to a maximum, from one DP pass.
+
+    Attributes:
+        resolution (float): Budget grid step in million EGP.
+        budgets (np.ndarray): Budget of each grid point.
+        improvements (np.ndarray): Best condition improvement at each budget (non-decreasing).
+    """
+
+    def __init__(self, df_existing, max_budget, resolution=1.0):
+        self.resolution = resolution
+        self.improvements, self._taken, self._costs = maintenance_knapsack(df_existing, max_budget, resolution)
+        self.budgets = np.arange(len(self.improvements)) * resolution
+        self._roads = list(zip(df_existing['FromID'].tolist(), df_existing['ToID'].tolist()))
+
+    def _units(self, budget):
+        return min(int(np.floor(budget / self.resolution + 1e-9)), len(self.improvements) - 1)
+
+    def improvement(self, budget):
+        """
+        Returns the best condition improvement within a budget.
+
+        Args:
+            budget (float): Budget in million EGP, capped at the curve's maximum.
+
+        Returns:
+            Best improvement.
+
+        Time Complexity: O(1).
+        """
+        return self.improvements[self._units(budget)].item()
+
+    def selected_roads(self, budget):
+        """
+        Returns the roads chosen for a budget.
+
+        Args:
+            budget (float): Budget in million EGP, capped at the curve's maximum.
+
+        Returns:
+            list: (FromID, ToID) tuples, as from optimize_maintenance.
+
+        Time Complexity: O(N).
+        """
+        return [self._roads[i] for i in knapsack_selection(self._taken, self._costs, self._units(budget))]
+
+def get_budget_curve(df_existing, max_budget, resolution=1.0):
+    """
+    Returns the BudgetCurve for df_existing, recomputed only when the roads or limits change.
+
+    Args:
+        df_existing (pd.DataFrame): Existing roads with maintenance costs and conditions.
+        max_budget (float): Largest budget in million EGP.
+        resolution (float): Budget grid step in million EGP.
+
+    Returns:
+        BudgetCurve: Cached or new curve.
+    """
+    key = (frame_fingerprint(df_existing[['FromID', 'ToID', 'Maintenance_Cost', 'Condition']]), max_budget, resolution)
+    if _curve_cache.get('key') != key:
+        _curve_cache['curve'] = BudgetCurve(df_existing, max_budget, resolution)
+        _curve_cache['key'] = key
+    return _curve_cache['curve']
+
+def road_volumes(df_existing, df_traffic, id_to_name):
+    """
+    Sums each road's traffic volume over all periods and both directions.
+
+    Args:
+        df_existing (pd.DataFrame): Existing roads with 'FromID' and 'ToID'.
+        df_traffic (pd.DataFrame): Traffic data with 'RoadName' and period columns.
+        id_to_name (dict): ID to name mapping.
+
+    Returns:
+        np.ndarray: Float64 daily volume per row of df_existing; 0 for roads without data.
+    """
+    daily = dict(zip(df_traffic['RoadName'], df_traffic[list(TIME_PERIODS)].sum(axis=1).tolist()))
+    volumes = []
+    for u, v in zip(df_existing['FromID'].tolist(), df_existing['ToID'].tolist()):
+        a, b = id_to_name.get(u, str(u)), id_to_name.get(v, str(v))
+        volumes.append(daily.get(f"{a}-{b}", 0) + daily.get(f"{b}-{a}", 0))
+    return np.asarray(volumes, dtype=np.float64)
+
+class ParetoFrontier:
+    """
+    Maintenance plans not dominated in (cost, condition improvement, traffic-weighted improvement).
+
+    A plan is dominated when another costs no more and improves both
+    condition and traffic-weighted condition at least as much. Plans are
+    sorted by cost, so the frontier for any budget is a prefix.
+
+    Attributes:
+        costs (np.ndarray): Plan costs in million EGP, ascending.
+        condition (np.ndarray): Condition improvement per plan.
+        traffic (np.ndarray): Traffic-weighted improvement per plan.
+    """
+
+    def __init__(self, costs, condition, traffic, plans, roads):
+        self.costs = costs
+        self.condition = condition
+        self.traffic = traffic
+        self._plans = plans
+        self._roads = roads
+
+    def __len__(self):
+        return len(self.costs)
+
+    def within(self, budget):
+        """
+        Returns the frontier plans that fit in a budget, pruned to those not
+        dominated in (condition, traffic) alone.
+
+        Args:
+            budget (float): Budget in million EGP.
+
+        Returns:
+            list: (cost, condition_improvement, traffic_improvement, selected_roads) tuples,
+                  ordered by increasing condition improvement.
+        """
+        count = int(np.searchsorted(self.costs, budget, side='right'))
+        order = sorted(range(count), key=lambda i: (-self.condition[i], -self.traffic[i], self.costs[i]))
+        result = []
+        best_traffic = -np.inf
+        for i in order:
+            if self.traffic[i] > best_traffic:
+                best_traffic = self.traffic[i]
+                result.append((float(self.costs[i]), self.condition[i].item(), float(self.traffic[i]), self.selected_roads(i)))
+        result.reverse()
+        return result
+
+    def selected_roads(self, plan):
+        """
+        Reconstructs the roads of one plan.
+
+        Args:
+            plan (int): Plan position in the frontier.
+
+        Returns:
+            list: (FromID, ToID) tuples.
+        """
+        rows = []
+        node = self._plans[plan]
+        while node is not None:
+            row, node = node
+            rows.append(row)
+        return [self._roads[i] for i in rows]
+
+def _prune(costs, condition, traffic):
+    # Sort by cost, then best objectives first, so a dominating plan is always seen earlier
+    order = np.lexsort((-traffic, -condition, costs))
+    condition, traffic = condition.tolist(), traffic.tolist()
+    keep = []
+    staircase_condition = []  # descending negated condition, so bisect works on ascending keys
+    staircase_traffic = []
+    for i in order.tolist():
+        c, t = condition[i], traffic[i]
+        # Best traffic among kept plans with condition >= c
+        position = bisect.bisect_right(staircase_condition, -c)
+        if position and staircase_traffic[position - 1] >= t:
+            continue
+        keep.append(i)
+        # Insert (c, t) and drop staircase points it now dominates
+        start = bisect.bisect_left(staircase_condition, -c)
+        end = start
+        while end < len(staircase_condition) and staircase_traffic[end] <= t:
+            end += 1
+        staircase_condition[start:end] = [-c]
+        staircase_traffic[start:end] = [t]
+    return np.asarray(keep, dtype=np.int64)
+
+def maintenance_pareto_frontier(df_existing, df_traffic, id_to_name, max_budget, resolution=None):
+    """
+    Computes the Pareto frontier of maintenance plans with dominance pruning.
+
+    Each road adds (10 - Condition) to the condition objective and
+    (10 - Condition) * daily volume / 1000 to the traffic-weighted objective.
+    Labels are extended one road at a time and dominated labels are dropped
+    after every step.
+
+    Args:
+        df_existing (pd.DataFrame): Existing roads with maintenance costs and conditions.
+        df_traffic (pd.DataFrame): Traffic data.
+        id_to_name (dict): ID to name mapping.
+        max_budget (float): Largest budget in million EGP.
+        resolution (float, optional): If given, road costs are rounded up to this grid,
+            which merges plans of similar cost and bounds the frontier size on large
+            inputs; reported costs are then grid costs. None keeps costs exact.
+
+    Returns:
+        ParetoFrontier: Non-dominated plans up to max_budget.
+
+    Time Complexity: O(N * L log L) where L is the frontier size after each road.
+    """
+    road_costs = df_existing['Maintenance_Cost'].to_numpy(dtype=float)
+    if resolution:
+        road_costs = np.ceil(road_costs / resolution - 1e-9) * resolution
+    gains = (10 - df_existing['Condition']).to_numpy()
+    weighted = gains * road_volumes(df_existing, df_traffic, id_to_name) / 1000.0
+    costs = np.zeros(1)
+    condition = np.zeros(1, dtype=gains.dtype)
+    traffic = np.zeros(1)
+    plans = [None]
+    for i in range(len(road_costs)):
+        fits = costs + road_costs[i] <= max_budget + 1e-9
+        if gains[i] <= 0 and weighted[i] <= 0 or not fits.any():
+            continue
+        extended = np.flatnonzero(fits)
+        costs = np.concatenate([costs, costs[extended] + road_costs[i]])
+        condition = np.concatenate([condition, condition[extended] + gains[i]])
+        traffic = np.concatenate([traffic, traffic[extended] + weighted[i]])
+        plans = plans + [(i, plans[j]) for j in extended.tolist()]
+        keep = _prune(costs, condition, traffic)
+        costs, condition, traffic = costs[keep], condition[keep], traffic[keep]
+        plans = [plans[j] for j in keep.tolist()]
+    roads = list(zip(df_existing['FromID'].tolist(), df_existing['ToID'].tolist()))
+    return ParetoFrontier(costs, condition, traffic, plans, roads)
+
+def get_pareto_frontier(df_existing, df_traffic, id_to_name, max_budget):
+    """
+    Returns the maintenance Pareto frontier, recomputed only when the roads, traffic or limit change.
+
+    Args:
+        df_existing (pd.DataFrame): Existing roads with maintenance costs and conditions.
+        df_traffic (pd.DataFrame): Traffic data.
+        id_to_name (dict): ID to name mapping.
+        max_budget (float): Largest budget in million EGP.
+
+    Returns:
+        ParetoFrontier: Cached or new frontier.
+    """
+    key = (frame_fingerprint(df_existing[['FromID', 'ToID', 'Maintenance_Cost', 'Condition']]),
+           frame_fingerprint(df_traffic), max_budget)
+    if _frontier_cache.get('key') != key:
+        _frontier_cache['frontier'] = maintenance_pareto_frontier(df_existing, df_traffic, id_to_name, max_budget)
+        _frontier_cache['key'] = key
+    return _frontier_cache['frontier']
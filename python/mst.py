@@ -0,0 +1,335 @@
+import bisect
+from collections import deque
+from algorithms import modified_kruskal
+from congestion import frame_fingerprint
+
+_mst_cache = {}
+
+class IncrementalMST:
+    """
+    Minimum spanning forest that is updated in place when single roads change.
+
+    The initial tree comes from modified_kruskal. Afterwards every insertion,
+    deletion or cost change is handled by a cycle swap on the current tree:
+    an inserted road replaces the most expensive road on the tree path
+    between its endpoints, and a deleted tree road is replaced by the cheapest
+    non-tree road reconnecting the two halves. Non-tree roads are kept sorted
+    by cost, so edges are never re-sorted.
+
+    Mandatory connections keep modified_kruskal's semantics: they are pinned
+    in the tree whatever their cost, and a mandatory pair without a road is
+    joined by a virtual link that is not reported and costs nothing.
+
+    Attributes:
+        edges (dict): Edge ID to (u, v, cost, type); IDs are all_edges row
+            positions, then increasing for inserted roads.
+        excluded (set): Edge IDs removed through set_excluded.
+    """
+
+    def __init__(self, all_edges, all_nodes, mandatory_connections=None):
+        mst_edges, _ = modified_kruskal(all_edges, all_nodes, mandatory_connections)
+        self.edges = {}
+        self.excluded = set()
+        self._removed = {}
+        self._pairs = {}
+        self._tree = {node: {} for node in all_nodes['ID'].tolist()}
+        self._pinned = {}  # pinned edge ID to mandatory pair; virtual links have negative IDs
+        self._next_virtual = 0
+        self._non_tree = []  # (cost, edge_id), ascending
+        rows = zip(all_edges['FromID'].tolist(), all_edges['ToID'].tolist(),
+                   all_edges['Cost'].tolist(), all_edges['Type'].tolist())
+        for edge_id, (u, v, cost, road_type) in enumerate(rows):
+            self.edges[edge_id] = (u, v, cost, road_type)
+            self._pairs.setdefault(frozenset((u, v)), []).append(edge_id)
+        self._next_id = len(self.edges)
+
+        # Match modified_kruskal's output back to rows: the first unused row of the pair with that cost
+        in_tree = set()
+        for u, v, cost in mst_edges:
+            in_tree.add(next(e for e in self._pairs[frozenset((u, v))]
+                             if e not in in_tree and self.edges[e][2] == cost))
+        connected = {}
+        for u, v in mandatory_connections or ():
+            root_u, root_v = self._mandatory_root(connected, u), self._mandatory_root(connected, v)
+            if root_u == root_v:
+                continue
+            connected[root_v] = root_u
+            pair = frozenset((u, v))
+            edge_ids = self._pairs.get(pair)
+            if edge_ids:
+                self._pinned[edge_ids[0]] = pair
+            else:
+                self._add_virtual(pair)
+        for edge_id in range(self._next_id):
+            if edge_id in in_tree:
+                self._link(edge_id)
+            else:
+                self._non_tree.append((self.edges[edge_id][2], edge_id))
+        self._non_tree.sort()
+
+    @staticmethod
+    def _mandatory_root(parent, node):
+        while node in parent:
+            node = parent[node]
+        return node
+
+    def _add_virtual(self, pair):
+        self._next_virtual -= 1
+        u, v = tuple(pair)
+        self.edges[self._next_virtual] = (u, v, 0, None)
+        self._pinned[self._next_virtual] = pair
+        self._link(self._next_virtual)
+
+    def _link(self, edge_id):
+        u, v = self.edges[edge_id][:2]
+        self._tree[u][v] = edge_id
+        self._tree[v][u] = edge_id
+
+    def _cut(self, edge_id):
+        u, v = self.edges[edge_id][:2]
+        del self._tree[u][v]
+        del self._tree[v][u]
+
+    def _is_tree(self, edge_id):
+        u, v = self.edges[edge_id][:2]
+        return self._tree[u].get(v) == edge_id
+
+    def _tree_path(self, start, goal):
+        # Breadth-first search over tree roads; returns the edge IDs from start to goal
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node == goal:
+                path = []
+                while came_from[node] is not None:
+                    node, edge_id = came_from[node]
+                    path.append(edge_id)
+                return path
+            for neighbor, edge_id in self._tree[node].items():
+                if neighbor not in came_from:
+                    came_from[neighbor] = (node, edge_id)
+                    queue.append(neighbor)
+        return None
+
+    def _component(self, start):
+        seen = {start}
+        stack = [start]
+        while stack:
+            for neighbor in self._tree[stack.pop()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        return seen
+
+    def _replacement(self, side):
+        # Cheapest non-tree road with exactly one endpoint on this side of a cut
+        for position, (_, edge_id) in enumerate(self._non_tree):
+            u, v = self.edges[edge_id][:2]
+            if (u in side) != (v in side):
+                return position
+        return None
+
+    def _insert_non_tree(self, edge_id):
+        bisect.insort(self._non_tree, (self.edges[edge_id][2], edge_id))
+
+    def _remove_non_tree(self, edge_id):
+        entry = (self.edges[edge_id][2], edge_id)
+        del self._non_tree[bisect.bisect_left(self._non_tree, entry)]
+
+    def _place(self, edge_id):
+        # Adds a road that is not in the tree yet by cycle swap
+        u, v, cost, _ = self.edges[edge_id]
+        path = self._tree_path(u, v) if u != v else []
+        if path is None:
+            self._link(edge_id)
+            return
+        swappable = [e for e in path if e not in self._pinned]
+        heaviest = max(swappable, key=lambda e: self.edges[e][2], default=None)
+        if heaviest is not None and self.edges[heaviest][2] > cost:
+            self._cut(heaviest)
+            self._insert_non_tree(heaviest)
+            self._link(edge_id)
+        else:
+            self._insert_non_tree(edge_id)
+
+    def _unlink_and_reconnect(self, edge_id, candidate_cost=None):
+        # Cuts a tree road and reconnects the halves with the cheapest crossing road.
+        # With candidate_cost the cut road itself competes at that cost and is kept if cheapest.
+        u = self.edges[edge_id][0]
+        self._cut(edge_id)
+        position = self._replacement(self._component(u))
+        if position is not None and (candidate_cost is None or self._non_tree[position][0] < candidate_cost):
+            _, replacement = self._non_tree.pop(position)
+            self._link(replacement)
+            return False
+        if candidate_cost is not None:
+            self._link(edge_id)
+            return True
+        return False
+
+    def insert_edge(self, u, v, cost, road_type='Potential'):
+        """
+        Adds a road and updates the tree.
+
+        Args:
+            u: From node ID.
+            v: To node ID.
+            cost (float): Road cost in million EGP.
+            road_type (str): 'Existing' or 'Potential'.
+
+        Returns:
+            int: ID of the new edge.
+
+        Time Complexity: O(V + E) worst case; O(V) for the tree path search plus
+        the sorted insertion of a swapped-out road.
+        """
+        for node in (u, v):
+            self._tree.setdefault(node, {})
+        edge_id = self._next_id
+        self._next_id += 1
+        self.edges[edge_id] = (u, v, cost, road_type)
+        self._restore(edge_id)
+        return edge_id
+
+    def _restore(self, edge_id):
+        u, v = self.edges[edge_id][:2]
+        pair = frozenset((u, v))
+        self._pairs.setdefault(pair, []).append(edge_id)
+        self._pairs[pair].sort()
+        # A mandatory pair is always held by its first road, or a virtual link if it has none
+        pinned = next((e for e, p in self._pinned.items() if p == pair), None)
+        if pinned is None or 0 <= pinned < edge_id:
+            self._place(edge_id)
+            return
+        self._cut(pinned)
+        del self._pinned[pinned]
+        self._pinned[edge_id] = pair
+        self._link(edge_id)
+        if pinned < 0:
+            del self.edges[pinned]
+        else:
+            self._place(pinned)
+
+    def delete_edge(self, edge_id):
+        """
+        Removes a road and updates the tree.
+
+        A deleted mandatory road is replaced by another road between the same
+        pair, or by a virtual link as modified_kruskal would do.
+
+        Args:
+            edge_id (int): Edge ID.
+
+        Returns:
+            tuple: The removed (u, v, cost, type).
+
+        Time Complexity: O(V + E) worst case; the scan for a replacement stops
+        at the cheapest road crossing the cut.
+        """
+        u, v, cost, road_type = record = self.edges[edge_id]
+        pair = frozenset((u, v))
+        self._pairs[pair].remove(edge_id)
+        if not self._pairs[pair]:
+            del self._pairs[pair]
+        if edge_id in self._pinned:
+            del self._pinned[edge_id]
+            self._cut(edge_id)
+            others = self._pairs.get(pair)
+            if others:
+                # Parallel roads never share the tree, so the successor is a non-tree road
+                successor = others[0]
+                self._remove_non_tree(successor)
+                self._pinned[successor] = pair
+                self._link(successor)
+            else:
+                self._add_virtual(pair)
+        elif self._is_tree(edge_id):
+            self._unlink_and_reconnect(edge_id)
+        else:
+            self._remove_non_tree(edge_id)
+        del self.edges[edge_id]
+        return record
+
+    def update_cost(self, edge_id, cost):
+        """
+        Changes one road's cost and updates the tree.
+
+        Args:
+            edge_id (int): Edge ID.
+            cost (float): New cost in million EGP.
+
+        Time Complexity: O(V + E) worst case, when a tree road gets dearer or a
+        non-tree road cheaper; otherwise one sorted-list update.
+        """
+        u, v, old_cost, road_type = self.edges[edge_id]
+        if edge_id in self._pinned:
+            self.edges[edge_id] = (u, v, cost, road_type)
+        elif self._is_tree(edge_id):
+            self.edges[edge_id] = (u, v, cost, road_type)
+            if cost > old_cost:
+                if not self._unlink_and_reconnect(edge_id, cost):
+                    self._insert_non_tree(edge_id)
+        else:
+            self._remove_non_tree(edge_id)
+            self.edges[edge_id] = (u, v, cost, road_type)
+            if cost < old_cost:
+                self._place(edge_id)
+            else:
+                self._insert_non_tree(edge_id)
+
+    def set_excluded(self, edge_ids):
+        """
+        Removes exactly the given edges, restoring previously excluded ones.
+
+        Only the difference from the previous call is applied, so toggling one
+        road in a what-if list costs one deletion or insertion.
+
+        Args:
+            edge_ids (iterable): Edge IDs to leave out.
+        """
+        edge_ids = set(edge_ids)
+        for edge_id in self.excluded - edge_ids:
+            self.edges[edge_id] = self._removed.pop(edge_id)
+            self._restore(edge_id)
+        for edge_id in edge_ids - self.excluded:
+            self._removed[edge_id] = self.delete_edge(edge_id)
+        self.excluded = edge_ids
+
+    def edge_ids(self):
+        """
+        Returns:
+            list: IDs of the real roads in the tree, ascending.
+        """
+        return sorted(e for e in self.edges if e >= 0 and self._is_tree(e))
+
+    def mst_edges(self):
+        """
+        Returns the tree in modified_kruskal's format.
+
+        Returns:
+            tuple: (mst_edges, total_cost) where mst_edges is a list of (u, v, cost) tuples.
+
+        Time Complexity: O(V log V).
+        """
+        mst_edges = [self.edges[e][:3] for e in self.edge_ids()]
+        return mst_edges, sum(cost for _, _, cost in mst_edges)
+
+def get_incremental_mst(all_edges, all_nodes, mandatory_connections=None):
+    """
+    Returns the IncrementalMST for an edge list, rebuilt only when the edges, nodes or mandatory pairs change.
+
+    Args:
+        all_edges (pd.DataFrame): DataFrame with columns ['FromID', 'ToID', 'Cost', 'Type'].
+        all_nodes (pd.DataFrame): DataFrame with node IDs and attributes.
+        mandatory_connections (list, optional): List of (u, v) tuples for required edges.
+
+    Returns:
+        IncrementalMST: Cached or new structure.
+    """
+    key = (frame_fingerprint(all_edges[['FromID', 'ToID', 'Cost', 'Type']].astype(str)),
+           frame_fingerprint(all_nodes[['ID']].astype(str)), tuple(mandatory_connections or ()))
+    if _mst_cache.get('key') != key:
+        _mst_cache['mst'] = IncrementalMST(all_edges, all_nodes, mandatory_connections)
+        _mst_cache['key'] = key
+    return _mst_cache['mst']
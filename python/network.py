@@ -0,0 +1,292 @@
+import os
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+def parse_node_id(value):
+    """
+    Converts a node ID read from CSV to the form used in data.py (int or 'F1'-style string).
+
+    Args:
+        value: Raw ID value.
+
+    Returns:
+        int or str: Normalized node ID.
+    """
+    text = str(value).strip()
+    return int(text) if text.isdigit() else text
+
+class RoadNetwork:
+    """
+    Road network compiled to dense integer node indices and CSR adjacency.
+
+    Arcs are stored grouped by source node: the outgoing arcs of node i are
+    ``targets[offsets[i]:offsets[i + 1]]`` with matching ``weights``.
+    Undirected roads are stored once per direction.
+
+    Attributes:
+        node_ids (list): Original node ID per index.
+        names (list): Node name per index.
+        index (dict): Node ID to index mapping.
+        name_index (dict): Node name to index mapping.
+        x (np.ndarray): Float64 x coordinate per index.
+        y (np.ndarray): Float64 y coordinate per index.
+        offsets (np.ndarray): Int64 array of length N + 1.
+        sources (np.ndarray): Int32 source index per arc.
+        targets (np.ndarray): Int32 target index per arc.
+        weights (np.ndarray): Float64 base weight per arc.
+    """
+
+    def __init__(self, node_ids, names, x, y, arc_from, arc_to, arc_weight):
+        self.node_ids = list(node_ids)
+        self.names = list(names)
+        self.index = {node: i for i, node in enumerate(self.node_ids)}
+        self.name_index = {name: i for i, name in enumerate(self.names)}
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        arc_from = np.asarray(arc_from, dtype=np.int64)
+        order = np.argsort(arc_from, kind='stable')
+        self.sources = arc_from[order].astype(np.int32)
+        self.targets = np.asarray(arc_to, dtype=np.int64)[order].astype(np.int32)
+        self.weights = np.asarray(arc_weight, dtype=np.float64)[order]
+        counts = np.bincount(self.sources, minlength=len(self.node_ids))
+        self.offsets = np.zeros(len(self.node_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self._adjacency = None
+        self._reverse_adjacency = None
+        self._arc_lookup = None
+        self._coordinates = None
+        self._congestion_arcs = (None, None)
+        self._travel_times = {}
+        self._travel_time_lists = {}
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_arcs(self):
+        return len(self.targets)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the coordinate and adjacency arrays."""
+        return sum(a.nbytes for a in (self.x, self.y, self.offsets, self.sources, self.targets, self.weights))
+
+    @classmethod
+    def from_graph(cls, graph, weight='weight'):
+        """
+        Compiles a networkx graph.
+
+        Args:
+            graph (nx.Graph): Graph with 'x'/'y' or 'pos' node attributes.
+            weight (str): Edge attribute used as the base arc weight.
+
+        Returns:
+            RoadNetwork: Compiled network; undirected edges become two arcs.
+        """
+        node_ids = list(graph.nodes())
+        index = {node: i for i, node in enumerate(node_ids)}
+        names, x, y = [], [], []
+        for node, data in graph.nodes(data=True):
+            names.append(data.get('name', node))
+            if 'pos' in data:
+                x.append(data['pos'][0])
+                y.append(data['pos'][1])
+            else:
+                x.append(data.get('x', 0.0))
+                y.append(data.get('y', 0.0))
+        arc_from, arc_to, arc_weight = [], [], []
+        for u, v, data in graph.edges(data=True):
+            arc_from.append(index[u])
+            arc_to.append(index[v])
+            arc_weight.append(data[weight])
+            if not graph.is_directed():
+                arc_from.append(index[v])
+                arc_to.append(index[u])
+                arc_weight.append(data[weight])
+        return cls(node_ids, names, x, y, arc_from, arc_to, arc_weight)
+
+    @classmethod
+    def from_frames(cls, nodes, edges, weight='Distance'):
+        """
+        Compiles node and edge DataFrames in the data.py schema.
+
+        Args:
+            nodes (pd.DataFrame): Nodes with columns ['ID', 'Name', 'X', 'Y'].
+            edges (pd.DataFrame): Undirected edges with columns ['FromID', 'ToID', weight].
+            weight (str): Edge column used as the base arc weight.
+
+        Returns:
+            RoadNetwork: Compiled network.
+        """
+        node_ids = nodes['ID'].tolist()
+        index = {node: i for i, node in enumerate(node_ids)}
+        u = np.fromiter((index[n] for n in edges['FromID']), dtype=np.int64, count=len(edges))
+        v = np.fromiter((index[n] for n in edges['ToID']), dtype=np.int64, count=len(edges))
+        w = edges[weight].to_numpy(dtype=np.float64)
+        return cls(node_ids, nodes['Name'].tolist(), nodes['X'].to_numpy(), nodes['Y'].to_numpy(),
+                   np.concatenate([u, v]), np.concatenate([v, u]), np.concatenate([w, w]))
+
+    @classmethod
+    def from_csv(cls, data_dir=DATA_DIR, edge_types=('existing',)):
+        """
+        Compiles the network from data/nodes.csv, data/facilities.csv and data/edges.csv.
+
+        The files are read through datastore's columnar cache, which also
+        checks that every edge endpoint is a known node.
+
+        Args:
+            data_dir (str): Directory holding the CSV files.
+            edge_types (tuple): Values of the edges.csv 'type' column to include.
+
+        Returns:
+            RoadNetwork: Compiled network over the nodes of nodes.csv and facilities.csv.
+        """
+        from datastore import get_table, known_ids, locate_ids
+        nodes, facilities, edges = (get_table(name, data_dir) for name in ('nodes', 'facilities', 'edges'))
+        node_ids = nodes.node_ids('id').tolist() + facilities.node_ids('id').tolist()
+        known = known_ids(data_dir)
+        keep = np.isin(edges['type'], list(edge_types))
+        u = locate_ids(known, np.asarray(edges['from'])[keep])
+        v = locate_ids(known, np.asarray(edges['to'])[keep])
+        w = np.asarray(edges['distance'], dtype=np.float64)[keep]
+        return cls(node_ids, nodes['name'].tolist() + facilities['name'].tolist(),
+                   np.concatenate([nodes['x'], facilities['x']]), np.concatenate([nodes['y'], facilities['y']]),
+                   np.concatenate([u, v]), np.concatenate([v, u]), np.concatenate([w, w]))
+
+    def adjacency(self):
+        """
+        Returns per-node (targets, weights) Python lists for the search loops.
+
+        Plain lists are used because indexing NumPy arrays element by element
+        from Python is several times slower than list indexing. The lists are
+        built once and cached.
+
+        Returns:
+            tuple: (offsets, targets, weights) as Python lists.
+        """
+        if self._adjacency is None:
+            self._adjacency = (self.offsets.tolist(), self.targets.tolist(), self.weights.tolist())
+        return self._adjacency
+
+    def reverse_adjacency(self):
+        """
+        Returns the incoming arcs of every node as cached Python lists.
+
+        The incoming arcs of node i are ``arcs[offsets[i]:offsets[i + 1]]``,
+        with their tail nodes in ``sources`` at the same positions.
+
+        Returns:
+            tuple: (offsets, sources, arcs) as Python lists.
+        """
+        if self._reverse_adjacency is None:
+            order = np.argsort(self.targets, kind='stable')
+            counts = np.bincount(self.targets, minlength=self.num_nodes)
+            offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            self._reverse_adjacency = (offsets.tolist(), self.sources[order].tolist(), order.tolist())
+        return self._reverse_adjacency
+
+    def closure_arcs(self, closed_roads):
+        """
+        Finds the arcs covered by a set of closed roads, in both directions.
+
+        Args:
+            closed_roads (iterable): (from_id, to_id) node ID pairs.
+
+        Returns:
+            list: Sorted CSR arc indices; pairs with no road are ignored.
+        """
+        if self._arc_lookup is None:
+            lookup = {}
+            for arc, pair in enumerate(zip(self.sources.tolist(), self.targets.tolist())):
+                lookup.setdefault(pair, []).append(arc)
+            self._arc_lookup = lookup
+        arcs = set()
+        for u, v in closed_roads:
+            if u in self.index and v in self.index:
+                u, v = self.index[u], self.index[v]
+                arcs.update(self._arc_lookup.get((u, v), ()))
+                arcs.update(self._arc_lookup.get((v, u), ()))
+        return sorted(arcs)
+
+    def coordinates(self):
+        """
+        Returns the x and y coordinates as cached Python lists for heuristic lookups.
+
+        Returns:
+            tuple: (x, y) lists indexed by node index.
+        """
+        if self._coordinates is None:
+            self._coordinates = (self.x.tolist(), self.y.tolist())
+        return self._coordinates
+
+    def congestion_arcs(self, table):
+        """
+        Maps every CSR arc to its arc id in a congestion table.
+
+        Args:
+            table (CongestionTable): Table for the current traffic snapshot.
+
+        Returns:
+            np.ndarray: Int64 table arc id per CSR arc, -1 where the road has no entry.
+        """
+        version, arcs = self._congestion_arcs
+        if version != table.version or arcs is None:
+            ids = self.node_ids
+            arcs = np.fromiter(
+                (table.arc_ids.get((ids[u], ids[v]), -1) for u, v in zip(self.sources.tolist(), self.targets.tolist())),
+                dtype=np.int64, count=self.num_arcs)
+            self._congestion_arcs = (table.version, arcs)
+        return arcs
+
+    def arc_capacities(self, table):
+        """
+        Looks up the road capacity of every CSR arc in a congestion table.
+
+        Args:
+            table (CongestionTable): Table for the current traffic snapshot.
+
+        Returns:
+            np.ndarray: Float64 capacity per CSR arc in vehicles per hour, inf where the road has no entry.
+        """
+        arcs = self.congestion_arcs(table)
+        capacities = np.full(self.num_arcs, np.inf)
+        known = arcs >= 0
+        capacities[known] = table.capacities[arcs[known]]
+        return capacities
+
+    def travel_times(self, table, time_of_day):
+        """
+        Computes congested travel time (weight * congestion factor) for every arc.
+
+        Results are cached per snapshot version and time period.
+
+        Args:
+            table (CongestionTable): Table for the current traffic snapshot.
+            time_of_day (str): Time period.
+
+        Returns:
+            np.ndarray: Float64 travel time per CSR arc.
+        """
+        key = (table.version, time_of_day)
+        if key not in self._travel_times:
+            arcs = self.congestion_arcs(table)
+            factors = np.ones(self.num_arcs)
+            known = arcs >= 0
+            factors[known] = table.column(time_of_day)[arcs[known]]
+            self._travel_times = {k: v for k, v in self._travel_times.items() if k[0] == table.version}
+            self._travel_times[key] = self.weights * factors
+        return self._travel_times[key]
+
+    def travel_time_list(self, table, time_of_day):
+        """
+        Same as travel_times, returned as a cached Python list for the search loops.
+        """
+        key = (table.version, time_of_day)
+        if key not in self._travel_time_lists:
+            times = self.travel_times(table, time_of_day).tolist()
+            self._travel_time_lists = {k: v for k, v in self._travel_time_lists.items() if k[0] == table.version}
+            self._travel_time_lists[key] = times
+        return self._travel_time_lists[key]
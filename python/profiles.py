@@ -0,0 +1,218 @@
+import heapq
+import math
+import numpy as np
+from algorithms import tree_path
+from congestion import TIME_PERIODS
+
+# Hour of day at which each period's congestion factor applies in full
+PERIOD_HOURS = {'Morning': 8.0, 'Afternoon': 14.0, 'Evening': 19.0, 'Night': 2.0}
+MINUTES_PER_DAY = 1440
+STEP_MINUTES = 60
+
+_profile_cache = {}
+
+def period_weights(period_hours=PERIOD_HOURS, step_minutes=STEP_MINUTES):
+    """
+    Computes the linear interpolation weights that turn per-period values into breakpoints.
+
+    Periods are treated as points on a 24h circle; every breakpoint is a
+    blend of the two neighbouring periods.
+
+    Args:
+        period_hours (dict): Time period to hour of day.
+        step_minutes (int): Spacing between breakpoints.
+
+    Returns:
+        np.ndarray: Float64 array of shape (B, len(TIME_PERIODS)) where B covers 0..24h inclusive.
+    """
+    minutes = np.arange(0, MINUTES_PER_DAY + 1, step_minutes, dtype=np.float64)
+    anchors = np.array([period_hours[p] * 60.0 for p in TIME_PERIODS])
+    order = np.argsort(anchors)
+    ring = np.concatenate([anchors[order[-1:]] - MINUTES_PER_DAY, anchors[order], anchors[order[:1]] + MINUTES_PER_DAY])
+    columns = np.concatenate([order[-1:], order, order[:1]])
+    right = np.searchsorted(ring, minutes, side='right')
+    left = right - 1
+    span = ring[right] - ring[left]
+    fraction = (minutes - ring[left]) / span
+    weights = np.zeros((len(minutes), len(TIME_PERIODS)))
+    rows = np.arange(len(minutes))
+    np.add.at(weights, (rows, columns[left]), 1.0 - fraction)
+    np.add.at(weights, (rows, columns[right]), fraction)
+    return weights
+
+class TravelTimeProfiles:
+    """
+    Piecewise-linear 24h travel-time profile for every arc of a RoadNetwork.
+
+    ``times[a, k]`` is the travel time in minutes of arc ``a`` when entered at
+    minute ``k * step_minutes`` after midnight; times in between are linear
+    interpolations. Profiles satisfy the FIFO property (leaving later never
+    means arriving earlier), which keeps time-dependent Dijkstra exact.
+
+    Attributes:
+        network (RoadNetwork): Network the profiles belong to.
+        version (int): Congestion table version the profiles were built from.
+        step_minutes (int): Spacing between breakpoints.
+        times (np.ndarray): Float64 array of shape (num_arcs, B).
+    """
+
+    def __init__(self, network, times, version, step_minutes=STEP_MINUTES):
+        self.network = network
+        self.times = times
+        self.version = version
+        self.step_minutes = step_minutes
+        self._flat = None
+
+    def at(self, minute):
+        """
+        Evaluates every arc's travel time at one moment.
+
+        Args:
+            minute (float): Minutes after midnight; wrapped to one day.
+
+        Returns:
+            np.ndarray: Float64 travel time per arc.
+
+        Time Complexity: O(E) vectorized.
+        """
+        position = (minute % MINUTES_PER_DAY) / self.step_minutes
+        k = min(int(position), self.times.shape[1] - 2)
+        fraction = position - k
+        return self.times[:, k] * (1.0 - fraction) + self.times[:, k + 1] * fraction
+
+    def flat(self):
+        """
+        Returns the breakpoints as one cached Python list for the search loop.
+
+        Returns:
+            list: times.ravel() as floats, arc a starting at a * B.
+        """
+        if self._flat is None:
+            self._flat = self.times.ravel().tolist()
+        return self._flat
+
+def enforce_fifo(times, step_minutes=STEP_MINUTES):
+    """
+    Raises breakpoints so that no arc's travel time falls faster than the clock.
+
+    Args:
+        times (np.ndarray): (arcs, B) travel times with times[:, -1] == times[:, 0].
+        step_minutes (int): Spacing between breakpoints.
+
+    Returns:
+        np.ndarray: FIFO-consistent copy of times.
+
+    Time Complexity: O(E * B) vectorized over arcs.
+    """
+    times = times.copy()
+    # Two sweeps around the day so a drop across midnight is corrected too
+    for _ in range(2):
+        for k in range(1, times.shape[1]):
+            np.maximum(times[:, k], times[:, k - 1] - step_minutes, out=times[:, k])
+        times[:, 0] = times[:, -1]
+    return times
+
+def build_travel_time_profiles(network, table, period_hours=PERIOD_HOURS, step_minutes=STEP_MINUTES):
+    """
+    Builds per-arc travel-time profiles from a congestion table.
+
+    Each arc's four period factors (from df_traffic, the same volumes as
+    data/traffic_flow.csv) are placed at their period hours and interpolated
+    linearly around the clock, then multiplied by the arc's distance.
+
+    Args:
+        network (RoadNetwork): Network compiled with 'distance' as base weight.
+        table (CongestionTable): Congestion table for the current traffic snapshot.
+        period_hours (dict): Time period to hour of day.
+        step_minutes (int): Spacing between breakpoints.
+
+    Returns:
+        TravelTimeProfiles: Profiles for every arc.
+
+    Time Complexity: O(E * B) vectorized.
+    """
+    arcs = network.congestion_arcs(table)
+    factors = np.ones((network.num_arcs, len(TIME_PERIODS)))
+    known = arcs >= 0
+    factors[known] = table.factors[arcs[known]]
+    hourly = factors @ period_weights(period_hours, step_minutes).T
+    times = enforce_fifo(network.weights[:, None] * hourly, step_minutes)
+    return TravelTimeProfiles(network, times, table.version, step_minutes)
+
+def get_travel_time_profiles(network, table):
+    """
+    Returns travel-time profiles, rebuilt only when the congestion table changes.
+
+    Args:
+        network (RoadNetwork): Network compiled with 'distance' as base weight.
+        table (CongestionTable): Congestion table for the current traffic snapshot.
+
+    Returns:
+        TravelTimeProfiles: Cached or freshly built profiles.
+    """
+    cached = _profile_cache.get(id(network))
+    if cached is None or cached.network is not network or cached.version != table.version:
+        cached = build_travel_time_profiles(network, table)
+        _profile_cache[id(network)] = cached
+    return cached
+
+def departure_minute(departure):
+    """
+    Converts a departure time to minutes after midnight.
+
+    Args:
+        departure: datetime.time, datetime.datetime, or minutes after midnight.
+
+    Returns:
+        float: Minutes after midnight.
+    """
+    if hasattr(departure, 'hour'):
+        return departure.hour * 60 + departure.minute + departure.second / 60.0
+    return float(departure)
+
+def profile_dijkstra(profiles, start_name, end_name, departure):
+    """
+    FIFO time-dependent Dijkstra that prices each road at the moment it is entered.
+
+    Args:
+        profiles (TravelTimeProfiles): Travel-time profiles.
+        start_name (str): Starting node name.
+        end_name (str): Destination node name.
+        departure: Departure time (see departure_minute).
+
+    Returns:
+        tuple: (total_time, path_names) or (inf, []) if no path exists.
+
+    Time Complexity: O(E log V).
+    """
+    network = profiles.network
+    offsets, targets, _ = network.adjacency()
+    flat = profiles.flat()
+    width = profiles.times.shape[1]
+    last = width - 2
+    step = profiles.step_minutes
+    start = network.name_index[start_name]
+    end = network.name_index[end_name]
+    depart = departure_minute(departure)
+    arrivals = [math.inf] * network.num_nodes
+    came_from = [-1] * network.num_nodes
+    arrivals[start] = depart
+    queue = [(depart, start)]
+    while queue:
+        now, node = heapq.heappop(queue)
+        if node == end:
+            return now - depart, [network.names[i] for i in tree_path(came_from, end)]
+        if now > arrivals[node]:
+            continue
+        position = (now % MINUTES_PER_DAY) / step
+        k = min(int(position), last)
+        fraction = position - k
+        for arc in range(offsets[node], offsets[node + 1]):
+            base = arc * width + k
+            arrival = now + flat[base] + (flat[base + 1] - flat[base]) * fraction
+            neighbor = targets[arc]
+            if arrival < arrivals[neighbor]:
+                arrivals[neighbor] = arrival
+                came_from[neighbor] = node
+                heapq.heappush(queue, (arrival, neighbor))
+    return float('inf'), []
@@ -3,7 +3,12 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import pydeck as pdk
-from algorithms import public_transport_dp, get_traffic_speed
+import datetime
+from algorithms import public_transport_dp
+from assignment import get_transit_assignment
+from congestion import get_congestion_table
+from raptor import get_transit_timetable
+from travel_matrix import get_road_network, get_travel_matrix
 from data import df_neighborhoods, df_facilities, df_existing, df_traffic, all_nodes, transit_routes
 
 def create_station_mapping():
@@ -33,6 +38,7 @@ def create_routes(time_of_day, name_to_id):
     """
     routes = {}
     id_to_name = {v: k for k, v in name_to_id.items()}
+    congestion_table = get_congestion_table(df_traffic, df_existing, name_to_id)
     for _, row in df_existing.iterrows():
         from_name = id_to_name.get(row['FromID'], row['FromID'])
         to_name = id_to_name.get(row['ToID'], row['ToID'])
@@ -41,7 +47,7 @@ def create_routes(time_of_day, name_to_id):
         if isinstance(to_name, str) and to_name.startswith('F'):
             to_name = id_to_name.get(to_name, to_name)
         road_name = f"{from_name}-{to_name}"
-        congestion = get_traffic_speed(road_name, time_of_day, name_to_id)
+        congestion = congestion_table.road_factor(road_name, time_of_day)
         travel_time = row['Distance'] * congestion
         routes[(from_name, to_name)] = travel_time
         routes[(to_name, from_name)] = travel_time  # Bidirectional
@@ -83,6 +89,19 @@ def analyze_transfer_points(transit_routes, stations):
     
     return transfer_hubs, transfer_times
 
+def format_clock(minutes):
+    """
+    Formats minutes after midnight as HH:MM.
+
+    Args:
+        minutes (float): Minutes after midnight.
+
+    Returns:
+        str: Clock time, rounded to the minute.
+    """
+    minutes = int(round(minutes))
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
 def public_transit_optimization():
     """
     Streamlit interface for public transit optimization and transfer point analysis.
@@ -99,6 +118,48 @@ def public_transit_optimization():
     with col3:
         max_vehicles = st.slider("Max Vehicles", 1, 50, 10, key="transit_vehicles")
     time_of_day = st.selectbox("Time of Day", ["Morning", "Afternoon", "Evening", "Night"], key="transit_time")
+
+    st.subheader("Journey Planner")
+    col1, col2 = st.columns(2)
+    with col1:
+        destination = st.selectbox("Destination", sorted(stations.keys()), key="journey_destination")
+    with col2:
+        departure = st.time_input("Departure", datetime.time(8, 0), key="journey_departure")
+    congestion_table = get_congestion_table(df_traffic, df_existing, name_to_id)
+    road_network = get_road_network(all_nodes, df_existing)
+    timetable = get_transit_timetable(road_network, get_travel_matrix(road_network, congestion_table, time_of_day),
+                                      name_to_id, transit_routes)
+    if destination != start_station:
+        journeys = timetable.journeys(start_station, destination, departure)
+        if not journeys:
+            st.write("No transit connection found.")
+        for journey in journeys:
+            st.write(f"**Arrive {format_clock(journey.arrival)}** ({journey.duration:.0f} min, "
+                     f"{journey.transfers} transfer{'s' if journey.transfers != 1 else ''})")
+            st.table(pd.DataFrame([
+                {'Line': line, 'Board': board, 'Departs': format_clock(board_time),
+                 'Alight': alight, 'Arrives': format_clock(alight_time)}
+                for line, board, board_time, alight, alight_time in journey.legs
+            ]))
+    with st.expander("Earliest arrival at every station"):
+        arrivals = timetable.one_to_all(start_station, departure)
+        st.dataframe(pd.DataFrame([
+            {'Station': name, 'Arrival': format_clock(arrival), 'Transfers': transfers}
+            for name, (arrival, transfers) in sorted(arrivals.items(), key=lambda item: item[1][0])
+            if arrival < float('inf') and name != start_station
+        ]))
+    with st.expander("Passenger loads from transit demand"):
+        method = st.radio("Assignment", ["Optimal strategies", "All-or-nothing"], horizontal=True, key="assignment_method")
+        assignment = get_transit_assignment(road_network, timetable, method == "Optimal strategies")
+        st.write(f"**Assigned:** {assignment.assigned:,.0f} daily passengers, "
+                 f"average {assignment.average_minutes:.1f} min; **unassigned:** {assignment.unassigned:,.0f}")
+        st.dataframe(assignment.routes.drop(columns='Route').round(1))
+        overcrowded = assignment.segments[assignment.segments['Overcrowded']]
+        if overcrowded.empty:
+            st.write("No overcrowded segments at peak hour.")
+        else:
+            st.write("**Overcrowded segments at peak hour:**")
+            st.dataframe(overcrowded.drop(columns=['Route', 'Overcrowded']).round(2))
     
     if st.button("Optimize Transit"):
         routes = create_routes(time_of_day, name_to_id)
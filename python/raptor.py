@@ -0,0 +1,418 @@
+import bisect
+import math
+import numpy as np
+from datastore import get_table, parse_node_ids
+from network import DATA_DIR
+from profiles import departure_minute
+
+SERVICE_START = 5 * 60      # first departure, minutes after midnight
+SERVICE_END = 24 * 60       # no trip starts after this
+METRO_HEADWAY = 5           # minutes; metro_lines.csv carries no frequency
+METRO_SPEED_KMH = 40.0
+BUS_CAPACITY = 60           # passengers per vehicle when a line has no 'capacity'
+METRO_CAPACITY = 500
+MIN_BUS_HEADWAY = 3         # minutes
+TRANSFER_MINUTES = 3        # time to change vehicles at a stop
+MAX_TRANSFERS = 4
+KM_PER_DEGREE = 111.0
+
+_timetable_cache = {}
+
+def _stop_ids(text):
+    # 'stops' and 'stations' cells hold comma-separated node IDs
+    return parse_node_ids(np.array(text.split(','))).tolist()
+
+def load_transit_lines(name_to_id, transit_routes=(), data_dir=DATA_DIR):
+    """
+    Reads the bus and metro lines from data/bus_routes.csv and data/metro_lines.csv,
+    plus the lines in transit_routes.
+
+    The CSV files are read through datastore, which checks on conversion that
+    every stop is a known node.
+
+    Args:
+        name_to_id (dict): Name to ID mapping, used for transit_routes stops.
+        transit_routes (list): Route dictionaries as in data.py.
+        data_dir (str): Directory holding the CSV files.
+
+    Returns:
+        list: Line dictionaries with 'line_id', 'type', 'stops' (node IDs),
+              'headway' (minutes, or None to derive it from 'vehicles'), 'vehicles'
+              and 'capacity' (passengers per vehicle).
+
+    Raises:
+        ValueError: If a CSV file does not match its schema or names an unknown stop.
+    """
+    lines = []
+    buses = get_table('bus_routes', data_dir)
+    for line_id, stops, vehicles in zip(buses['id'].tolist(), buses['stops'].tolist(), buses['buses_assigned'].tolist()):
+        lines.append({'line_id': line_id, 'type': 'Bus', 'stops': _stop_ids(stops),
+                      'headway': None, 'vehicles': vehicles, 'capacity': BUS_CAPACITY})
+    metro = get_table('metro_lines', data_dir)
+    for line_id, stations in zip(metro['id'].tolist(), metro['stations'].tolist()):
+        lines.append({'line_id': line_id, 'type': 'Metro', 'stops': _stop_ids(stations),
+                      'headway': METRO_HEADWAY, 'vehicles': None, 'capacity': METRO_CAPACITY})
+    for route in transit_routes:
+        lines.append({'line_id': f"R{route['route_id']}", 'type': route['type'],
+                      'stops': [name_to_id[name] for name in route['stops']],
+                      'headway': route['frequency'], 'vehicles': None, 'capacity': route['capacity']})
+    return lines
+
+class Journey:
+    """
+    One transit journey found by TransitTimetable.
+
+    Attributes:
+        departure (float): Departure from the origin, minutes after midnight.
+        arrival (float): Arrival at the destination, minutes after midnight.
+        transfers (int): Vehicle changes.
+        legs (list): (line_id, board_stop, board_time, alight_stop, alight_time) tuples.
+    """
+
+    def __init__(self, departure, arrival, legs):
+        self.departure = departure
+        self.arrival = arrival
+        self.legs = legs
+        self.transfers = max(0, len(legs) - 1)
+
+    @property
+    def duration(self):
+        return self.arrival - self.departure
+
+class TransitTimetable:
+    """
+    Frequency-based timetable stored as RAPTOR route and stop arrays.
+
+    Every line is split into two routes, one per direction. The stops of route
+    r are ``route_stops[route_offsets[r]:route_offsets[r + 1]]`` with the
+    matching ``stop_offsets`` (minutes from the first stop), and its trips leave
+    the first stop at ``route_starts[r]``. The routes serving stop s are
+    ``stop_routes[stop_route_offsets[s]:stop_route_offsets[s + 1]]`` with the
+    stop's position in each route in ``stop_positions``.
+
+    Attributes:
+        names (list): Stop name per index, as in the RoadNetwork.
+        route_lines (list): Line ID per route.
+        route_headways (np.ndarray): Minutes between trips per route.
+        route_capacities (np.ndarray): Passengers per vehicle per route.
+    """
+
+    def __init__(self, names, route_lines, route_stop_lists, route_offset_lists, route_starts,
+                 route_headways=None, route_capacities=None):
+        self.names = list(names)
+        self.name_index = {name: i for i, name in enumerate(self.names)}
+        self.route_lines = list(route_lines)
+        if route_headways is None:
+            route_headways = [starts[1] - starts[0] if len(starts) > 1 else math.inf for starts in route_starts]
+        self.route_headways = np.asarray(route_headways, dtype=np.float64)
+        if route_capacities is None:
+            route_capacities = [BUS_CAPACITY] * len(route_lines)
+        self.route_capacities = np.asarray(route_capacities, dtype=np.float64)
+        self.route_offsets = np.zeros(len(route_stop_lists) + 1, dtype=np.int64)
+        np.cumsum([len(stops) for stops in route_stop_lists], out=self.route_offsets[1:])
+        self.route_stops = np.array([s for stops in route_stop_lists for s in stops], dtype=np.int32)
+        self.stop_offsets = np.array([t for offsets in route_offset_lists for t in offsets], dtype=np.float64)
+        self.route_starts = [list(starts) for starts in route_starts]
+        # Positions are flat indices into route_stops, grouped by stop
+        order = np.argsort(self.route_stops, kind='stable')
+        self.stop_positions = order.astype(np.int64)
+        self.stop_routes = np.searchsorted(self.route_offsets, order, side='right') - 1
+        self.stop_route_offsets = np.zeros(len(self.names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.route_stops, minlength=len(self.names)), out=self.stop_route_offsets[1:])
+        self._lists = None
+
+    @property
+    def num_stops(self):
+        return len(self.names)
+
+    @property
+    def num_routes(self):
+        return len(self.route_lines)
+
+    def _arrays(self):
+        if self._lists is None:
+            self._lists = (self.route_offsets.tolist(), self.route_stops.tolist(), self.stop_offsets.tolist(),
+                           self.stop_route_offsets.tolist(), self.stop_routes.tolist(), self.stop_positions.tolist())
+        return self._lists
+
+    def _rounds(self, origin, departure, max_transfers, target, tau, best, parents):
+        # RAPTOR: round k boards one more vehicle, starting from stops improved in round k - 1
+        route_offsets, route_stops, stop_offsets, stop_route_offsets, stop_routes, stop_positions = self._arrays()
+        route_starts = self.route_starts
+        inf = math.inf
+        tau[0][origin] = departure
+        best[origin] = min(best[origin], departure)
+        marked = {origin}
+        for k in range(1, max_transfers + 2):
+            previous, current = tau[k - 1], tau[k]
+            slack = TRANSFER_MINUTES if k > 1 else 0.0
+            queue = {}
+            for stop in marked:
+                for i in range(stop_route_offsets[stop], stop_route_offsets[stop + 1]):
+                    route, position = stop_routes[i], stop_positions[i]
+                    if position < queue.get(route, inf):
+                        queue[route] = position
+            marked = set()
+            for route, first in queue.items():
+                starts = route_starts[route]
+                trip_start = None
+                board = -1
+                for position in range(first, route_offsets[route + 1]):
+                    stop = route_stops[position]
+                    offset = stop_offsets[position]
+                    if trip_start is not None:
+                        arrival = trip_start + offset
+                        if arrival < best[stop] and (target < 0 or arrival < best[target]):
+                            current[stop] = arrival
+                            best[stop] = arrival
+                            if parents is not None:
+                                parents[k][stop] = (route, trip_start, board, position)
+                            marked.add(stop)
+                    ready = previous[stop] + slack
+                    if ready < inf and (trip_start is None or ready < trip_start + offset):
+                        # Earliest trip leaving this stop at or after ready
+                        trip = bisect.bisect_left(starts, ready - offset - 1e-9)
+                        if trip < len(starts) and (trip_start is None or starts[trip] < trip_start):
+                            trip_start = starts[trip]
+                            board = position
+            if not marked:
+                break
+
+    def _labels(self, max_transfers):
+        rounds = max_transfers + 2
+        return [[math.inf] * self.num_stops for _ in range(rounds)], [math.inf] * self.num_stops
+
+    def journeys(self, origin_name, destination_name, departure, max_transfers=MAX_TRANSFERS):
+        """
+        Finds the Pareto set of journeys over arrival time and number of transfers.
+
+        Args:
+            origin_name (str): Origin stop name.
+            destination_name (str): Destination stop name.
+            departure: Earliest departure (datetime.time or minutes after midnight).
+            max_transfers (int): Largest number of vehicle changes.
+
+        Returns:
+            list: Journey objects ordered by increasing transfers and decreasing
+                  arrival; empty if the destination cannot be reached.
+
+        Time Complexity: O(K * (R * L + S)) for K rounds over R routes of up to L stops and S stops.
+        """
+        origin, target = self.name_index[origin_name], self.name_index[destination_name]
+        depart = departure_minute(departure)
+        tau, best = self._labels(max_transfers)
+        parents = [{} for _ in tau]
+        self._rounds(origin, depart, max_transfers, target, tau, best, parents)
+        found = []
+        for k in range(1, len(tau)):
+            if target in parents[k]:
+                found.append(Journey(depart, tau[k][target], self._legs(parents, k, target)))
+        return found
+
+    def _legs(self, parents, k, stop):
+        _, route_stops, stop_offsets = self._arrays()[:3]
+        legs = []
+        while k > 0:
+            route, trip_start, board, alight = parents[k][stop]
+            legs.append((self.route_lines[route], self.names[route_stops[board]], trip_start + stop_offsets[board],
+                         self.names[route_stops[alight]], trip_start + stop_offsets[alight]))
+            stop = route_stops[board]
+            k -= 1
+        legs.reverse()
+        return legs
+
+    def earliest_arrival(self, origin_name, destination_name, departure, max_transfers=MAX_TRANSFERS):
+        """
+        Returns the journey that arrives first, or None if there is none.
+        """
+        found = self.journeys(origin_name, destination_name, departure, max_transfers)
+        return found[-1] if found else None
+
+    def fewest_transfers(self, origin_name, destination_name, departure, max_transfers=MAX_TRANSFERS):
+        """
+        Returns the earliest journey among those with the fewest transfers, or None if there is none.
+        """
+        found = self.journeys(origin_name, destination_name, departure, max_transfers)
+        return found[0] if found else None
+
+    def earliest_arrivals(self, origin_name, destination_names, departure, max_transfers=MAX_TRANSFERS):
+        """
+        Finds the earliest-arriving journey to several destinations in a single RAPTOR run.
+
+        Args:
+            origin_name (str): Origin stop name.
+            destination_names (list): Destination stop names.
+            departure: Earliest departure (datetime.time or minutes after midnight).
+            max_transfers (int): Largest number of vehicle changes.
+
+        Returns:
+            list: Journey per destination, as from earliest_arrival, or None where
+                  there is none.
+
+        Time Complexity: O(K * (R * L + S)), the cost of one earliest_arrival call.
+        """
+        origin = self.name_index[origin_name]
+        targets = [self.name_index[name] for name in destination_names]
+        depart = departure_minute(departure)
+        tau, best = self._labels(max_transfers)
+        parents = [{} for _ in tau]
+        self._rounds(origin, depart, max_transfers, -1, tau, best, parents)
+        found = []
+        for target in targets:
+            # The last round that improved the target holds its earliest arrival
+            rounds = [k for k in range(1, len(tau)) if target in parents[k]]
+            found.append(Journey(depart, tau[rounds[-1]][target], self._legs(parents, rounds[-1], target)) if rounds else None)
+        return found
+
+    def one_to_all(self, origin_name, departure, max_transfers=MAX_TRANSFERS):
+        """
+        Computes the earliest arrival at every stop from one origin in a single RAPTOR run.
+
+        Args:
+            origin_name (str): Origin stop name.
+            departure: Earliest departure (datetime.time or minutes after midnight).
+            max_transfers (int): Largest number of vehicle changes.
+
+        Returns:
+            dict: Stop name to (arrival, transfers); (inf, None) when unreachable.
+                  The origin maps to (departure, 0).
+        """
+        origin = self.name_index[origin_name]
+        depart = departure_minute(departure)
+        tau, best = self._labels(max_transfers)
+        self._rounds(origin, depart, max_transfers, -1, tau, best, None)
+        result = {}
+        for stop, name in enumerate(self.names):
+            rounds = [k for k in range(1, len(tau)) if tau[k][stop] == best[stop]]
+            result[name] = (best[stop], rounds[0] - 1 if rounds else None)
+        result[origin_name] = (depart, 0)
+        return result
+
+    def profile(self, origin_name, window_start, window_end, max_transfers=MAX_TRANSFERS):
+        """
+        Computes, for every stop, the best journeys over a departure window (rRAPTOR).
+
+        Departures from the origin are processed latest first and labels are
+        kept between them, so each run only explores what an earlier
+        departure improves.
+
+        Args:
+            origin_name (str): Origin stop name.
+            window_start: Earliest departure considered.
+            window_end: Latest departure considered.
+            max_transfers (int): Largest number of vehicle changes.
+
+        Returns:
+            dict: Stop name to a list of (departure, arrival) pairs, ordered by
+                  departure, where leaving later always means arriving later.
+                  The origin is left out.
+
+        Time Complexity: O(D) RAPTOR runs for D departures in the window.
+        """
+        origin = self.name_index[origin_name]
+        start, end = departure_minute(window_start), departure_minute(window_end)
+        route_offsets, _, stop_offsets, stop_route_offsets, stop_routes, stop_positions = self._arrays()
+        departures = set()
+        for i in range(stop_route_offsets[origin], stop_route_offsets[origin + 1]):
+            route, position = stop_routes[i], stop_positions[i]
+            if position == route_offsets[route + 1] - 1:
+                continue
+            offset = stop_offsets[position]
+            departures.update(s + offset for s in self.route_starts[route] if start <= s + offset <= end)
+        tau, best = self._labels(max_transfers)
+        result = {name: [] for i, name in enumerate(self.names) if i != origin}
+        for depart in sorted(departures, reverse=True):
+            self._rounds(origin, depart, max_transfers, -1, tau, best, None)
+            for stop, name in enumerate(self.names):
+                if stop != origin and best[stop] < math.inf:
+                    entries = result[name]
+                    if not entries or best[stop] < entries[-1][1]:
+                        entries.append((depart, best[stop]))
+        for entries in result.values():
+            entries.reverse()
+        return result
+
+def ride_minutes(network, matrix, line_type, a, b):
+    """
+    Estimates the in-vehicle time between two consecutive stops.
+
+    Buses follow the congested road travel time from the matrix (straight-line
+    distance if the roads do not connect the stops); metro trains run at
+    METRO_SPEED_KMH along the straight line.
+
+    Args:
+        network (RoadNetwork): Network the stop indices refer to.
+        matrix (TravelTimeMatrix): Road travel times for the time period.
+        line_type (str): 'Bus' or 'Metro'.
+        a (int): From stop index.
+        b (int): To stop index.
+
+    Returns:
+        float: Minutes.
+    """
+    km = math.hypot(network.x[a] - network.x[b], network.y[a] - network.y[b]) * KM_PER_DEGREE
+    if line_type == 'Metro':
+        return km * 60.0 / METRO_SPEED_KMH
+    road = float(matrix.times[a, b])
+    return road if road < math.inf else km
+
+def build_transit_timetable(network, matrix, lines, service_start=SERVICE_START, service_end=SERVICE_END):
+    """
+    Expands transit lines into a frequency-based TransitTimetable.
+
+    Trips leave each end of a line every headway minutes between
+    service_start and service_end. A bus line's headway is its round-trip
+    time divided by its buses, but no shorter than MIN_BUS_HEADWAY.
+
+    Args:
+        network (RoadNetwork): Network used for stop indices and coordinates.
+        matrix (TravelTimeMatrix): Road travel times for the time period.
+        lines (list): Output of load_transit_lines.
+        service_start (float): First departure, minutes after midnight.
+        service_end (float): Last possible departure, minutes after midnight.
+
+    Returns:
+        TransitTimetable: Timetable over every network node.
+    """
+    route_lines, route_stop_lists, route_offset_lists, route_starts = [], [], [], []
+    route_headways, route_capacities = [], []
+    for line in lines:
+        stops = [network.index[node] for node in line['stops']]
+        for direction in (stops, stops[::-1]):
+            offsets = [0.0]
+            for a, b in zip(direction, direction[1:]):
+                offsets.append(offsets[-1] + ride_minutes(network, matrix, line['type'], a, b))
+            route_lines.append(line['line_id'])
+            route_stop_lists.append(direction)
+            route_offset_lists.append(offsets)
+        headway = line['headway']
+        if headway is None:
+            cycle = route_offset_lists[-1][-1] + route_offset_lists[-2][-1]
+            headway = max(cycle / line['vehicles'], MIN_BUS_HEADWAY)
+        starts = np.arange(service_start, service_end + 1e-9, headway).tolist()
+        route_starts.extend([starts, starts])
+        route_headways.extend([headway, headway])
+        route_capacities.extend([line['capacity'], line['capacity']])
+    return TransitTimetable(network.names, route_lines, route_stop_lists, route_offset_lists, route_starts,
+                            route_headways, route_capacities)
+
+def get_transit_timetable(network, matrix, name_to_id, transit_routes):
+    """
+    Returns the timetable for a travel-time matrix, rebuilt only when the matrix or lines change.
+
+    Args:
+        network (RoadNetwork): Network used for stop indices and coordinates.
+        matrix (TravelTimeMatrix): Road travel times for the time period.
+        name_to_id (dict): Name to ID mapping.
+        transit_routes (list): Route dictionaries as in data.py.
+
+    Returns:
+        TransitTimetable: Cached or new timetable.
+    """
+    key = (id(network), matrix.time_of_day)
+    cached = _timetable_cache.get(key)
+    if cached is None or cached[0] is not matrix or cached[1] != transit_routes:
+        lines = load_transit_lines(name_to_id, transit_routes)
+        cached = (matrix, [dict(route) for route in transit_routes], build_transit_timetable(network, matrix, lines))
+        _timetable_cache[key] = cached
+    return cached[2]
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+
+class RouteCache:
+    """
+    Size-bounded LRU cache for routing results with road-level invalidation.
+
+    Keys are (start_name, end_name, time_of_day, snapshot) tuples, where
+    snapshot is the congestion table's rebuild counter, so a lookup costs one
+    dict access instead of hashing the traffic table. Every entry is indexed
+    by the roads on its path; when a road's volumes change in place only the
+    routes that can be affected are dropped.
+
+    Attributes:
+        maxsize (int): Maximum number of cached routes.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to be computed.
+        evictions (int): Entries dropped to respect maxsize.
+        invalidations (int): Entries dropped because of traffic updates.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._roads = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Looks up a cached route and marks it as recently used.
+
+        Args:
+            key (tuple): (start_name, end_name, time_of_day, snapshot).
+            default: Value returned on a miss.
+
+        Returns:
+            Cached (total_time, path_names), or default.
+
+        Time Complexity: O(1).
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        """
+        Stores a route, evicting the least recently used entries beyond maxsize.
+
+        Args:
+            key (tuple): (start_name, end_name, time_of_day, snapshot).
+            value (tuple): (total_time, path_names).
+
+        Time Complexity: O(P) where P is the path length.
+        """
+        if key in self._entries:
+            self._discard(key)
+        path_names = value[1]
+        roads = [f"{path_names[i]}-{path_names[i + 1]}" for i in range(len(path_names) - 1)]
+        self._entries[key] = (value, roads)
+        for road in roads:
+            self._roads.setdefault(road, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _discard(self, key):
+        _, roads = self._entries.pop(key)
+        for road in roads:
+            keys = self._roads.get(road)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._roads[road]
+
+    def on_traffic_update(self, road_name, changes):
+        """
+        Traffic listener: drops the routes a road update can affect.
+
+        A road that became slower only affects routes that use it. A road that
+        became faster can shorten any route in that time period, so all of them
+        are dropped.
+
+        Args:
+            road_name (str): Updated road name.
+            changes (dict): Time period to (old_factor, new_factor).
+        """
+        slower = {period for period, (old, new) in changes.items() if new > old}
+        faster = {period for period, (old, new) in changes.items() if new < old}
+        stale = [key for key in self._roads.get(road_name, ()) if key[2] in slower]
+        if faster:
+            stale += [key for key in self._entries if key[2] in faster]
+        for key in set(stale):
+            self._discard(key)
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._roads.clear()
+
+    def stats(self):
+        """
+        Returns cache statistics.
+
+        Returns:
+            dict: size, maxsize, hits, misses, evictions, invalidations and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
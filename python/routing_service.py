@@ -0,0 +1,412 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+from algorithms import csr_dijkstra, tree_path
+from batch_routing import BatchRouter, check_fields, parse_departure, parse_flag, parse_time_of_day
+from data import all_nodes, facilities
+from emergency_routing import FACILITY_TYPES, find_emergency_route, get_emergency_graph
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8600
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_BATCH = 64
+DEFAULT_BATCH_WINDOW = 0.002  # seconds a batch stays open for more requests
+MAX_BODY_BYTES = 64 * 1024
+
+_worker = {}
+
+def _init_worker():
+    _worker['router'] = BatchRouter()
+
+def search_roads(key, targets):
+    """
+    Answers road queries that share a source and time of day with one Dijkstra search.
+
+    Args:
+        key (tuple): (time_of_day, source_name).
+        targets (list): Destination name per request.
+
+    Returns:
+        list: Per request, {'path', 'minutes'} as from time_dependent_dijkstra_csr,
+              or {'error'} when unreachable.
+
+    Time Complexity: O(E log V) for the whole batch.
+    """
+    time_of_day, source = key
+    router = _worker['router']
+    network = router.network
+    ends = [network.name_index[name] for name in targets]
+    # A batch with a single destination stops as soon as it is settled
+    stop = ends[0] if len(set(ends)) == 1 else None
+    distances, came_from = csr_dijkstra(network, network.name_index[source],
+                                        network.travel_time_list(router.table, time_of_day), stop)
+    return [{'path': [network.names[i] for i in tree_path(came_from, end)], 'minutes': distances[end]}
+            if distances[end] < math.inf else {'error': 'no route'} for end in ends]
+
+def search_emergency(key, items):
+    """
+    Answers identical nearest-facility queries with one find_emergency_route search.
+
+    Args:
+        key (tuple): (source_name, priority, facility_type).
+        items (list): One placeholder per request.
+
+    Returns:
+        list: The same {'path', 'facility'} or {'error'} result for every request.
+    """
+    source, priority, facility_type = key
+    path, facility = find_emergency_route(source, facilities, _worker['router'].emergency_graph, priority, facility_type)
+    result = {'error': 'no reachable facility'} if path is None else {'path': path, 'facility': facility['name']}
+    return [result] * len(items)
+
+def search_transit(key, destinations):
+    """
+    Answers transit queries that share an origin, departure and period with one RAPTOR run.
+
+    Args:
+        key (tuple): (time_of_day, origin_name, departure_minute).
+        destinations (list): Destination name per request.
+
+    Returns:
+        list: Per request, the earliest-arrival journey fields, or {'error'}.
+    """
+    time_of_day, origin, departure = key
+    journeys = _worker['router'].timetable(time_of_day).earliest_arrivals(origin, destinations, departure)
+    return [{'departure': j.departure, 'arrival': j.arrival, 'minutes': j.duration, 'transfers': j.transfers,
+             'legs': [list(leg) for leg in j.legs]} if j is not None else {'error': 'no transit connection'}
+            for j in journeys]
+
+def run_searches(batches):
+    """
+    Runs several batch searches in one executor task.
+
+    Args:
+        batches (list): (search, key, items) tuples.
+
+    Returns:
+        list: Per batch, the list returned by search(key, items).
+    """
+    return [search(key, items) for search, key, items in batches]
+
+class MicroBatcher:
+    """
+    Groups concurrent requests by batch key and runs each group as one search.
+
+    The first request after a flush opens a short window; requests that
+    arrive in the meantime join the group of their key. When the window
+    ends, the open groups are split across at most `parallelism` executor
+    tasks, so a process pool pays one round trip per task rather than per
+    request. A group that reaches max_batch requests is sent at once.
+
+    Attributes:
+        batches (int): Searches run.
+        batched (int): Requests answered by those searches.
+        tasks (int): Executor tasks submitted.
+    """
+
+    def __init__(self, executor, window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH, parallelism=1):
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.parallelism = max(1, parallelism)
+        self._groups = {}
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.batched = 0
+        self.tasks = 0
+
+    async def submit(self, search, key, item):
+        """
+        Adds a request to its group and waits for its result.
+
+        Args:
+            search (callable): Module-level batch search, called as search(key, items).
+            key (tuple): Batch key; requests with equal keys share a search.
+            item: This request's part of the search input.
+
+        Returns:
+            The search's result for this request.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        requests = self._groups.setdefault((search, key), [])
+        requests.append((item, future))
+        if len(requests) >= self.max_batch:
+            self._send([(search, key, self._groups.pop((search, key)))])
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        self._timer = None
+        groups = [(search, key, requests) for (search, key), requests in self._groups.items()]
+        self._groups.clear()
+        for part in range(min(self.parallelism, len(groups))):
+            self._send(groups[part::self.parallelism])
+
+    def _send(self, groups):
+        self.batches += len(groups)
+        self.batched += sum(len(requests) for _, _, requests in groups)
+        self.tasks += 1
+        batches = [(search, key, [item for item, _ in requests]) for search, key, requests in groups]
+        task = asyncio.get_running_loop().run_in_executor(self.executor, run_searches, batches)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda done: self._deliver(groups, done))
+
+    def cancel(self):
+        """
+        Cancels the open groups and every submitted executor task.
+
+        Every waiting request gets CancelledError. Tasks the executor has not
+        started are dropped; tasks already running in a worker finish, but
+        their results are discarded.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for requests in self._groups.values():
+            for _, future in requests:
+                future.cancel()
+        self._groups.clear()
+        for task in list(self._tasks):
+            task.cancel()
+
+    @staticmethod
+    def _deliver(groups, done):
+        error = asyncio.CancelledError() if done.cancelled() else done.exception()
+        results = None if error else done.result()
+        for g, (_, _, requests) in enumerate(groups):
+            for r, (_, future) in enumerate(requests):
+                if future.done():
+                    continue
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[g][r])
+
+class RoutingService:
+    """
+    Asyncio HTTP/1.1 routing service over a pool of preloaded workers.
+
+    Endpoints take their fields as query string parameters or a POST JSON
+    body, and answer with JSON:
+
+    - GET /route?from=&to=&time_of_day=: time_dependent_dijkstra.
+    - GET /emergency?from=&priority=&facility_type=: find_emergency_route.
+    - GET /transit?from=&to=&departure=HH:MM&time_of_day=: earliest-arrival journey.
+    - GET /health: request and batching counters.
+
+    Invalid fields get 400 and unreachable destinations 404. Once
+    max_pending requests are in flight, further ones get 503 with a
+    Retry-After header instead of queueing without bound.
+
+    Args:
+        workers (int): Worker processes, each holding the road, emergency and
+            transit graphs; 0 runs searches on one thread in this process.
+        max_pending (int): Requests in flight before new ones are rejected.
+        max_batch (int): Largest batch sent to one search.
+        batch_window (float): Seconds a batch waits for more requests.
+    """
+
+    def __init__(self, workers=os.cpu_count() or 1, max_pending=DEFAULT_MAX_PENDING,
+                 max_batch=DEFAULT_MAX_BATCH, batch_window=DEFAULT_BATCH_WINDOW):
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(workers, initializer=_init_worker)
+        else:
+            self.executor = ThreadPoolExecutor(1, initializer=_init_worker)
+        self.batcher = MicroBatcher(self.executor, batch_window, max_batch, workers)
+        self.max_pending = max_pending
+        self.road_names = set(all_nodes['Name'])
+        self.emergency_names = set(get_emergency_graph())
+        self.pending = 0
+        self.requests = 0
+        self.rejected = 0
+        self.server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Loads the workers' graphs, then starts listening; port 0 picks a free
+        port, available as self.port.
+
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        # Workers start before the socket is bound, so they neither inherit it nor load on a first request
+        await asyncio.get_running_loop().run_in_executor(self.executor, run_searches, [])
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        # Executor.shutdown(cancel_futures=True) needs Python 3.9
+        self.batcher.cancel()
+        self.executor.shutdown()
+
+    def stats(self):
+        return {'pending': self.pending, 'requests': self.requests, 'rejected': self.rejected,
+                'batches': self.batcher.batches, 'batched': self.batcher.batched, 'tasks': self.batcher.tasks}
+
+    def prepare(self, endpoint, params):
+        """
+        Validates a request and picks its batch search.
+
+        Args:
+            endpoint (str): '/route', '/emergency' or '/transit'.
+            params (dict): Request fields.
+
+        Returns:
+            tuple: (search, key, item) for MicroBatcher.submit.
+
+        Raises:
+            ValueError: If a field is missing, has the wrong type or is invalid.
+        """
+        check_fields(params)
+        source = params.get('from')
+        if endpoint == '/emergency':
+            if source not in self.emergency_names:
+                raise ValueError(f"unknown location '{source}'")
+            facility_type = params.get('facility_type') or None
+            if facility_type is not None and facility_type not in FACILITY_TYPES.values():
+                raise ValueError(f"unknown facility_type '{facility_type}'")
+            return search_emergency, (source, parse_flag(params.get('priority')), facility_type), None
+        target = params.get('to')
+        for name in (source, target):
+            if name not in self.road_names:
+                raise ValueError(f"unknown location '{name}'")
+        time_of_day = parse_time_of_day(params)
+        if endpoint == '/route':
+            return search_roads, (time_of_day, source), target
+        return search_transit, (time_of_day, source, parse_departure(params.get('departure'))), target
+
+    async def dispatch(self, method, target, body):
+        """
+        Answers one HTTP request.
+
+        Returns:
+            tuple: (status, payload dict, extra headers dict).
+        """
+        url = urlsplit(target)
+        if method not in ('GET', 'POST'):
+            return 405, {'error': f"method {method} not allowed"}, {}
+        if url.path == '/health':
+            return 200, self.stats(), {}
+        if url.path not in ('/route', '/emergency', '/transit'):
+            return 404, {'error': f"unknown endpoint {url.path}"}, {}
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return 503, {'error': 'overloaded'}, {'Retry-After': '1'}
+        self.requests += 1
+        self.pending += 1
+        # Every way out of the request, including unexpected errors, releases its pending slot
+        try:
+            try:
+                params = dict(parse_qsl(url.query))
+                if body:
+                    fields = json.loads(body)
+                    if not isinstance(fields, dict):
+                        raise ValueError("body is not a JSON object")
+                    params.update(fields)
+                search, key, item = self.prepare(url.path, params)
+            except (TypeError, ValueError) as error:
+                return 400, {'error': str(error)}, {}
+            try:
+                result = await self.batcher.submit(search, key, item)
+            except Exception as error:
+                return 500, {'error': f"search failed: {error}"}, {}
+        finally:
+            self.pending -= 1
+        return (404 if 'error' in result else 200), result, {}
+
+    async def handle(self, reader, writer):
+        # One connection, kept alive across HTTP/1.1 requests
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, {}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, {}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'body too large'}, {}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                status, payload, extra = await self.dispatch(method, target, body)
+                await self._respond(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, extra, keep_alive):
+        for key, value in payload.items():
+            if isinstance(value, float) and math.isinf(value):
+                payload[key] = None
+        body = json.dumps(payload).encode()
+        headers = {'Content-Type': 'application/json', 'Content-Length': str(len(body)),
+                   'Connection': 'keep-alive' if keep_alive else 'close', **extra}
+        head = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        writer.write(head.encode('latin-1') + b"\r\n" + body)
+        await writer.drain()
+
+async def serve(host, port, workers, max_pending, max_batch, batch_window):
+    service = RoutingService(workers, max_pending, max_batch, batch_window)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await service.start(host, port)
+        print(f"Serving on http://{host}:{service.port} with {workers} workers", file=sys.stderr)
+        await stop.wait()
+    finally:
+        await service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve routing queries over HTTP.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="search processes; 0 searches on a thread in the server process")
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help="requests in flight before answering 503")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument('--batch-window-ms', type=float, default=DEFAULT_BATCH_WINDOW * 1000)
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.workers, args.max_pending, args.max_batch, args.batch_window_ms / 1000))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
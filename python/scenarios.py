@@ -0,0 +1,142 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from congestion import frame_fingerprint
+
+# Candidate count times matrix cells from which scoring is spread across processes
+PARALLEL_MIN_WORK = 50_000_000
+
+_ranking_cache = {}
+_worker = {}
+
+def trip_weights(network, all_nodes):
+    """
+    Builds a gravity-style trip table from node populations.
+
+    Every resident makes one trip, and destinations are chosen in proportion
+    to their population, so trips from i to j are P_i * P_j / sum(P) and the
+    table sums to the total population (minus trips that stay in place).
+
+    Args:
+        network (RoadNetwork): Network whose node order the table follows.
+        all_nodes (pd.DataFrame): Nodes with 'ID' and 'Population'.
+
+    Returns:
+        np.ndarray: Float64 (N, N) trips with a zero diagonal.
+    """
+    population = dict(zip(all_nodes['ID'], all_nodes['Population'].fillna(0)))
+    p = np.array([population.get(node, 0) for node in network.node_ids], dtype=np.float64)
+    total = p.sum()
+    weights = np.outer(p, p) / total if total > 0 else np.zeros((len(p), len(p)))
+    np.fill_diagonal(weights, 0.0)
+    return weights
+
+def candidate_benefit(times, weights, a, b, travel_time):
+    """
+    Scores one new road with an incremental all-pairs update.
+
+    A shortest path that uses the new road a-b goes i -> a -> b -> j or
+    i -> b -> a -> j, so the updated matrix is the element-wise minimum of
+    the old one and those two detours. No searches are rerun.
+
+    Args:
+        times (np.ndarray): Float64 (N, N) travel times before the road is added.
+        weights (np.ndarray): Float64 (N, N) trips per pair.
+        a (int): Index of one end.
+        b (int): Index of the other end.
+        travel_time (float): Travel time along the new road, the same both ways.
+
+    Returns:
+        tuple: (time_saved, new_pairs) where time_saved is the trip-weighted
+               travel time reduction over pairs already connected and new_pairs
+               the number of pairs the road connects for the first time.
+
+    Time Complexity: O(N^2) vectorized.
+    """
+    via = np.minimum(times[:, a, None] + times[None, b, :], times[:, b, None] + times[None, a, :]) + travel_time
+    connected = np.isfinite(times)
+    saved = np.subtract(times, np.minimum(times, via), out=np.zeros_like(times), where=connected)
+    new_pairs = int(np.count_nonzero(~connected & np.isfinite(via)))
+    return float((saved * weights).sum()), new_pairs
+
+def _init_worker(times, weights):
+    _worker['times'] = times
+    _worker['weights'] = weights
+
+def _score_chunk(chunk):
+    times, weights = _worker['times'], _worker['weights']
+    results = []
+    for a, b, travel_time in chunk:
+        started = time.perf_counter()
+        saved, new_pairs = candidate_benefit(times, weights, a, b, travel_time)
+        results.append((saved, new_pairs, time.perf_counter() - started))
+    return results
+
+def score_candidates(matrix, candidates, weights, processes=None):
+    """
+    Ranks candidate roads by trip-weighted travel time saved per million EGP.
+
+    Each candidate is scored on its own against the same base matrix.
+    Candidates are split into chunks and scored across a process pool; each
+    worker receives the base matrix once. Small inputs are scored in-process.
+
+    Args:
+        matrix (TravelTimeMatrix): All-pairs travel times on the current network.
+        candidates (pd.DataFrame): Roads with 'FromID', 'ToID', 'Distance' and 'Cost',
+            like df_potential. A new road's travel time is its distance, as for
+            roads without traffic data.
+        weights (np.ndarray): Trips per pair, e.g. from trip_weights.
+        processes (int, optional): Worker count; defaults to os.cpu_count() when
+            candidates * N^2 reaches PARALLEL_MIN_WORK and 1 otherwise.
+
+    Returns:
+        pd.DataFrame: candidates' columns plus 'TimeSaved', 'NewPairs', 'BenefitPerCost'
+                      and 'Seconds' (scoring time of that candidate), sorted by
+                      BenefitPerCost descending; ties keep input order.
+
+    Time Complexity: O(C * N^2) total work, divided across processes.
+    """
+    index = matrix.network.index
+    work = [(index[u], index[v], float(d)) for u, v, d in zip(
+        candidates['FromID'].tolist(), candidates['ToID'].tolist(), candidates['Distance'].tolist())]
+    n = matrix.network.num_nodes
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(work) * n * n >= PARALLEL_MIN_WORK else 1
+    if processes > 1 and len(work) > 1:
+        chunk = max(1, math.ceil(len(work) / (processes * 4)))
+        chunks = [work[lo:lo + chunk] for lo in range(0, len(work), chunk)]
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(matrix.times, weights)) as pool:
+            results = [row for rows in pool.map(_score_chunk, chunks) for row in rows]
+    else:
+        _init_worker(matrix.times, weights)
+        try:
+            results = _score_chunk(work)
+        finally:
+            _worker.clear()
+    ranking = candidates.reset_index(drop=True).copy()
+    ranking['TimeSaved'] = [saved for saved, _, _ in results]
+    ranking['NewPairs'] = [new_pairs for _, new_pairs, _ in results]
+    ranking['BenefitPerCost'] = ranking['TimeSaved'] / ranking['Cost']
+    ranking['Seconds'] = [seconds for _, _, seconds in results]
+    return ranking.sort_values('BenefitPerCost', ascending=False, kind='stable').reset_index(drop=True)
+
+def get_candidate_ranking(matrix, candidates, all_nodes):
+    """
+    Returns the candidate ranking, recomputed only when the matrix or candidates change.
+
+    Args:
+        matrix (TravelTimeMatrix): All-pairs travel times on the current network.
+        candidates (pd.DataFrame): Candidate roads, like df_potential.
+        all_nodes (pd.DataFrame): Nodes with 'ID' and 'Population'.
+
+    Returns:
+        pd.DataFrame: Output of score_candidates.
+    """
+    key = (id(matrix), frame_fingerprint(candidates.astype(str)), frame_fingerprint(all_nodes.astype(str)))
+    if _ranking_cache.get('key') != key or _ranking_cache.get('matrix') is not matrix:
+        _ranking_cache['ranking'] = score_candidates(matrix, candidates, trip_weights(matrix.network, all_nodes))
+        _ranking_cache['matrix'] = matrix
+        _ranking_cache['key'] = key
+    return _ranking_cache['ranking']
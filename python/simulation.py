@@ -1,53 +1,149 @@
+import time
 import streamlit as st
 import pydeck as pdk
-import pandas as pd
 import numpy as np
-from data import all_nodes, build_traffic_graph, name_to_id, id_to_name
-from algorithms import a_star
+from data import all_nodes, df_existing, df_traffic, transit_routes
+from congestion import TIME_PERIODS, get_congestion_table
+from travel_matrix import get_road_network
+from simulation_engine import ARRIVED, CongestedSimulation, VehicleSimulation
+
+MAX_VEHICLES = 100000
+MAX_RECORDED = 2000  # vehicles drawn on the map; the rest are simulated but not recorded
+EMERGENCY_SPEED_FACTOR = 2.0  # priority mode halves travel times, as in a_star
+
+def build_scenario(vehicle_type, num_vehicles, time_of_day, duration, seed=0, feedback=False,
+                   vehicle_scale=1.0, reroute_every=5.0):
+    """
+    Sets up vehicles on the existing road network.
+
+    Emergency vehicles leave random locations for a random medical facility at
+    priority speed, spread over the run. Hospitals off the existing roads are
+    reached at the nearest node with a road. Transit vehicles run the lines in
+    transit_routes through their stops, leaving the first stop every
+    'frequency' minutes, or more often when more vehicles are asked for than
+    that fits in the run.
+
+    With feedback, the static time-of-day congestion is replaced by link
+    times that follow the simulated vehicles through the BPR function, and
+    emergency vehicles are rerouted as traffic builds up; buses keep their lines.
+
+    Args:
+        vehicle_type (str): 'Emergency' or 'Transit'.
+        num_vehicles (int): Vehicles to generate; unreachable trips are dropped.
+        time_of_day (str): Time period for congested travel times.
+        duration (float): Minutes over which departures are spread.
+        seed (int): Random seed.
+        feedback (bool): Simulate congestion caused by the vehicles themselves.
+        vehicle_scale (float): Real vehicles each simulated one stands for, with feedback.
+        reroute_every (float): Minutes between reroutes, with feedback.
+
+    Returns:
+        VehicleSimulation: Simulation with its vehicles added; a CongestedSimulation with feedback.
+    """
+    name_to_id = dict(zip(all_nodes['Name'], all_nodes['ID']))
+    network = get_road_network(all_nodes, df_existing)
+    table = get_congestion_table(df_traffic, df_existing, name_to_id)
+    if feedback:
+        simulation = CongestedSimulation(network, network.weights, network.arc_capacities(table),
+                                         vehicle_scale, reroute_every)
+    else:
+        simulation = VehicleSimulation(network, network.travel_times(table, time_of_day))
+    rng = np.random.default_rng(seed)
+    if vehicle_type == "Emergency":
+        # Hospitals without an existing road are reached at the nearest node that has one
+        on_road = np.flatnonzero(np.diff(network.offsets) > 0)
+        hospitals = np.array([network.index[node] for node in all_nodes.loc[all_nodes['Type'] == 'Medical', 'ID']])
+        distance = np.hypot(network.x[on_road][None, :] - network.x[hospitals][:, None],
+                            network.y[on_road][None, :] - network.y[hospitals][:, None])
+        entrances = on_road[distance.argmin(axis=1)]
+        origins = rng.choice(on_road, num_vehicles)
+        routes = simulation.routes_between(origins, rng.choice(entrances, num_vehicles))
+        routes = routes[routes >= 0]
+        simulation.add_vehicles(routes, rng.uniform(0, duration, len(routes)), EMERGENCY_SPEED_FACTOR)
+    else:
+        lines = simulation.add_routes([[network.name_index[stop] for stop in route['stops']] for route in transit_routes])
+        frequency = np.array([route['frequency'] for route in transit_routes], dtype=np.float64)
+        vehicle = np.arange(num_vehicles)
+        line = vehicle % len(lines)
+        # Lines with more vehicles than their frequency fits in the run leave more often
+        headway = np.minimum(frequency, duration / np.maximum(np.bincount(line, minlength=len(lines)), 1))
+        departures = (vehicle // len(lines)) * headway[line]
+        served = lines[line] >= 0
+        added = simulation.add_vehicles(lines[line][served], departures[served])
+        if feedback:
+            simulation.reroutable[added] = False
+    return simulation
 
 def simulation_framework():
     """Simulation Framework module."""
     st.header("Simulation Framework")
-    
+
     vehicle_type = st.selectbox("Vehicle Type", ["Emergency", "Transit"])
-    num_vehicles = st.number_input("Number of Vehicles", min_value=1, value=2)
-    
+    num_vehicles = st.number_input("Number of Vehicles", min_value=1, max_value=MAX_VEHICLES, value=1000)
+    time_of_day = st.selectbox("Time of Day", TIME_PERIODS, key="simulation_time")
+    duration = st.slider("Duration (minutes)", 10, 180, 60, key="simulation_duration")
+    tick_seconds = st.slider("Tick (seconds)", 10, 120, 30, key="simulation_tick")
+    feedback = st.checkbox("Congestion feedback (BPR link delays)", key="simulation_feedback",
+                           help="Link travel times follow the simulated vehicles instead of the time-of-day traffic data")
+    vehicle_scale, reroute_every = 1.0, 5.0
+    if feedback:
+        vehicle_scale = st.number_input("Vehicles per simulated vehicle", min_value=1.0, max_value=100.0, value=10.0)
+        reroute_every = st.slider("Reroute every (minutes)", 1, 30, 5, key="simulation_reroute")
+
     if st.button("Run Simulation"):
-        G = build_traffic_graph()
-        paths = []
-        for _ in range(num_vehicles):
-            start_id = name_to_id['Maadi']  # Example
-            target_id = name_to_id['El Salam Hospital'] if vehicle_type == "Emergency" else name_to_id['Downtown']
-            path_ids, _ = a_star(G, start_id, target_id, priority=(vehicle_type == "Emergency"))
-            paths.append([id_to_name[id] for id in path_ids])
-        
-        # PyDeck animation
-        data = []
-        for t in range(50):  # 50 time steps
-            for i, path in enumerate(paths):
-                frac = t / 50
-                idx = int(frac * (len(path) - 1))
-                if idx < len(path) - 1:
-                    start = path[idx]
-                    end = path[idx + 1]
-                    start_pos = all_nodes[all_nodes['Name'] == start][['X', 'Y']].iloc[0]
-                    end_pos = all_nodes[all_nodes['Name'] == end][['X', 'Y']].iloc[0]
-                    lon = start_pos['X'] + (end_pos['X'] - start_pos['X']) * (frac * (len(path) - 1) - idx)
-                    lat = start_pos['Y'] + (end_pos['Y'] - start_pos['Y']) * (frac * (len(path) - 1) - idx)
-                    data.append({"lon": lon, "lat": lat, "color": [255, 0, 0] if vehicle_type == "Emergency" else [0, 255, 0]})
-        
-        df = pd.DataFrame(data)
-        layer = pdk.Layer(
-            "ScatterplotLayer",
-            df,
-            get_position=["lon", "lat"],
-            get_color="color",
-            get_radius=100,
-            pickable=True
-        )
-        view_state = pdk.ViewState(latitude=30.0444, longitude=31.2357, zoom=11)
-        deck = pdk.Deck(layers=[layer], initial_view_state=view_state)
-        st.pydeck_chart(deck)
+        simulation = build_scenario(vehicle_type, int(num_vehicles), time_of_day, duration,
+                                    feedback=feedback, vehicle_scale=vehicle_scale, reroute_every=reroute_every)
+        ticks = int(duration * 60 / tick_seconds)
+        record = np.linspace(0, simulation.num_vehicles - 1, min(simulation.num_vehicles, MAX_RECORDED)).astype(np.int64)
+        started = time.perf_counter()
+        frames = simulation.run(ticks, tick_seconds / 60, record)
+        elapsed = time.perf_counter() - started
+        arrived = simulation.state == ARRIVED
+        st.session_state['simulation'] = {
+            'frames': frames,
+            'trips': frames.trips(),
+            'color': [255, 0, 0] if vehicle_type == "Emergency" else [0, 255, 0],
+            'vehicles': simulation.num_vehicles,
+            'arrived': int(arrived.sum()),
+            'trip_minutes': float((simulation.arrival[arrived] - simulation.depart[arrived]).mean()) if arrived.any() else 0.0,
+            'ticks_per_second': ticks / elapsed if elapsed else 0.0,
+            'feedback': (simulation.reroutes, float(np.max(simulation.flow / simulation.capacity))) if feedback else None,
+        }
+
+    result = st.session_state.get('simulation')
+    if result is None:
+        return
+    frames = result['frames']
+    st.write(f"**{result['vehicles']:,} vehicles**, {result['arrived']:,} arrived, "
+             f"average trip {result['trip_minutes']:.1f} minutes; simulated at {result['ticks_per_second']:.0f} ticks/s")
+    if result['feedback']:
+        reroutes, peak = result['feedback']
+        st.caption(f"{reroutes} reroutes; busiest link at {peak:.0%} of capacity when the run ended")
+    t = st.slider("Frame", 0, len(frames) - 1, len(frames) // 2, key="simulation_frame")
+    st.caption(f"t = {frames.times[t]:.1f} min; showing {len(frames.vehicles):,} vehicles")
+
+    # PyDeck animation from the recorded frame arrays
+    trips_layer = pdk.Layer(
+        "TripsLayer",
+        result['trips'],
+        get_path="path",
+        get_timestamps="timestamps",
+        get_color=result['color'],
+        current_time=float(frames.times[t]),
+        trail_length=5,
+        width_min_pixels=2
+    )
+    vehicles_layer = pdk.Layer(
+        "ScatterplotLayer",
+        frames.frame(t),
+        get_position=["lon", "lat"],
+        get_color=result['color'],
+        get_radius=100,
+        pickable=True
+    )
+    view_state = pdk.ViewState(latitude=30.0444, longitude=31.2357, zoom=11)
+    deck = pdk.Deck(layers=[trips_layer, vehicles_layer], initial_view_state=view_state)
+    st.pydeck_chart(deck)
 
 if __name__ == "__main__":
-    simulation_framework()
\ No newline at end of file
+    simulation_framework()
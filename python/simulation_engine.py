@@ -0,0 +1,517 @@
+import numpy as np
+import pandas as pd
+from algorithms import csr_dijkstra, reverse_csr_dijkstra, tree_path
+
+WAITING, MOVING, ARRIVED = 0, 1, 2
+BPR_ALPHA, BPR_BETA = 0.15, 4.0  # Bureau of Public Roads link delay constants
+NEWTON_STEPS = 6
+
+class SimulationFrames:
+    """
+    Recorded vehicle positions, one row per tick, ready for pydeck layers.
+
+    Attributes:
+        times (np.ndarray): Float64 simulation clock per frame, in minutes.
+        vehicles (np.ndarray): Int64 indices of the recorded vehicles.
+        x (np.ndarray): Float32 (T, M) longitude per frame and recorded vehicle.
+        y (np.ndarray): Float32 (T, M) latitude.
+        state (np.ndarray): Int8 (T, M) WAITING, MOVING or ARRIVED.
+    """
+
+    def __init__(self, times, vehicles, x, y, state):
+        self.times = times
+        self.vehicles = vehicles
+        self.x = x
+        self.y = y
+        self.state = state
+
+    def __len__(self):
+        return len(self.times)
+
+    def frame(self, t):
+        """
+        Positions of the vehicles on the road at one frame.
+
+        Args:
+            t (int): Frame number.
+
+        Returns:
+            pd.DataFrame: Columns ['vehicle', 'lon', 'lat'] for moving vehicles.
+        """
+        moving = self.state[t] == MOVING
+        return pd.DataFrame({'vehicle': self.vehicles[moving], 'lon': self.x[t, moving], 'lat': self.y[t, moving]})
+
+    def trips(self):
+        """
+        Vehicle trails for a pydeck TripsLayer.
+
+        Returns:
+            pd.DataFrame: Columns ['vehicle', 'path', 'timestamps'], one row per recorded
+                          vehicle that moved, with [lon, lat] points and clock minutes.
+        """
+        rows = []
+        for column, vehicle in enumerate(self.vehicles):
+            moving = np.flatnonzero(self.state[:, column] != WAITING)
+            if len(moving) < 2:
+                continue
+            path = np.stack([self.x[moving, column], self.y[moving, column]], axis=1)
+            rows.append((vehicle, path.tolist(), self.times[moving].tolist()))
+        return pd.DataFrame(rows, columns=['vehicle', 'path', 'timestamps'])
+
+class VehicleSimulation:
+    """
+    Moves many vehicles along their routes on a compiled RoadNetwork.
+
+    Routes are stored once as arc sequences and shared by every vehicle on
+    them. Vehicle state lives in NumPy arrays (route, leg along the route,
+    progress along the current arc, speed factor, departure) and a tick
+    advances all vehicles together: each pass of the inner loop moves every
+    vehicle with time left to the end of its current arc or as far as its
+    time allows, so the number of passes is the most arcs any vehicle
+    crosses in one tick, not the number of vehicles.
+
+    Attributes:
+        network (RoadNetwork): Network the vehicles drive on.
+        arc_minutes (np.ndarray): Float64 travel time per CSR arc at speed factor 1.
+        clock (float): Simulation time in minutes.
+    """
+
+    def __init__(self, network, arc_minutes, clock=0.0):
+        self.network = network
+        self.arc_minutes = np.asarray(arc_minutes, dtype=np.float64)
+        self.clock = float(clock)
+        self._route_lists = []
+        self._route_index = {}
+        self._routes = None
+        self.route = np.zeros(0, dtype=np.int64)
+        self.leg = np.zeros(0, dtype=np.int64)
+        self.progress = np.zeros(0, dtype=np.float64)
+        self.speed_factor = np.zeros(0, dtype=np.float64)
+        self.depart = np.zeros(0, dtype=np.float64)
+        self.arrival = np.zeros(0, dtype=np.float64)
+        self.state = np.zeros(0, dtype=np.int8)
+        self._best_arcs = None
+
+    @property
+    def num_vehicles(self):
+        return len(self.route)
+
+    def _arc_between(self, u, v):
+        # Fastest arc for each (u, v) pair, found by binary search over sorted pair codes
+        if self._best_arcs is None:
+            n = self.network.num_nodes
+            codes = self.network.sources.astype(np.int64) * n + self.network.targets
+            order = np.lexsort((self.arc_minutes, codes))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = codes[order][1:] != codes[order][:-1]
+            self._best_arcs = (codes[order][first], order[first])
+        codes, arcs = self._best_arcs
+        return arcs[np.searchsorted(codes, np.asarray(u, dtype=np.int64) * self.network.num_nodes + v)]
+
+    def _trees(self, origins):
+        weights = self.arc_minutes.tolist()
+        return {origin: csr_dijkstra(self.network, origin, weights)[1] for origin in origins}
+
+    def add_routes(self, waypoint_lists):
+        """
+        Registers routes through waypoints, joined by fastest paths.
+
+        Args:
+            waypoint_lists (list): Node index sequences, e.g. [origin, destination]
+                or the stops of a bus line.
+
+        Returns:
+            np.ndarray: Int64 route id per list, -1 where a leg is unreachable.
+                        Identical waypoint lists share one route.
+
+        Time Complexity: O(W * E log V) for W distinct leg origins, plus O(P) per route of P arcs.
+        """
+        trees = self._trees({w for waypoints in waypoint_lists for w in waypoints[:-1]})
+        ids = np.empty(len(waypoint_lists), dtype=np.int64)
+        for i, waypoints in enumerate(waypoint_lists):
+            key = tuple(waypoints)
+            if key not in self._route_index:
+                nodes = [waypoints[0]]
+                for a, b in zip(waypoints, waypoints[1:]):
+                    leg = tree_path(trees[a], b)
+                    if leg[0] != a:
+                        nodes = None
+                        break
+                    nodes.extend(leg[1:])
+                if nodes is None or len(nodes) < 2:
+                    self._route_index[key] = -1
+                else:
+                    self._route_index[key] = len(self._route_lists)
+                    self._route_lists.append(self._arc_between(nodes[:-1], nodes[1:]))
+                    self._routes = None
+            ids[i] = self._route_index[key]
+        return ids
+
+    def _paths_to(self, destinations, starts):
+        """
+        Fastest paths from starts to destinations, batched by destination.
+
+        One backward search per distinct destination gives every node its next
+        arc towards it, and the paths of all trips to that destination are then
+        walked together, one arc per pass.
+
+        Args:
+            destinations (np.ndarray): Destination node index per trip.
+            starts (np.ndarray): Start node index per trip.
+
+        Returns:
+            tuple: (offsets, arcs, reachable) with the arcs of trip i in
+                   ``arcs[offsets[i]:offsets[i + 1]]``; unreachable trips have none.
+
+        Time Complexity: O(D * E log V) for D distinct destinations, plus O(D * L) vectorized
+                         passes for paths of at most L arcs.
+        """
+        destinations = np.asarray(destinations, dtype=np.int64)
+        starts = np.asarray(starts, dtype=np.int64)
+        weights = self.arc_minutes.tolist()
+        order = np.argsort(destinations, kind='stable')
+        bounds = np.flatnonzero(np.r_[True, destinations[order][1:] != destinations[order][:-1], True])
+        reachable = np.ones(len(starts), dtype=bool)
+        owners, steps, arcs = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            target = int(destinations[order[lo]])
+            next_arc = np.asarray(reverse_csr_dijkstra(self.network, target, weights)[1], dtype=np.int64)
+            trips, node = order[lo:hi], starts[order[lo:hi]]
+            step = 0
+            while True:
+                on_way = node != target
+                trips, node = trips[on_way], node[on_way]
+                if not len(trips):
+                    break
+                arc = next_arc[node]
+                # Only starts cut off from the target lack a next arc, so they stop on the first pass
+                stuck = arc < 0
+                reachable[trips[stuck]] = False
+                trips, arc = trips[~stuck], arc[~stuck]
+                owners.append(trips)
+                steps.append(np.full(len(trips), step, dtype=np.int64))
+                arcs.append(arc)
+                node = self.network.targets[arc]
+                step += 1
+        owner, step, arc = np.concatenate(owners), np.concatenate(steps), np.concatenate(arcs)
+        offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owner, minlength=len(starts)), out=offsets[1:])
+        path_arcs = np.empty(offsets[-1], dtype=np.int64)
+        path_arcs[offsets[owner] + step] = arc
+        return offsets, path_arcs, reachable
+
+    def routes_between(self, origins, destinations):
+        """
+        Registers fastest routes for origin-destination pairs, once per distinct pair.
+
+        Searches run from each distinct origin, or backwards from each distinct
+        destination when there are fewer of those, as when many trips head
+        for a few hospitals or business districts.
+
+        Args:
+            origins (np.ndarray): Origin node index per trip.
+            destinations (np.ndarray): Destination node index per trip.
+
+        Returns:
+            np.ndarray: Int64 route id per trip, -1 where unreachable or origin equals destination.
+        """
+        pairs, inverse = np.unique(np.stack([origins, destinations], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        if len(np.unique(pairs[:, 1])) >= len(np.unique(pairs[:, 0])):
+            return self.add_routes(pairs.tolist())[inverse]
+        keys = [tuple(pair) for pair in pairs.tolist()]
+        missing = [i for i, key in enumerate(keys) if key not in self._route_index]
+        if missing:
+            offsets, arcs, reachable = self._paths_to(pairs[missing, 1], pairs[missing, 0])
+            for i, lo, hi, found in zip(missing, offsets[:-1].tolist(), offsets[1:].tolist(), reachable.tolist()):
+                if found and hi > lo:
+                    self._route_index[keys[i]] = len(self._route_lists)
+                    self._route_lists.append(arcs[lo:hi])
+                else:
+                    self._route_index[keys[i]] = -1
+            self._routes = None
+        return np.array([self._route_index[key] for key in keys], dtype=np.int64)[inverse]
+
+    def _compiled_routes(self):
+        if self._routes is None:
+            lengths = [len(arcs) for arcs in self._route_lists]
+            offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            arcs = np.concatenate(self._route_lists) if self._route_lists else np.zeros(0, dtype=np.int64)
+            self._routes = (offsets, arcs.astype(np.int64), np.asarray(lengths, dtype=np.int64))
+        return self._routes
+
+    def add_vehicles(self, routes, departures=0.0, speed_factor=1.0):
+        """
+        Adds vehicles that wait at their route's start until departure.
+
+        Args:
+            routes (np.ndarray): Route id per vehicle, from add_routes or routes_between.
+            departures (float or np.ndarray): Departure clock time in minutes.
+            speed_factor (float or np.ndarray): Speed relative to the arc travel times;
+                2.0 halves them, as priority mode does for emergency vehicles.
+
+        Returns:
+            np.ndarray: Indices of the new vehicles.
+
+        Raises:
+            ValueError: If a route id is -1 or unknown.
+        """
+        routes = np.asarray(routes, dtype=np.int64)
+        if len(routes) and (routes.min() < 0 or routes.max() >= len(self._route_lists)):
+            raise ValueError("vehicles need a registered, reachable route")
+        count = len(routes)
+        start = self.num_vehicles
+        self.route = np.concatenate([self.route, routes])
+        self.leg = np.concatenate([self.leg, np.zeros(count, dtype=np.int64)])
+        self.progress = np.concatenate([self.progress, np.zeros(count)])
+        self.speed_factor = np.concatenate([self.speed_factor, np.broadcast_to(np.asarray(speed_factor, dtype=np.float64), count)])
+        self.depart = np.concatenate([self.depart, np.broadcast_to(np.asarray(departures, dtype=np.float64), count)])
+        self.arrival = np.concatenate([self.arrival, np.full(count, np.inf)])
+        self.state = np.concatenate([self.state, np.full(count, WAITING, dtype=np.int8)])
+        return np.arange(start, self.num_vehicles)
+
+    def step(self, dt):
+        """
+        Advances the clock by dt minutes and moves every vehicle on the road.
+
+        Args:
+            dt (float): Tick length in minutes.
+
+        Time Complexity: O(K * N) vectorized work for N vehicles crossing at most K arcs in the tick.
+        """
+        offsets, route_arcs, lengths = self._compiled_routes()
+        end = self.clock + dt
+        starting = (self.state == WAITING) & (self.depart < end)
+        self.state[starting] = MOVING
+        active = np.flatnonzero(self.state == MOVING)
+        # Time left in this tick; vehicles departing mid-tick only get the part after departure
+        budget = end - np.maximum(self.depart[active], self.clock)
+        while len(active):
+            arcs = route_arcs[offsets[self.route[active]] + self.leg[active]]
+            arc_time = self.arc_minutes[arcs] / self.speed_factor[active]
+            needed = (1.0 - self.progress[active]) * arc_time
+            finishing = needed <= budget
+            staying = active[~finishing]
+            self.progress[staying] += budget[~finishing] / arc_time[~finishing]
+            done = active[finishing]
+            budget = budget[finishing] - needed[finishing]
+            self.leg[done] += 1
+            self.progress[done] = 0.0
+            arrived = self.leg[done] >= lengths[self.route[done]]
+            self.state[done[arrived]] = ARRIVED
+            self.arrival[done[arrived]] = end - budget[arrived]
+            active, budget = done[~arrived], budget[~arrived]
+        self.clock = end
+
+    def positions(self, vehicles=None):
+        """
+        Interpolates vehicle coordinates along their current arcs.
+
+        Waiting vehicles are placed at their route's start and arrived ones at its end.
+
+        Args:
+            vehicles (np.ndarray, optional): Vehicle indices; all by default.
+
+        Returns:
+            tuple: (x, y) float64 arrays.
+        """
+        vehicles = np.arange(self.num_vehicles) if vehicles is None else np.asarray(vehicles)
+        offsets, route_arcs, lengths = self._compiled_routes()
+        route = self.route[vehicles]
+        arrived = self.state[vehicles] == ARRIVED
+        leg = np.where(arrived, lengths[route] - 1, self.leg[vehicles])
+        arcs = route_arcs[offsets[route] + leg]
+        fraction = np.where(arrived, 1.0, self.progress[vehicles])
+        network = self.network
+        u, v = network.sources[arcs], network.targets[arcs]
+        return (network.x[u] + (network.x[v] - network.x[u]) * fraction,
+                network.y[u] + (network.y[v] - network.y[u]) * fraction)
+
+    def arc_counts(self):
+        """
+        Returns:
+            np.ndarray: Int64 number of moving vehicles on each CSR arc.
+        """
+        offsets, route_arcs, _ = self._compiled_routes()
+        moving = np.flatnonzero(self.state == MOVING)
+        arcs = route_arcs[offsets[self.route[moving]] + self.leg[moving]]
+        return np.bincount(arcs, minlength=self.network.num_arcs)
+
+    def run(self, ticks, dt, record=None):
+        """
+        Runs the simulation and records positions after every tick.
+
+        Args:
+            ticks (int): Number of ticks.
+            dt (float): Tick length in minutes.
+            record (np.ndarray, optional): Vehicle indices to record; all by default.
+                Recording a sample keeps the frames small enough to draw.
+
+        Returns:
+            SimulationFrames: Positions after each tick.
+
+        Time Complexity: O(ticks * K * N).
+        """
+        vehicles = np.arange(self.num_vehicles) if record is None else np.asarray(record)
+        times = np.empty(ticks)
+        x = np.empty((ticks, len(vehicles)), dtype=np.float32)
+        y = np.empty((ticks, len(vehicles)), dtype=np.float32)
+        state = np.empty((ticks, len(vehicles)), dtype=np.int8)
+        for t in range(ticks):
+            self.step(dt)
+            times[t] = self.clock
+            x[t], y[t] = self.positions(vehicles)
+            state[t] = self.state[vehicles]
+        return SimulationFrames(times, vehicles, x, y, state)
+
+class CongestedSimulation(VehicleSimulation):
+    """
+    VehicleSimulation whose link travel times respond to the vehicles on them.
+
+    After every tick each link's travel time is recomputed with the BPR
+    function t = t0 * (1 + alpha * (q / c) ** beta) from its free-flow time
+    t0, capacity c and flow q. The flow comes from the live occupancy N by
+    Little's law, q = 60 * N / t vehicles per hour, so the volume/capacity
+    ratio x of a loaded link solves x * (1 + alpha * x ** beta) = 60 * N / (c * t0).
+    The left side is increasing and convex, so a few vectorized Newton steps
+    from an upper bound converge to it. Every reroute_every minutes the
+    vehicles on the road, and those about to depart, switch to the fastest
+    route under the current link times.
+
+    Attributes:
+        free_flow (np.ndarray): Float64 free-flow travel time per CSR arc.
+        capacity (np.ndarray): Float64 capacity per CSR arc in vehicles per hour; inf for no limit.
+        vehicle_scale (float): Real vehicles each simulated vehicle stands for.
+        reroute_every (float): Minutes between reroutes; inf disables rerouting.
+        flow (np.ndarray): Float64 flow per CSR arc in vehicles per hour at the last update.
+        reroutable (np.ndarray): Bool per vehicle; transit vehicles keep their line.
+        reroutes (int): Reroutes done so far.
+    """
+
+    def __init__(self, network, free_flow, capacity, vehicle_scale=1.0, reroute_every=5.0,
+                 alpha=BPR_ALPHA, beta=BPR_BETA, clock=0.0):
+        super().__init__(network, free_flow, clock)
+        self.free_flow = self.arc_minutes.copy()
+        self.capacity = np.asarray(capacity, dtype=np.float64)
+        self.vehicle_scale = float(vehicle_scale)
+        self.reroute_every = float(reroute_every)
+        self.alpha = alpha
+        self.beta = beta
+        self.flow = np.zeros(network.num_arcs)
+        self.reroutable = np.zeros(0, dtype=bool)
+        self.reroutes = 0
+        self._next_reroute = self.clock + self.reroute_every
+
+    def add_vehicles(self, routes, departures=0.0, speed_factor=1.0, reroutable=True):
+        """
+        Adds vehicles as VehicleSimulation.add_vehicles does.
+
+        Args:
+            routes (np.ndarray): Route id per vehicle, from add_routes or routes_between.
+            departures (float or np.ndarray): Departure clock time in minutes.
+            speed_factor (float or np.ndarray): Speed relative to the arc travel times.
+            reroutable (bool or np.ndarray): False for vehicles that must keep their
+                route, such as buses serving their stops.
+
+        Returns:
+            np.ndarray: Indices of the new vehicles.
+        """
+        added = super().add_vehicles(routes, departures, speed_factor)
+        self.reroutable = np.concatenate([self.reroutable, np.broadcast_to(np.asarray(reroutable, dtype=bool), len(added))])
+        return added
+
+    def update_link_times(self):
+        """
+        Recomputes every link's travel time from its current occupancy.
+
+        Returns:
+            np.ndarray: The new arc_minutes.
+
+        Time Complexity: O(N + E) vectorized for N vehicles and E arcs.
+        """
+        occupancy = self.arc_counts() * self.vehicle_scale
+        loaded = np.flatnonzero((occupancy > 0) & (self.free_flow > 0) & (self.capacity > 0) & np.isfinite(self.capacity))
+        t0 = self.free_flow[loaded]
+        demand = 60.0 * occupancy[loaded] / (self.capacity[loaded] * t0)
+        # Both x <= demand and alpha * x ** (beta + 1) <= demand hold at the root, so start from the smaller bound
+        x = np.minimum(demand, (demand / self.alpha) ** (1.0 / (self.beta + 1.0)))
+        for _ in range(NEWTON_STEPS):
+            delay = self.alpha * x ** self.beta
+            x -= (x * (1.0 + delay) - demand) / (1.0 + (self.beta + 1.0) * delay)
+        self.arc_minutes = self.free_flow.copy()
+        self.arc_minutes[loaded] = t0 * (1.0 + self.alpha * x ** self.beta)
+        self.flow = np.zeros(self.network.num_arcs)
+        self.flow[loaded] = x * self.capacity[loaded]
+        self._best_arcs = None
+        return self.arc_minutes
+
+    def reroute(self):
+        """
+        Moves reroutable vehicles onto the fastest routes under the current link times.
+
+        Vehicles on the road finish their current arc and continue on the
+        fastest path from its end; waiting vehicles that depart before the
+        next reroute get a fresh route from their origin. Paths are found once
+        per distinct (destination, start) with _paths_to, so the searches are
+        batched by destination. Routes no vehicle uses any more are dropped,
+        and the waypoint memo of add_routes starts over.
+
+        Returns:
+            int: Number of vehicles rerouted.
+
+        Time Complexity: O(D * E log V) for D distinct destinations, plus O(N log N) vectorized
+                         grouping and path assembly for N vehicles.
+        """
+        offsets, route_arcs, _ = self._compiled_routes()
+        network = self.network
+        candidates = np.flatnonzero(self.reroutable & ((self.state == MOVING) |
+                                                       ((self.state == WAITING) & (self.depart < self.clock + self.reroute_every))))
+        route = self.route[candidates]
+        moving = self.state[candidates] == MOVING
+        current = route_arcs[offsets[route] + self.leg[candidates]]
+        start = np.where(moving, network.targets[current], network.sources[current])
+        destination = network.targets[route_arcs[offsets[route + 1] - 1]]
+        keep = moving | (start != destination)
+        vehicles = candidates[keep]
+        if not len(vehicles):
+            return 0
+        # Vehicles on the road keep their current arc in front of the new path
+        prefix = np.where(moving, current, -1)[keep]
+        trips, trip = np.unique(np.stack([destination[keep], start[keep], prefix], axis=1), axis=0, return_inverse=True)
+        path_offsets, path_arcs, _ = self._paths_to(trips[:, 0], trips[:, 1])
+        path_lengths = np.diff(path_offsets)
+        prefixed = trips[:, 2] >= 0
+        offsets = np.zeros(len(trips) + 1, dtype=np.int64)
+        np.cumsum(path_lengths + prefixed, out=offsets[1:])
+        arcs = np.empty(offsets[-1], dtype=np.int64)
+        arcs[offsets[:-1][prefixed]] = trips[prefixed, 2]
+        shift = np.repeat(offsets[:-1] + prefixed - path_offsets[:-1], path_lengths)
+        arcs[np.arange(len(path_arcs)) + shift] = path_arcs
+        # Keep only the routes still used by vehicles that were not rerouted
+        rest = np.ones(self.num_vehicles, dtype=bool)
+        rest[vehicles] = False
+        kept = np.unique(self.route[rest])
+        remap = np.full(len(self._route_lists), -1, dtype=np.int64)
+        remap[kept] = np.arange(len(kept))
+        self._route_lists = [self._route_lists[r] for r in kept.tolist()] + np.split(arcs, offsets[1:-1])
+        self.route[rest] = remap[self.route[rest]]
+        self.route[vehicles] = len(kept) + trip.ravel()
+        self.leg[vehicles] = 0
+        self._route_index = {}
+        self._routes = None
+        self.reroutes += 1
+        return len(vehicles)
+
+    def step(self, dt):
+        """
+        Reroutes when due, advances the clock by dt minutes and updates the link times.
+
+        Args:
+            dt (float): Tick length in minutes.
+        """
+        if self.clock >= self._next_reroute:
+            self.reroute()
+            self._next_reroute = self.clock + self.reroute_every
+        super().step(dt)
+        self.update_link_times()
@@ -0,0 +1,48 @@
+import importlib
+import logging
+import time
+
+# Set when app.py first imports this module; Streamlit reruns keep it, as they reuse sys.modules
+PROCESS_START = time.perf_counter()
+
+# Sidebar label to (module, render function); a page's module is imported on first use
+PAGES = {
+    "Urban Planning Optimization": ("urban_planning", "urban_planning_optimization"),
+    "Emergency Vehicle Routing": ("emergency_routing", "emergency_vehicle_routing"),
+    "Public Transit Optimization": ("public_transit", "public_transit_optimization"),
+}
+
+logger = logging.getLogger(__name__)
+_timings = {}
+
+def render_page(label):
+    """
+    Imports a page's module if needed and renders it, recording first-use timings.
+
+    The first render of each page records the module import time and the
+    render time. The first render of any page also records the cold start,
+    the time from process start to that render's end.
+
+    Args:
+        label (str): Page label, a key of PAGES.
+    """
+    module_name, function_name = PAGES[label]
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    imported = time.perf_counter()
+    getattr(module, function_name)()
+    finished = time.perf_counter()
+    if 'cold_start' not in _timings:
+        _timings['cold_start'] = finished - PROCESS_START
+        logger.info("Cold start: %.3f s", _timings['cold_start'])
+    if label not in _timings:
+        _timings[label] = (imported - started, finished - imported)
+        logger.info("First render of %s: import %.3f s, render %.3f s", label, imported - started, finished - imported)
+
+def startup_timings():
+    """
+    Returns:
+        dict: 'cold_start' in seconds (once a page has rendered), and per page
+              label an (import_seconds, first_render_seconds) tuple.
+    """
+    return dict(_timings)
@@ -0,0 +1,168 @@
+import math
+import networkx as nx
+import numpy as np
+import pandas as pd
+from congestion import TIME_PERIODS
+
+# Share of capacity used on an average road in each period
+PERIOD_UTILIZATION = {'Morning': 0.95, 'Afternoon': 0.55, 'Evening': 0.9, 'Night': 0.25}
+KM_PER_DEGREE = 111.0
+
+class SyntheticCity:
+    """
+    Randomly generated city in the same schema as data.py.
+
+    Attributes:
+        nodes (pd.DataFrame): Columns ['ID', 'Name', 'Type', 'X', 'Y', 'Population'], like all_nodes.
+        existing (pd.DataFrame): Columns ['FromID', 'ToID', 'Distance', 'Capacity', 'Condition',
+            'Maintenance_Cost'], like df_existing.
+        potential (pd.DataFrame): Columns ['FromID', 'ToID', 'Distance', 'Capacity', 'Cost'], like df_potential.
+        traffic (pd.DataFrame): Columns ['RoadName'] + TIME_PERIODS, like df_traffic.
+        transit_routes (list): Route dictionaries, like transit_routes.
+    """
+
+    def __init__(self, nodes, existing, potential, traffic, transit_routes):
+        self.nodes = nodes
+        self.existing = existing
+        self.potential = potential
+        self.traffic = traffic
+        self.transit_routes = transit_routes
+
+    @property
+    def name_to_id(self):
+        return dict(zip(self.nodes['Name'], self.nodes['ID']))
+
+    @property
+    def id_to_name(self):
+        return dict(zip(self.nodes['ID'], self.nodes['Name']))
+
+    def traffic_graph(self, graph_class=nx.Graph):
+        """
+        Builds the ID-keyed graph used by time_dependent_dijkstra, like build_traffic_graph.
+
+        Args:
+            graph_class (type): networkx graph class to instantiate.
+
+        Returns:
+            nx.Graph: Nodes keyed by ID with 'pos' and 'name'; edges with 'distance'.
+        """
+        graph = graph_class()
+        ids = self.nodes['ID'].tolist()
+        positions = zip(self.nodes['X'].tolist(), self.nodes['Y'].tolist())
+        graph.add_nodes_from((node, {'pos': pos, 'name': name})
+                             for node, pos, name in zip(ids, positions, self.nodes['Name'].tolist()))
+        graph.add_edges_from((u, v, {'distance': d}) for u, v, d in zip(
+            self.existing['FromID'].tolist(), self.existing['ToID'].tolist(), self.existing['Distance'].tolist()))
+        return graph
+
+    def emergency_graph(self, graph_class=nx.Graph):
+        """
+        Builds the name-keyed graph used by a_star, like G_emergency.
+
+        Args:
+            graph_class (type): networkx graph class to instantiate.
+
+        Returns:
+            nx.Graph: Nodes keyed by name with 'x'/'y'; edges with 'weight'.
+        """
+        graph = graph_class()
+        names = self.nodes['Name'].tolist()
+        graph.add_nodes_from((name, {'x': x, 'y': y})
+                             for name, x, y in zip(names, self.nodes['X'].tolist(), self.nodes['Y'].tolist()))
+        id_to_name = self.id_to_name
+        graph.add_edges_from((id_to_name[u], id_to_name[v], {'weight': d}) for u, v, d in zip(
+            self.existing['FromID'].tolist(), self.existing['ToID'].tolist(), self.existing['Distance'].tolist()))
+        return graph
+
+def _grid_edges(num_nodes, side, rng, drop=0.2, diagonals=0.05):
+    index = np.arange(num_nodes)
+    col = index % side
+    horizontal = index[(col < side - 1) & (index + 1 < num_nodes)]
+    vertical = index[index + side < num_nodes]
+    # Every row stays connected along its length and rows are linked through column 0,
+    # so dropping any of the other vertical streets keeps the city connected
+    optional = vertical[col[vertical] != 0]
+    vertical = np.concatenate([vertical[col[vertical] == 0], optional[rng.random(len(optional)) >= drop]])
+    diagonal = index[(col < side - 1) & (index + side + 1 < num_nodes)]
+    diagonal = diagonal[rng.random(len(diagonal)) < diagonals]
+    u = np.concatenate([horizontal, vertical, diagonal])
+    v = np.concatenate([horizontal + 1, vertical + side, diagonal + side + 1])
+    return u, v
+
+def generate_city(num_nodes, seed=0, spacing=0.01, num_lines=None, potential_share=0.05):
+    """
+    Generates a connected, city-like road network of a given size.
+
+    Intersections sit on a jittered grid around Cairo's coordinates with a
+    share of streets removed and a few diagonal shortcuts added. Every eighth
+    row and column is an arterial with higher capacity. Traffic volumes follow
+    capacity with a morning and evening peak, and transit lines run along
+    the arterials.
+
+    Args:
+        num_nodes (int): Number of intersections.
+        seed (int): Random seed.
+        spacing (float): Grid spacing in degrees (about 1.1 km at 0.01).
+        num_lines (int, optional): Number of transit lines; defaults to one per 2 arterials.
+        potential_share (float): Potential roads generated per existing road.
+
+    Returns:
+        SyntheticCity: Generated city.
+
+    Time Complexity: O(N) vectorized, plus O(N) Python string building for names.
+    """
+    rng = np.random.default_rng(seed)
+    side = max(2, math.ceil(math.sqrt(num_nodes)))
+    index = np.arange(num_nodes)
+    row, col = index // side, index % side
+    x = 31.0 + col * spacing + rng.normal(0, spacing / 5, num_nodes)
+    y = 29.8 + row * spacing + rng.normal(0, spacing / 5, num_nodes)
+    types = rng.choice(['Residential', 'Mixed', 'Business', 'Industrial'], num_nodes, p=[0.5, 0.3, 0.15, 0.05])
+    population = rng.lognormal(9.0, 1.0, num_nodes).astype(np.int64)
+    ids = index + 1
+    names = [f"N{i}" for i in ids.tolist()]
+    nodes = pd.DataFrame({'ID': ids, 'Name': names, 'Type': types, 'X': x, 'Y': y, 'Population': population})
+
+    u, v = _grid_edges(num_nodes, side, rng)
+    distance = np.round(np.hypot(x[u] - x[v], y[u] - y[v]) * KM_PER_DEGREE, 2)
+    arterial = (row[u] % 8 == 0) & (row[v] % 8 == 0) | (col[u] % 8 == 0) & (col[v] % 8 == 0)
+    capacity = np.where(arterial, rng.integers(3500, 4500, len(u)), rng.integers(1200, 2600, len(u)))
+    condition = rng.integers(4, 11, len(u))
+    existing = pd.DataFrame({
+        'FromID': ids[u], 'ToID': ids[v], 'Distance': distance, 'Capacity': capacity, 'Condition': condition,
+        'Maintenance_Cost': (10 - condition) * distance * 10,
+    })
+
+    road_names = [f"{names[a]}-{names[b]}" for a, b in zip(u.tolist(), v.tolist())]
+    traffic = pd.DataFrame({'RoadName': road_names})
+    for period in TIME_PERIODS:
+        utilization = rng.normal(PERIOD_UTILIZATION[period], 0.2, len(u)).clip(0.05, 2.5)
+        traffic[period] = (capacity * utilization).astype(np.int64)
+
+    count = max(1, int(len(u) * potential_share))
+    a = rng.integers(0, num_nodes, count)
+    b = np.clip(a + rng.integers(2, 6, count) * rng.choice([1, side], count), 0, num_nodes - 1)
+    keep = a != b
+    a, b = a[keep], b[keep]
+    potential_distance = np.round(np.hypot(x[a] - x[b], y[a] - y[b]) * KM_PER_DEGREE, 2)
+    potential = pd.DataFrame({
+        'FromID': ids[a], 'ToID': ids[b], 'Distance': potential_distance,
+        'Capacity': rng.integers(3000, 4500, len(a)), 'Cost': np.round(potential_distance * 20, 1),
+    })
+
+    arterial_rows = list(range(0, (num_nodes - 1) // side + 1, 8))
+    arterial_cols = list(range(0, side, 8))
+    lines = [('row', r) for r in arterial_rows] + [('col', c) for c in arterial_cols]
+    if num_lines is None:
+        num_lines = max(1, len(lines) // 2)
+    transit_routes = []
+    for route_id, pick in enumerate(rng.permutation(len(lines))[:num_lines], start=1):
+        kind, k = lines[pick]
+        members = index[row == k] if kind == 'row' else index[col == k]
+        stops = [names[i] for i in members[::4].tolist()]
+        metro = route_id % 3 == 1
+        transit_routes.append({
+            'route_id': route_id, 'type': 'Metro' if metro else 'Bus', 'stops': stops,
+            'frequency': 10 if metro else 15, 'capacity': 500 if metro else 60,
+        })
+    return SyntheticCity(nodes, existing, potential, traffic, transit_routes)
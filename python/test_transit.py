@@ -1,11 +1,45 @@
 import unittest
+import asyncio
+import datetime
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import pandas as pd
 import networkx as nx
+import numpy as np
 from algorithms import a_star, modified_kruskal, time_dependent_dijkstra, public_transport_dp, optimize_maintenance, greedy_maintenance, get_traffic_speed
-from emergency_routing import G_emergency
-from urban_planning import build_traffic_graph
+from algorithms import a_star_csr, time_dependent_dijkstra_csr, time_dependent_dijkstra_many, time_dependent_dijkstra_tree
+from algorithms import DisjointSet, find, route_populations, schedule_vehicles, csr_dijkstra, time_dependent_dijkstra_cached
+from emergency_routing import G_emergency, find_emergency_route, get_emergency_graph
+from urban_planning import base_map, build_traffic_graph, map_html, recommend_alternate_route
 from public_transit import create_station_mapping, create_routes, analyze_transfer_points
-from data import df_existing, df_potential, all_nodes, df_traffic, transit_routes, df_neighborhoods
+from data import df_existing, df_potential, all_nodes, df_traffic, transit_routes, df_neighborhoods, facilities
+from congestion import get_congestion_table, update_road_volumes
+from route_cache import RouteCache
+from network import DATA_DIR, RoadNetwork
+from contraction import ContractionHierarchy
+from travel_matrix import get_road_network, get_travel_matrix, compute_travel_matrix
+from closures import ClosureRouter, closed_road_pairs
+from profiles import PERIOD_HOURS, get_travel_time_profiles, profile_dijkstra
+from synthetic import generate_city
+from benchmark import run_benchmarks, compare
+from maintenance import BudgetCurve, maintenance_pareto_frontier
+from mst import IncrementalMST
+from scenarios import score_candidates, trip_weights
+from raptor import TransitTimetable, build_transit_timetable, load_transit_lines
+from assignment import TransitAssignmentGraph, assign_transit, load_od_matrix
+from datastore import SCHEMAS, get_table, load_table
+from startup import PAGES
+from compute_cache import ComputationCache, estimate_size, table_versions
+from batch_routing import read_queries, route_stream
+from routing_service import RoutingService
+from load_generator import fetch, make_requests, run_load
+from simulation_engine import ARRIVED, CongestedSimulation, VehicleSimulation
+from simulation import build_scenario
 
 class TestTransitSystem(unittest.TestCase):
     def setUp(self):
@@ -101,5 +135,586 @@ class TestTransitSystem(unittest.TestCase):
             self.assertIn(transfer['Hub'], transfer_hubs, "Transfer time for non-hub")
             self.assertGreater(transfer['Avg_Wait_Time'], 0, "Transfer time should be positive")
 
+    def test_congestion_table(self):
+        """Test congestion table factors match volume / capacity per direction."""
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        self.assertAlmostEqual(table.factor(1, 3, "Morning"), 2800 / 3000)
+        self.assertEqual(table.factor(3, 1, "Morning"), 1.0, "Reverse direction has no traffic record")
+        self.assertAlmostEqual(get_traffic_speed("Maadi-Downtown Cairo", "Night", self.name_to_id), 0.5)
+        self.assertAlmostEqual(get_traffic_speed("Maadi-Downtown Cairo", "Night", self.name_to_id, table), 0.5)
+        self.assertIs(get_congestion_table(df_traffic, df_existing, self.name_to_id), table, "Unchanged snapshot should reuse the table")
+
+    def test_road_network_variants(self):
+        """Test CSR variants of A* and Dijkstra match the networkx versions."""
+        emergency_network = RoadNetwork.from_graph(G_emergency)
+        for goal in ["El Salam Hospital", "Giza Central Hospital"]:
+            self.assertEqual(a_star_csr(emergency_network, "Downtown Cairo", goal, priority=True),
+                             a_star("Downtown Cairo", goal, G_emergency, priority=True))
+        traffic_network = RoadNetwork.from_graph(self.traffic_graph, weight='distance')
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        expected = time_dependent_dijkstra(self.traffic_graph, "Maadi", "Heliopolis", "Morning", df_traffic, df_existing, self.name_to_id, self.id_to_name)
+        actual = time_dependent_dijkstra_csr(traffic_network, "Maadi", "Heliopolis", "Morning", table)
+        self.assertAlmostEqual(actual[0], expected[0])
+        self.assertEqual(actual[1], expected[1])
+        csv_network = RoadNetwork.from_csv()
+        self.assertEqual(csv_network.num_nodes, 25, "Every node and facility should get a dense index")
+        self.assertEqual(csv_network.offsets[-1], csv_network.num_arcs)
+
+    def test_find_emergency_route(self):
+        """Test single-pass facility search returns the nearest facility of the requested type."""
+        for facility_type in [None, "hospital", "fire", "police"]:
+            candidates = [f['name'] for f in facilities.values() if facility_type is None or f['service'] == facility_type]
+            lengths = nx.single_source_dijkstra_path_length(G_emergency, "Heliopolis", weight="weight")
+            expected = min((lengths[name], name) for name in candidates if name in lengths)
+            path, facility = find_emergency_route("Heliopolis", facilities, G_emergency, facility_type=facility_type)
+            self.assertEqual(facility['name'], expected[1])
+            self.assertEqual(path[0], "Heliopolis")
+            self.assertEqual(path[-1], facility['name'])
+            self.assertAlmostEqual(sum(G_emergency[path[i]][path[i + 1]]['weight'] for i in range(len(path) - 1)), expected[0])
+
+    def test_contraction_hierarchy(self):
+        """Test CH queries match Dijkstra for every congestion profile."""
+        hierarchy = ContractionHierarchy.from_graph(self.traffic_graph)
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        metrics = hierarchy.customize_profiles(table)
+        self.assertEqual(set(metrics), {"Morning", "Afternoon", "Evening", "Night"})
+        for time_of_day, metric in metrics.items():
+            for start_name, end_name in [("Maadi", "Heliopolis"), ("Sheikh Zayed", "New Administrative Capital"), ("Giza", "Giza")]:
+                expected_time, _ = time_dependent_dijkstra(self.traffic_graph, start_name, end_name, time_of_day, df_traffic, df_existing, self.name_to_id, self.id_to_name)
+                actual_time, path = hierarchy.route(metric, start_name, end_name)
+                self.assertAlmostEqual(actual_time, expected_time)
+                self.assertEqual((path[0], path[-1]), (start_name, end_name))
+
+    def test_route_cache(self):
+        """Test LRU eviction, statistics and selective invalidation of cached routes."""
+        cache = RouteCache(maxsize=2)
+        cache.put(("Maadi", "Giza", "Morning", 1), (6.0, ["Maadi", "Giza"]))
+        cache.put(("Giza", "Dokki", "Morning", 1), (3.0, ["Giza", "Dokki"]))
+        self.assertEqual(cache.get(("Maadi", "Giza", "Morning", 1)), (6.0, ["Maadi", "Giza"]))
+        cache.put(("Dokki", "Giza", "Night", 1), (2.0, ["Dokki", "Giza"]))
+        self.assertNotIn(("Giza", "Dokki", "Morning", 1), cache, "Least recently used route should be evicted")
+        cache.on_traffic_update("Maadi-Giza", {"Morning": (0.8, 1.2)})
+        self.assertNotIn(("Maadi", "Giza", "Morning", 1), cache, "Route using a slower road should be dropped")
+        self.assertIn(("Dokki", "Giza", "Night", 1), cache, "Unrelated route should survive")
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['evictions'], stats['invalidations']), (1, 1, 1))
+        traffic = df_traffic.copy()
+        table = get_congestion_table(traffic, df_existing, self.name_to_id)
+        update_road_volumes(traffic, df_existing, self.name_to_id, "Maadi-Giza", {"Morning": 5000})
+        updated = get_congestion_table(traffic, df_existing, self.name_to_id)
+        self.assertIs(updated, table, "In-place update should patch the table instead of rebuilding it")
+        self.assertEqual(updated.snapshot, table.snapshot)
+        self.assertAlmostEqual(updated.factor(1, 8, "Morning"), 2.0)
+        # Callers holding the congestion table skip re-fingerprinting the frames on every lookup
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        expected = time_dependent_dijkstra(self.traffic_graph, "Maadi", "Downtown Cairo", "Morning", df_traffic, df_existing, self.name_to_id, self.id_to_name)
+        for _ in range(2):
+            cached = time_dependent_dijkstra_cached(self.traffic_graph, "Maadi", "Downtown Cairo", "Morning", df_traffic,
+                                                    df_existing, self.name_to_id, self.id_to_name, table=table)
+            self.assertEqual(cached, expected)
+
+    def test_travel_matrix(self):
+        """Test the all-pairs matrix matches single-pair searches, serially and in a process pool."""
+        network = get_road_network(all_nodes, df_existing)
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        matrix = get_travel_matrix(network, table, "Evening")
+        self.assertIs(get_travel_matrix(network, table, "Evening"), matrix, "Matrix should be cached per snapshot")
+        self.assertEqual(matrix.times.shape, (len(all_nodes), len(all_nodes)))
+        for start, end in [("Maadi", "Heliopolis"), ("6th October City", "Cairo University"), ("Giza", "Giza")]:
+            expected_time, expected_path = time_dependent_dijkstra(self.traffic_graph, start, end, "Evening", df_traffic, df_existing, self.name_to_id, self.id_to_name)
+            total_time, path = matrix.route(start, end)
+            self.assertAlmostEqual(total_time, expected_time)
+            self.assertEqual(path, expected_path)
+        pooled = compute_travel_matrix(network, table, "Evening", processes=2)
+        self.assertTrue((pooled.times == matrix.times).all())
+        self.assertTrue((pooled.predecessors == matrix.predecessors).all())
+
+    def test_time_dependent_dijkstra_many(self):
+        """Test one-to-many routing matches individual time-dependent searches."""
+        destinations = ["Heliopolis", "Giza", "Qasr El Aini Hospital", "Maadi"]
+        routes = time_dependent_dijkstra_many(self.traffic_graph, "Maadi", destinations, "Morning", df_traffic, df_existing, self.name_to_id, self.id_to_name)
+        self.assertEqual(set(routes), set(destinations))
+        for end in destinations:
+            expected = time_dependent_dijkstra(self.traffic_graph, "Maadi", end, "Morning", df_traffic, df_existing, self.name_to_id, self.id_to_name)
+            self.assertAlmostEqual(routes[end][0], expected[0])
+            self.assertEqual(routes[end][1], expected[1])
+        self.assertEqual(routes["Maadi"], (0, ["Maadi"]))
+        distances, came_from = time_dependent_dijkstra_tree(self.traffic_graph, "Maadi", "Morning", df_traffic, df_existing, self.name_to_id)
+        self.assertEqual(set(distances), nx.node_connected_component(self.traffic_graph, self.name_to_id["Maadi"]), "Full tree should reach every connected node")
+        self.assertEqual(len(came_from), len(distances) - 1)
+
+    def test_closure_router(self):
+        """Test closures are routed around without copying the graph and repairs match full searches."""
+        closed = ["Maadi-Downtown Cairo", "Maadi-Giza"]
+        expected = recommend_alternate_route(self.traffic_graph, "Maadi", "Zamalek", closed, "Morning", df_traffic, df_existing, self.name_to_id, self.id_to_name)
+        self.assertTrue(self.traffic_graph.has_edge(1, 3), "Closures must not modify the shared graph")
+        network = get_road_network(all_nodes, df_existing)
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        router = ClosureRouter(network, table, "Morning")
+        router.route("Maadi", "Zamalek")
+        total_time, path = router.route("Maadi", "Zamalek", closed_road_pairs(closed, self.name_to_id))
+        self.assertAlmostEqual(total_time, expected[0])
+        self.assertEqual(path, expected[1])
+        self.assertNotIn(("Maadi", "Giza"), list(zip(path, path[1:])))
+        reopened = router.route("Maadi", "Zamalek")
+        self.assertEqual(reopened, time_dependent_dijkstra(self.traffic_graph, "Maadi", "Zamalek", "Morning", df_traffic, df_existing, self.name_to_id, self.id_to_name))
+
+    def test_travel_time_profiles(self):
+        """Test per-hour profiles match period factors at anchor hours and stay FIFO."""
+        network = get_road_network(all_nodes, df_existing)
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        profiles = get_travel_time_profiles(network, table)
+        for period, hour in PERIOD_HOURS.items():
+            self.assertTrue(np.allclose(profiles.at(hour * 60), network.travel_times(table, period)))
+        for minute in range(0, 1440, 7):
+            self.assertTrue((profiles.at(minute + 1) + 1 >= profiles.at(minute) - 1e-9).all(), "Later departures must not arrive earlier")
+        morning_time, _ = profile_dijkstra(profiles, "Maadi", "Heliopolis", datetime.time(8, 0))
+        late_time, late_path = profile_dijkstra(profiles, "Maadi", "Heliopolis", datetime.time(9, 55))
+        self.assertLess(late_time, morning_time, "Traffic should ease after the morning peak")
+        self.assertEqual(late_path[0], "Maadi")
+        self.assertEqual(late_path[-1], "Heliopolis")
+
+    def test_synthetic_city_benchmark(self):
+        """Test the synthetic city matches the data.py schema and the harness flags regressions."""
+        city = generate_city(400, seed=1)
+        self.assertEqual(len(city.nodes), 400)
+        self.assertEqual(list(city.existing.columns), list(df_existing.columns))
+        self.assertEqual(list(city.traffic.columns), list(df_traffic.columns))
+        self.assertTrue(nx.is_connected(city.traffic_graph()), "Synthetic road network should be connected")
+        self.assertTrue(all(set(route) == set(transit_routes[0]) for route in city.transit_routes))
+        results = run_benchmarks([400], ['a_star', 'time_dependent_dijkstra'], queries=3, repeat=1)
+        self.assertGreater(results['400']['a_star']['nodes_expanded'], 0)
+        self.assertEqual(compare(results, results), [])
+        faster = {'400': {name: dict(m, seconds=m['seconds'] / 10) for name, m in results['400'].items()}}
+        self.assertEqual(len(compare(results, faster)), 2, "A 10x slowdown should be flagged for both algorithms")
+
+    def test_optimize_maintenance_exact(self):
+        """Test the knapsack DP finds the best subset of roads found by exhaustive search."""
+        roads = df_existing.head(12)
+        budget = 400
+        improvement, selected_roads = optimize_maintenance(roads, budget)
+        best = 0
+        for mask in range(1 << len(roads)):
+            chosen = [i for i in range(len(roads)) if mask >> i & 1]
+            if roads['Maintenance_Cost'].iloc[chosen].sum() <= budget:
+                best = max(best, (10 - roads['Condition'].iloc[chosen]).sum())
+        self.assertEqual(improvement, best)
+        chosen = roads[[(u, v) in selected_roads for u, v in zip(roads['FromID'], roads['ToID'])]]
+        self.assertEqual((10 - chosen['Condition']).sum(), improvement)
+        self.assertLessEqual(chosen['Maintenance_Cost'].sum(), budget)
+        self.assertEqual(optimize_maintenance(roads, budget, resolution=0.5)[0], best)
+
+    def test_maintenance_budget_curve(self):
+        """Test one DP pass answers every budget and the Pareto frontier has no dominated plans."""
+        curve = BudgetCurve(df_existing, 1000)
+        self.assertTrue((np.diff(curve.improvements) >= 0).all(), "More budget should never lower the benefit")
+        for budget in [0, 120, 500, 1000]:
+            self.assertEqual((curve.improvement(budget), curve.selected_roads(budget)), optimize_maintenance(df_existing, budget))
+        frontier = maintenance_pareto_frontier(df_existing, df_traffic, self.id_to_name, 1000)
+        plans = frontier.within(500)
+        self.assertEqual(plans[-1][1], curve.improvement(500), "Frontier should contain the best condition plan")
+        for cost, condition, traffic, roads in plans:
+            self.assertLessEqual(cost, 500)
+            self.assertFalse(any(c >= condition and t >= traffic and (c, t) != (condition, traffic)
+                                 for _, c, t, _ in plans), "Plan is dominated")
+
+    def test_kruskal_long_chain(self):
+        """Test union-find and Kruskal handle long chains without recursion and match the dict version."""
+        n = 20000
+        parent = {i: i + 1 for i in range(n)}
+        parent[n] = n
+        self.assertEqual(find(parent, 0), n)
+        self.assertEqual(parent[0], n, "Path should be compressed")
+        chain_nodes = pd.DataFrame({'ID': range(n)})
+        chain_edges = pd.DataFrame({'FromID': range(n - 1), 'ToID': range(1, n), 'Cost': [1.0] * (n - 1), 'Type': 'Existing'})
+        mst_edges, total_cost = modified_kruskal(chain_edges, chain_nodes, [(5, 6), (7, 9)])
+        # (7, 9) has no edge but is still joined, as before, so one chain edge is not needed
+        self.assertEqual(len(mst_edges), n - 2)
+        self.assertEqual(total_cost, n - 2)
+        self.assertIn((5, 6, 1.0), mst_edges)
+        dsu = DisjointSet(4)
+        self.assertTrue(dsu.union(0, 1))
+        self.assertFalse(dsu.union(1, 0))
+        self.assertEqual(dsu.components, 3)
+
+    def test_incremental_mst(self):
+        """Test incremental MST edits match a full modified_kruskal rebuild."""
+        existing_edges = df_existing[['FromID', 'ToID']].assign(Cost=df_existing['Maintenance_Cost'], Type='Existing')
+        potential_edges = df_potential[['FromID', 'ToID']].assign(Cost=df_potential['Cost'], Type='Potential')
+        all_edges = pd.concat([existing_edges, potential_edges], ignore_index=True)
+        mandatory_connections = [('F9', 3), ('F10', 1)]
+        mst = IncrementalMST(all_edges, all_nodes, mandatory_connections)
+        self.assertAlmostEqual(mst.mst_edges()[1], modified_kruskal(all_edges, all_nodes, mandatory_connections)[1])
+
+        def rebuilt():
+            ids = sorted(e for e in mst.edges if e >= 0)
+            edges = pd.DataFrame([mst.edges[e] for e in ids], columns=['FromID', 'ToID', 'Cost', 'Type'])
+            return modified_kruskal(edges, all_nodes, mandatory_connections)[1]
+
+        new_road = mst.insert_edge(1, 2, 1.0)
+        self.assertIn(new_road, mst.edge_ids(), "A very cheap road should enter the tree")
+        self.assertAlmostEqual(mst.mst_edges()[1], rebuilt())
+        mst.update_cost(new_road, 10000.0)
+        self.assertNotIn(new_road, mst.edge_ids())
+        self.assertAlmostEqual(mst.mst_edges()[1], rebuilt())
+        tree_potential = [e for e in mst.edge_ids() if e >= len(existing_edges)]
+        mst.set_excluded(tree_potential)
+        self.assertFalse(set(tree_potential) & set(mst.edge_ids()))
+        self.assertAlmostEqual(mst.mst_edges()[1], rebuilt())
+        mst.set_excluded([])
+        mst.delete_edge(new_road)
+        self.assertAlmostEqual(mst.mst_edges()[1], modified_kruskal(all_edges, all_nodes, mandatory_connections)[1])
+
+    def test_candidate_scoring(self):
+        """Test incremental candidate scoring matches a recomputed matrix and is the same in parallel."""
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        network = RoadNetwork.from_frames(all_nodes, df_existing)
+        matrix = compute_travel_matrix(network, table, "Morning")
+        weights = trip_weights(network, all_nodes)
+        ranking = score_candidates(matrix, df_potential, weights)
+        self.assertEqual(len(ranking), len(df_potential))
+        self.assertTrue((ranking['BenefitPerCost'].diff().dropna() <= 0).all(), "Ranking should be sorted")
+        best = ranking.iloc[0]
+        extended = pd.concat([df_existing, pd.DataFrame([{'FromID': best['FromID'], 'ToID': best['ToID'], 'Distance': best['Distance']}])])
+        updated = compute_travel_matrix(RoadNetwork.from_frames(all_nodes, extended), table, "Morning")
+        connected = np.isfinite(matrix.times)
+        expected = ((matrix.times[connected] - updated.times[connected]) * weights[connected]).sum()
+        self.assertAlmostEqual(best['TimeSaved'], expected, places=6)
+        parallel = score_candidates(matrix, df_potential, weights, processes=2)
+        pd.testing.assert_frame_equal(parallel.drop(columns='Seconds'), ranking.drop(columns='Seconds'))
+
+    def test_raptor_transit_router(self):
+        """Test RAPTOR journeys over the CSV and data.py lines are consistent across query modes."""
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        network = get_road_network(all_nodes, df_existing)
+        lines = load_transit_lines(self.name_to_id, transit_routes)
+        self.assertTrue({"B1", "B10", "M1", "M3", "R1"} <= {line["line_id"] for line in lines})
+        timetable = build_transit_timetable(network, get_travel_matrix(network, table, "Morning"), lines)
+        journeys = timetable.journeys("Maadi", "Shubra", datetime.time(8, 0))
+        self.assertTrue(journeys, "Maadi and Shubra share metro line 1")
+        self.assertEqual(journeys[0].transfers, 0)
+        self.assertEqual([j.transfers for j in journeys], sorted({j.transfers for j in journeys}))
+        self.assertEqual(journeys[-1].arrival, min(j.arrival for j in journeys))
+        for journey in journeys:
+            self.assertEqual(journey.legs[0][1], "Maadi")
+            self.assertEqual(journey.legs[-1][3], "Shubra")
+            self.assertGreaterEqual(journey.legs[0][2], 480)
+        arrivals = timetable.one_to_all("Maadi", 480)
+        self.assertAlmostEqual(arrivals["Shubra"][0], timetable.earliest_arrival("Maadi", "Shubra", 480).arrival)
+        profile = timetable.profile("Maadi", 420, 540)
+        for departure, arrival in profile["Shubra"]:
+            self.assertAlmostEqual(arrival, timetable.one_to_all("Maadi", departure)["Shubra"][0])
+        self.assertEqual(profile["Shubra"], sorted(profile["Shubra"]), "Later departures should arrive later")
+
+    def test_schedule_vehicles(self):
+        """Test the tabulated vehicle schedule on a small case and on more routes than the recursion limit allows."""
+        routes = [
+            {"route_id": 1, "type": "Bus", "stops": ["Maadi", "Giza"], "frequency": 4, "capacity": 400000},
+            {"route_id": 2, "type": "Bus", "stops": ["Nasr City"], "frequency": 2, "capacity": 600000},
+        ]
+        populations = route_populations(routes)
+        self.assertEqual(populations.tolist(), [800000.0, 500000.0])
+        coverage, schedule = schedule_vehicles(routes, 8, 3, populations)
+        # Route 1 needs 2 vehicles left per dispatch, so the best plan is 3 dispatches of route 2
+        self.assertAlmostEqual(coverage, 3 * 500000 / 2)
+        self.assertEqual(schedule, [(2, 0, 3)])
+        many = [{"route_id": i, "type": "Bus", "stops": ["Zamalek"], "frequency": 1, "capacity": 100000} for i in range(1500)]
+        coverage, schedule = schedule_vehicles(many, 6, 500)
+        self.assertAlmostEqual(coverage, 6 * 50000)
+        self.assertEqual(sum(vehicles for _, _, vehicles in schedule), 6)
+
+    def test_transit_assignment(self):
+        """Test OD assignment conserves demand and splits boardings by frequency under optimal strategies."""
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        network = get_road_network(all_nodes, df_existing)
+        timetable = build_transit_timetable(network, get_travel_matrix(network, table, "Morning"),
+                                            load_transit_lines(self.name_to_id, transit_routes))
+        graph = TransitAssignmentGraph(timetable)
+        od = load_od_matrix(network.index)
+        demand = od.total + od.unmatched
+        self.assertEqual(demand, 261000)
+        for strategies in (True, False):
+            result = assign_transit(graph, od, strategies)
+            self.assertAlmostEqual(result.assigned + result.unassigned, demand)
+            self.assertGreaterEqual(result.routes["Boardings"].sum(), result.assigned - 1e-6)
+            self.assertEqual(result.segments["Overcrowded"].tolist(),
+                             (result.segments["PeakLoad"] > result.segments["PeakCapacity"]).tolist())
+        # One trip: all of it alights at the destination, and all-or-nothing uses a single first line
+        origin, destination = network.index[self.name_to_id["Maadi"]], network.index[self.name_to_id["Shubra"]]
+        for strategies in (True, False):
+            volumes = np.zeros(graph.num_links)
+            assigned, unassigned, _ = graph.load(destination, np.array([origin]), np.array([100.0]), volumes, strategies)
+            self.assertEqual((assigned, unassigned), (100.0, 0.0))
+            self.assertAlmostEqual(volumes[graph.heads == destination].sum(), 100.0)
+            self.assertAlmostEqual(volumes[graph.tails == origin].sum(), 100.0)
+            if not strategies:
+                self.assertEqual(np.count_nonzero(volumes[graph.tails == origin]), 1)
+        # A line with a single trip has no frequency to wait on, so its demand stays unassigned
+        single = TransitAssignmentGraph(TransitTimetable(['a', 'b'], ['L'], [[0, 1]], [[0.0, 5.0]], [[300.0]]))
+        for strategies in (True, False):
+            volumes = np.zeros(single.num_links)
+            self.assertEqual(single.load(1, np.array([0]), np.array([10.0]), volumes, strategies), (0.0, 10.0, 0.0))
+            self.assertFalse(volumes.any())
+
+    def test_columnar_data_loader(self):
+        """Test CSV tables round-trip through the memory-mapped cache and reject unknown node IDs."""
+        with tempfile.TemporaryDirectory() as data_dir:
+            for name in SCHEMAS:
+                shutil.copy(os.path.join(DATA_DIR, f"{name}.csv"), data_dir)
+            roads = load_table("existing_roads", data_dir)
+            self.assertTrue(os.path.exists(os.path.join(data_dir, ".cache", "existing_roads", "distance.npy")))
+            cached = load_table("existing_roads", data_dir)
+            self.assertIsInstance(cached["distance"], np.memmap)
+            self.assertEqual(len(cached), len(df_existing))
+            frame = roads.frame()
+            self.assertEqual(frame["from"].tolist(), df_existing["FromID"].tolist())
+            self.assertEqual(frame["to"].tolist(), df_existing["ToID"].tolist())
+            self.assertEqual(frame["distance"].tolist(), df_existing["Distance"].tolist())
+            # Editing the CSV invalidates its cache
+            with open(os.path.join(data_dir, "potential_roads.csv"), "a") as f:
+                f.write("2,F3,11.0,3000,200\n")
+            self.assertEqual(len(get_table("potential_roads", data_dir)), len(df_potential) + 1)
+            # The transit loaders read the same validated tables
+            self.assertEqual(load_transit_lines(self.name_to_id, data_dir=data_dir), load_transit_lines(self.name_to_id))
+            network = get_road_network(all_nodes, df_existing)
+            self.assertEqual(load_od_matrix(network.index, data_dir).total, load_od_matrix(network.index).total)
+            with open(os.path.join(data_dir, "transit_demand.csv"), "a") as f:
+                f.write("3,F99,100\n")
+            with self.assertRaisesRegex(ValueError, "F99"):
+                load_table("transit_demand", data_dir)
+            with self.assertRaisesRegex(ValueError, "F99"):
+                load_od_matrix(network.index, data_dir)
+            with open(os.path.join(data_dir, "bus_routes.csv"), "a") as f:
+                f.write('B99,"1,F77",3,100\n')
+            with self.assertRaisesRegex(ValueError, "F77"):
+                load_transit_lines(self.name_to_id, data_dir=data_dir)
+
+    def test_lazy_page_loading(self):
+        """Test the app imports no page module up front and the emergency graph is built once, on first use."""
+        code = ("import sys, app, emergency_routing; "
+                "print(sorted(m for m in ('urban_planning', 'public_transit', 'pyvis', 'folium') if m in sys.modules)); "
+                "print('graph' in emergency_routing._graph_cache)")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.split("\n")
+        self.assertEqual(output[0], "['pyvis']", "Only the imported page's own dependencies should load")
+        self.assertEqual(output[1], "False")
+        self.assertIs(get_emergency_graph(), G_emergency)
+        self.assertEqual(set(PAGES), {"Urban Planning Optimization", "Emergency Vehicle Routing", "Public Transit Optimization"})
+
+    def test_computation_cache(self):
+        """Test cached values are reused, keyed on table versions, and evicted least recently used first."""
+        cache = ComputationCache(max_bytes=1000)
+        builds = []
+        def build(value):
+            builds.append(value)
+            return value
+        key = table_versions(existing=df_existing)['existing']
+        self.assertEqual(cache.get_or_build('graph', key, lambda: build(b'a' * 300), 300), b'a' * 300)
+        self.assertEqual(cache.get_or_build('graph', key, lambda: build(b'b' * 300), 300), b'a' * 300)
+        self.assertEqual((cache.hits, cache.misses, len(builds)), (1, 1, 1))
+        # A table edit changes its version, so the old entry is no longer found
+        edited = df_existing.copy()
+        edited.loc[0, 'Distance'] += 1
+        changed = table_versions(existing=edited)['existing']
+        self.assertNotEqual(changed, key)
+        cache.get_or_build('graph', changed, lambda: build(b'c' * 300), 300)
+        cache.get_or_build('figure', key, lambda: build(b'd' * 300), 300)
+        self.assertEqual(len(builds), 3)
+        # Touch the first entry, then shrink the budget: the least recently used ones go
+        cache.get_or_build('graph', key, lambda: build(None), 300)
+        cache.set_limit(600)
+        self.assertIn(('graph', key), cache)
+        self.assertIn(('figure', key), cache)
+        self.assertNotIn(('graph', changed), cache)
+        self.assertEqual((cache.nbytes, cache.evictions), (600, 1))
+        cache.evict('figure')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats()['bytes_by_kind'], {'graph': 300})
+        # Values larger than the budget are returned but not kept
+        cache.get_or_build('matrix', key, lambda: np.zeros(1000))
+        self.assertNotIn(('matrix', key), cache)
+        # Maps are cached as rendered HTML, so their real size counts against the budget
+        self.assertGreater(estimate_size(map_html(base_map())), 10000)
+
+    def test_batch_routing(self):
+        """Test batch queries of every type stream back in input order, from one or several workers."""
+        lines = [
+            '{"id": 1, "type": "road", "from": "Maadi", "to": "Zamalek", "time_of_day": "Evening"}',
+            '{"id": 2, "type": "emergency", "from": "Maadi", "facility_type": "hospital"}',
+            '{"id": 3, "type": "transit", "from": "Maadi", "to": "Zamalek", "departure": "08:15"}',
+            'not json',
+            '{"id": 5, "type": "road", "from": "Nowhere", "to": "Zamalek"}',
+            '{"id": 6, "type": "road", "from": "Maadi", "to": "Zamalek", "time_of_day": "Evening"}',
+            '{"id": 7, "type": "transit", "from": "Maadi", "to": "Shubra", "departure": [1]}',
+            '{"id": 8, "type": "emergency", "from": ["Maadi"]}',
+        ]
+        results = list(route_stream(read_queries(io.StringIO("\n".join(lines))), workers=1))
+        self.assertEqual([r['id'] for r in results], [1, 2, 3, "line 4", 5, 6, 7, 8])
+        matrix = get_travel_matrix(get_road_network(all_nodes, df_existing), get_congestion_table(df_traffic, df_existing, self.name_to_id), "Evening")
+        self.assertEqual((results[0]['minutes'], results[0]['path']), matrix.route("Maadi", "Zamalek"))
+        self.assertEqual(results[5]['path'], results[0]['path'])
+        self.assertEqual(results[1]['facility'], find_emergency_route("Maadi", facilities, G_emergency, facility_type="hospital")[1]['name'])
+        self.assertEqual(results[2]['legs'][0][0], "B1")
+        self.assertGreaterEqual(results[2]['departure'], 8 * 60 + 15)
+        self.assertIn("error", results[3])
+        self.assertIn("Nowhere", results[4]['error'])
+        self.assertIn("'departure'", results[6]['error'])
+        self.assertIn("'from'", results[7]['error'])
+        # CSV input through a process pool gives the same answers in the same order
+        rows = "id,type,from,to,time_of_day\n" + "".join(f"{i},road,Maadi,{name},Morning\n" for i, name in enumerate(["Zamalek", "Giza", "Dokki"] * 3))
+        pooled = list(route_stream(read_queries(io.StringIO(rows), "csv"), workers=2, chunk_size=2))
+        single = list(route_stream(read_queries(io.StringIO(rows), "csv"), workers=1))
+        self.assertEqual(pooled, single)
+        self.assertEqual([r['id'] for r in pooled], [str(i) for i in range(9)])
+
+    def test_routing_service(self):
+        """Test the HTTP service batches concurrent requests, answers like the direct searches and sheds load."""
+        async def scenario():
+            service = RoutingService(workers=0, batch_window=0.02)
+            await service.start(port=0)
+            connections = [await asyncio.open_connection("127.0.0.1", service.port) for _ in range(6)]
+            targets = ["Zamalek", "Giza", "Dokki", "Heliopolis", "Zamalek", "Nowhere"]
+            responses = await asyncio.gather(*(
+                fetch(reader, writer, "localhost", f"/route?from=Maadi&to={target}&time_of_day=Evening")
+                for (reader, writer), target in zip(connections, targets)))
+            reader, writer = connections[0]
+            emergency = await fetch(reader, writer, "localhost", "/emergency?from=Maadi&facility_type=hospital")
+            service.max_pending = 0
+            overloaded = await fetch(reader, writer, "localhost", "/route?from=Maadi&to=Giza")
+            # Malformed bodies get 400 and release their pending slots
+            service.max_pending = 3
+            malformed = [await fetch(reader, writer, "localhost", "/transit", body) for body in
+                         (b'{"from": ["Maadi"], "to": "Shubra"}', b'{"from": "Maadi", "to": "Shubra", "departure": {}}',
+                          b'{"from": "Maadi", "to": "Shubra", "priority": [1], "time_of_day": 5}', b'[1, 2]', b'{not json')]
+            after_malformed = await fetch(reader, writer, "localhost", "/route?from=Maadi&to=Giza")
+            bad_length = await asyncio.open_connection("127.0.0.1", service.port)
+            bad_length[1].write(b"POST /route HTTP/1.1\r\nContent-Length: lots\r\n\r\n")
+            bad_length_status = (await bad_length[0].readline()).split()[1]
+            bad_length[1].close()
+            service.max_pending = 100
+            report = await run_load(make_requests(40), port=service.port, concurrency=4)
+            stats = service.stats()
+            for _, writer in connections:
+                writer.close()
+            await service.close()
+            return responses, emergency, overloaded, malformed, after_malformed, bad_length_status, report, stats
+
+        responses, emergency, overloaded, malformed, after_malformed, bad_length_status, report, stats = asyncio.run(scenario())
+        network = get_road_network(all_nodes, df_existing)
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        for (status, payload), target in zip(responses[:5], ["Zamalek", "Giza", "Dokki", "Heliopolis", "Zamalek"]):
+            expected_time, expected_path = time_dependent_dijkstra_csr(network, "Maadi", target, "Evening", table)
+            self.assertEqual(status, 200 if expected_path else 404)
+            if expected_path:
+                self.assertAlmostEqual(payload['minutes'], expected_time)
+                self.assertEqual(payload['path'], expected_path)
+        self.assertEqual(responses[5][0], 400)
+        self.assertEqual(emergency[1]['facility'], find_emergency_route("Maadi", facilities, G_emergency, facility_type="hospital")[1]['name'])
+        self.assertEqual(overloaded[0], 503)
+        self.assertEqual([status for status, _ in malformed], [400] * 5)
+        self.assertEqual(after_malformed[0], 200)
+        self.assertEqual(bad_length_status, b"400")
+        self.assertEqual(stats['pending'], 0)
+        # The five valid road requests shared one search
+        self.assertLess(stats['batches'], stats['batched'])
+        self.assertEqual(report['requests'], 40)
+        self.assertTrue(set(report['statuses']) <= {200, 404})
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+        # Closing drops requests still queued behind a busy worker
+        async def closing():
+            service = RoutingService(workers=0, batch_window=0.01)
+            release = threading.Event()
+            busy = service.executor.submit(release.wait)
+            queued = asyncio.ensure_future(service.batcher.submit(*service.prepare("/route", {"from": "Maadi", "to": "Giza"})))
+            await asyncio.sleep(0.05)
+            threading.Timer(0.1, release.set).start()
+            await service.close()
+            return busy, (await asyncio.gather(queued, return_exceptions=True))[0]
+        busy, queued = asyncio.run(closing())
+        self.assertTrue(busy.result())
+        self.assertIsInstance(queued, asyncio.CancelledError)
+
+    def test_vehicle_simulation(self):
+        """Test vectorized vehicles arrive after their fastest-path travel time, whatever the tick length."""
+        network = get_road_network(all_nodes, df_existing)
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        matrix = get_travel_matrix(network, table, "Morning")
+        rng = np.random.default_rng(1)
+        origins, destinations = rng.integers(0, network.num_nodes, (2, 2000))
+        for dt in (0.25, 7.0):
+            simulation = VehicleSimulation(network, network.travel_times(table, "Morning"))
+            routes = simulation.routes_between(origins, destinations)
+            reachable = routes >= 0
+            np.testing.assert_array_equal(reachable, np.isfinite(matrix.times[origins, destinations]) & (origins != destinations))
+            departures = rng.uniform(0, 10, reachable.sum())
+            speed = np.where(np.arange(reachable.sum()) % 2, 2.0, 1.0)
+            simulation.add_vehicles(routes[reachable], departures, speed)
+            frames = simulation.run(int(150 / dt), dt, record=np.arange(50))
+            self.assertTrue((simulation.state == ARRIVED).all())
+            expected = matrix.times[origins[reachable], destinations[reachable]] / speed
+            np.testing.assert_allclose(simulation.arrival - departures, expected, atol=1e-9)
+            x, y = simulation.positions()
+            np.testing.assert_allclose(x, network.x[destinations[reachable]])
+            np.testing.assert_allclose(y, network.y[destinations[reachable]])
+        self.assertEqual(frames.x.shape, (int(150 / 7.0), 50))
+        self.assertEqual(list(frames.trips().columns), ['vehicle', 'path', 'timestamps'])
+        # Mid-arc positions lie between the arc's end nodes
+        simulation = VehicleSimulation(network, network.travel_times(table, "Morning"))
+        simulation.add_vehicles(simulation.routes_between(np.array([0]), np.array([2])))
+        simulation.step(0.5)
+        arc = simulation._compiled_routes()[1][simulation.leg[0]]
+        u, v = network.sources[arc], network.targets[arc]
+        x, _ = simulation.positions()
+        self.assertTrue(min(network.x[u], network.x[v]) <= x[0] <= max(network.x[u], network.x[v]))
+        self.assertEqual(simulation.arc_counts()[arc], 1)
+        scenario = build_scenario("Emergency", 300, "Evening", 30)
+        self.assertGreater(scenario.num_vehicles, 0)
+
+    def test_congested_simulation(self):
+        """Test BPR link times follow the vehicles on them and rerouted vehicles still reach their destinations."""
+        network = get_road_network(all_nodes, df_existing)
+        table = get_congestion_table(df_traffic, df_existing, self.name_to_id)
+        capacity = network.arc_capacities(table)
+        self.assertTrue(np.isfinite(capacity).all())
+        rng = np.random.default_rng(2)
+        on_road = np.flatnonzero(np.diff(network.offsets) > 0)
+        origins, destinations = rng.choice(on_road, 3000), rng.choice(on_road[:4], 3000)
+        # A single vehicle drives at free flow
+        simulation = CongestedSimulation(network, network.weights, capacity)
+        simulation.add_vehicles(simulation.routes_between(origins[:1], destinations[:1]))
+        simulation.run(200, 0.5, record=np.arange(1))
+        free_flow = csr_dijkstra(network, int(origins[0]), network.weights.tolist())[0][destinations[0]]
+        self.assertAlmostEqual(simulation.arrival[0], free_flow, delta=1e-4)
+        # A crowd towards four destinations slows its links down and gets rerouted
+        simulation = CongestedSimulation(network, network.weights, capacity, vehicle_scale=20, reroute_every=5)
+        routes = simulation.routes_between(origins, destinations)
+        served = routes >= 0
+        simulation.add_vehicles(routes[served], rng.uniform(0, 30, served.sum()))
+        for _ in range(100):
+            simulation.step(0.5)
+            occupancy = simulation.arc_counts() * 20.0
+            flow = 60 * occupancy / simulation.arc_minutes
+            np.testing.assert_allclose(simulation.arc_minutes, network.weights * (1 + 0.15 * (flow / capacity) ** 4), rtol=1e-6)
+        self.assertGreater((simulation.arc_minutes / network.weights).max(), 2.0)
+        self.assertGreater(simulation.reroutes, 0)
+        offsets, arcs, _ = simulation._compiled_routes()
+        np.testing.assert_array_equal(np.isin(np.arange(len(arcs) - 1), offsets[1:-1] - 1) |
+                                      (network.targets[arcs[:-1]] == network.sources[arcs[1:]]), True)
+        simulation.run(600, 0.5, record=np.arange(1))
+        self.assertTrue((simulation.state == ARRIVED).all())
+        x, y = simulation.positions()
+        np.testing.assert_allclose(x, network.x[destinations[served]])
+        np.testing.assert_allclose(y, network.y[destinations[served]])
+        # Buses keep their lines
+        scenario = build_scenario("Transit", 50, "Morning", 30, feedback=True, reroute_every=1)
+        before = [scenario._route_lists[r] for r in scenario.route]
+        scenario.run(20, 0.5, record=np.arange(1))
+        for route, arcs in zip(scenario.route, before):
+            np.testing.assert_array_equal(scenario._route_lists[route], arcs)
+        # Fewer buses than lines leaves the idle lines without a headway instead of dividing by zero
+        with np.errstate(divide='raise'):
+            scenario = build_scenario("Transit", 1, "Morning", 30)
+        self.assertEqual(len(scenario.route), 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
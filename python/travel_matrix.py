@@ -0,0 +1,152 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from algorithms import csr_dijkstra, tree_path
+from congestion import frame_fingerprint
+from network import RoadNetwork
+
+PARALLEL_MIN_NODES = 2000
+
+_matrix_cache = {}
+_network_cache = {}
+_worker = {}
+
+class TravelTimeMatrix:
+    """
+    All-pairs congested travel times for one time period and traffic snapshot.
+
+    Attributes:
+        network (RoadNetwork): Network the matrix was computed on.
+        time_of_day (str): Time period.
+        version (int): Congestion table version the matrix reflects.
+        times (np.ndarray): Float64 (N, N) travel times; inf where unreachable.
+        predecessors (np.ndarray): Int32 (N, N) predecessor of column node on the
+            shortest path from row node; -1 on the diagonal and for unreachable pairs.
+    """
+
+    def __init__(self, network, time_of_day, version, times, predecessors):
+        self.network = network
+        self.time_of_day = time_of_day
+        self.version = version
+        self.times = times
+        self.predecessors = predecessors
+
+    def time(self, start_name, end_name):
+        """
+        Looks up the travel time between two named nodes.
+
+        Args:
+            start_name (str): Starting node name.
+            end_name (str): Destination node name.
+
+        Returns:
+            float: Travel time, or inf if no path exists.
+
+        Time Complexity: O(1).
+        """
+        index = self.network.name_index
+        return float(self.times[index[start_name], index[end_name]])
+
+    def route(self, start_name, end_name):
+        """
+        Looks up a route in the same form as time_dependent_dijkstra.
+
+        Args:
+            start_name (str): Starting node name.
+            end_name (str): Destination node name.
+
+        Returns:
+            tuple: (total_time, path_names) or (inf, []) if no path exists.
+
+        Time Complexity: O(P) where P is the path length.
+        """
+        index = self.network.name_index
+        start, end = index[start_name], index[end_name]
+        total_time = float(self.times[start, end])
+        if total_time == math.inf:
+            return float('inf'), []
+        came_from = self.predecessors[start].tolist()
+        return total_time, [self.network.names[i] for i in tree_path(came_from, end)]
+
+def _init_worker(network, weights):
+    _worker['network'] = network
+    _worker['weights'] = weights
+
+def _solve_sources(sources):
+    network, weights = _worker['network'], _worker['weights']
+    return [csr_dijkstra(network, source, weights) for source in sources]
+
+def compute_travel_matrix(network, table, time_of_day, processes=None):
+    """
+    Runs a one-to-all search from every node and stacks the results.
+
+    Sources are split into chunks and solved across a process pool. Small
+    networks are solved in-process, where pool start-up would cost more than
+    the searches themselves.
+
+    Args:
+        network (RoadNetwork): Network compiled with 'distance' as base weight.
+        table (CongestionTable): Congestion table for the current traffic snapshot.
+        time_of_day (str): Time period.
+        processes (int, optional): Worker count; defaults to os.cpu_count() for
+            networks of PARALLEL_MIN_NODES nodes or more and 1 otherwise.
+
+    Returns:
+        TravelTimeMatrix: Times and predecessors for every node pair.
+
+    Time Complexity: O(V * E log V) total work, divided across processes.
+    """
+    n = network.num_nodes
+    weights = network.travel_time_list(table, time_of_day)
+    if processes is None:
+        processes = (os.cpu_count() or 1) if n >= PARALLEL_MIN_NODES else 1
+    if processes > 1:
+        chunk = max(1, math.ceil(n / (processes * 4)))
+        chunks = [range(lo, min(lo + chunk, n)) for lo in range(0, n, chunk)]
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(network, weights)) as pool:
+            results = [row for rows in pool.map(_solve_sources, chunks) for row in rows]
+    else:
+        results = [csr_dijkstra(network, source, weights) for source in range(n)]
+    times = np.array([distances for distances, _ in results], dtype=np.float64).reshape(n, n)
+    predecessors = np.array([came_from for _, came_from in results], dtype=np.int32).reshape(n, n)
+    return TravelTimeMatrix(network, time_of_day, table.version, times, predecessors)
+
+def get_travel_matrix(network, table, time_of_day, processes=None):
+    """
+    Returns the travel-time matrix for a time period, recomputing it only when
+    the congestion table has changed since it was last built.
+
+    Args:
+        network (RoadNetwork): Network compiled with 'distance' as base weight.
+        table (CongestionTable): Congestion table for the current traffic snapshot.
+        time_of_day (str): Time period.
+        processes (int, optional): Passed to compute_travel_matrix.
+
+    Returns:
+        TravelTimeMatrix: Cached or freshly computed matrix.
+    """
+    key = (id(network), time_of_day)
+    cached = _matrix_cache.get(key)
+    if cached is not None and cached.network is network and cached.version == table.version:
+        return cached
+    matrix = compute_travel_matrix(network, table, time_of_day, processes)
+    _matrix_cache[key] = matrix
+    return matrix
+
+def get_road_network(all_nodes, df_existing):
+    """
+    Returns the RoadNetwork for the existing roads, rebuilt only when the frames change.
+
+    Args:
+        all_nodes (pd.DataFrame): Nodes with columns ['ID', 'Name', 'X', 'Y'].
+        df_existing (pd.DataFrame): Existing roads with 'FromID', 'ToID' and 'Distance'.
+
+    Returns:
+        RoadNetwork: Network with road distance as base weight.
+    """
+    key = (frame_fingerprint(all_nodes), frame_fingerprint(df_existing))
+    if _network_cache.get('key') != key:
+        _network_cache['network'] = RoadNetwork.from_frames(all_nodes, df_existing)
+        _network_cache['key'] = key
+    return _network_cache['network']
@@ -1,13 +1,28 @@
 import streamlit as st
 import networkx as nx
 import heapq
-import matplotlib.pyplot as plt
 import folium
 import pandas as pd  # Added pandas import
-from streamlit_folium import folium_static
+import datetime
+import io
+import threading
+import streamlit.components.v1 as components
+from matplotlib.figure import Figure
 from data import df_neighborhoods, df_facilities, df_existing, df_potential, df_traffic, all_nodes
-from utils import  get_road_name
-from algorithms import get_traffic_speed,time_dependent_dijkstra,modified_kruskal,initialize_disjoint_set,find,union
+from algorithms import time_dependent_dijkstra,initialize_disjoint_set,find,union
+from congestion import get_congestion_table
+from travel_matrix import get_road_network, get_travel_matrix
+from closures import closed_road_pairs, get_closure_router
+from profiles import get_travel_time_profiles, profile_dijkstra
+from maintenance import get_budget_curve, get_pareto_frontier
+from mst import get_incremental_mst
+from scenarios import get_candidate_ranking
+from compute_cache import computation_cache, table_versions
+
+MANDATORY_CONNECTIONS = [('F9', 3), ('F10', 1)]
+MAP_WIDTH, MAP_HEIGHT = 700, 500
+
+_mst_lock = threading.Lock()
 
 def build_traffic_graph():
     G = nx.Graph()
@@ -19,30 +34,153 @@ def build_traffic_graph():
 
 
 def recommend_alternate_route(graph, start_name, end_name, closed_roads, time_of_day, df_traffic, df_existing, name_to_id, id_to_name):
-    temp_graph = graph.copy()
-    for road in closed_roads:
-        u, v = road.split('-')
-        u_id, v_id = name_to_id[u], name_to_id[v]
-        if temp_graph.has_edge(u_id, v_id):
-            temp_graph.remove_edge(u_id, v_id)
-    return time_dependent_dijkstra(temp_graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name)
+    closed_pairs = closed_road_pairs(closed_roads, name_to_id)
+    return time_dependent_dijkstra(graph, start_name, end_name, time_of_day, df_traffic, df_existing, name_to_id, id_to_name, closed_pairs)
 
-def urban_planning_optimization():
-    st.header("Cairo Urban Planning Optimization")
-    name_to_id = {row['Name']: row['ID'] for _, row in all_nodes.iterrows()}
-    id_to_name = {v: k for k, v in name_to_id.items()}
-    location_names = sorted(name_to_id.keys())
-    
-    # Create MST for the infrastructure network
+def build_all_edges(df_existing, df_potential):
+    """
+    Builds the MST edge list: existing roads priced at their maintenance cost, then potential roads.
+
+    Args:
+        df_existing (pd.DataFrame): Existing roads with 'Maintenance_Cost'.
+        df_potential (pd.DataFrame): Potential roads with 'Cost'.
+
+    Returns:
+        pd.DataFrame: Columns ['FromID', 'ToID', 'Cost', 'Type'].
+    """
     df_existing_edges = df_existing[['FromID', 'ToID']].copy()
     df_existing_edges['Cost'] = df_existing['Maintenance_Cost']
     df_existing_edges['Type'] = 'Existing'
     df_potential_edges = df_potential[['FromID', 'ToID']].copy()
     df_potential_edges['Cost'] = df_potential['Cost']
     df_potential_edges['Type'] = 'Potential'
-    all_edges = pd.concat([df_existing_edges, df_potential_edges])
-    mandatory_connections = [('F9', 3), ('F10', 1)]
-    mst_edges, total_cost = modified_kruskal(all_edges, all_nodes, mandatory_connections)
+    return pd.concat([df_existing_edges, df_potential_edges])
+
+def mst_for_exclusions(all_edges, excluded):
+    """
+    Computes the MST with some roads left out, using the shared IncrementalMST.
+
+    Args:
+        all_edges (pd.DataFrame): Output of build_all_edges.
+        excluded (frozenset): Edge IDs to leave out.
+
+    Returns:
+        tuple: (mst_edges, total_cost) as from IncrementalMST.mst_edges.
+    """
+    # The tree is updated in place, so sessions take turns
+    with _mst_lock:
+        mst = get_incremental_mst(all_edges, all_nodes, MANDATORY_CONNECTIONS)
+        mst.set_excluded(excluded)
+        return mst.mst_edges()
+
+def figure_png(draw):
+    """
+    Draws a figure off the pyplot state machine and returns it as PNG bytes.
+
+    Args:
+        draw (callable): Function drawing on a matplotlib Axes.
+
+    Returns:
+        bytes: PNG image.
+    """
+    fig = Figure(figsize=(12, 10))
+    ax = fig.add_subplot()
+    draw(ax)
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.grid(True)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+def base_map(road_edges=(), potential_pairs=frozenset(), tooltip="Cost: {} million EGP", weight=3):
+    """
+    Builds the folium map of neighborhoods, facilities and a set of roads.
+
+    Args:
+        road_edges (iterable): (u, v, value) roads to draw.
+        potential_pairs (frozenset): (u, v) pairs drawn red as new construction; others are green.
+        tooltip (str): Road tooltip format, filled with value.
+        weight (int): Road line width.
+
+    Returns:
+        folium.Map: Map ready for map_html.
+    """
+    cairo_map = folium.Map(location=[30.0444, 31.2357], zoom_start=11)
+    for _, row in df_neighborhoods.iterrows():
+        folium.CircleMarker(
+            location=[row['Y'], row['X']],
+            radius=6,
+            color='blue',
+            fill=True,
+            fill_color='blue',
+            popup=f"{row['Name']} (Population: {row['Population']})"
+        ).add_to(cairo_map)
+    for _, row in df_facilities.iterrows():
+        folium.Marker(
+            location=[row['Y'], row['X']],
+            popup=row['Name'],
+            icon=folium.Icon(color='red', icon='info-sign')
+        ).add_to(cairo_map)
+    coords = {node: (y, x) for node, y, x in zip(all_nodes['ID'], all_nodes['Y'], all_nodes['X'])}
+    for u, v, value in road_edges:
+        if u in coords and v in coords:
+            folium.PolyLine(
+                locations=[coords[u], coords[v]],
+                color='red' if (u, v) in potential_pairs else 'green',
+                weight=weight,
+                tooltip=tooltip.format(value)
+            ).add_to(cairo_map)
+    return cairo_map
+
+def map_html(folium_map):
+    """
+    Renders a folium map to a standalone HTML page.
+
+    The page is what gets cached, so the cache's memory estimate sees its
+    real size instead of the few bytes of the Map object.
+
+    Args:
+        folium_map (folium.Map): Map to render.
+
+    Returns:
+        str: HTML for st.components.v1.html.
+    """
+    return folium.Figure().add_child(folium_map).render()
+
+def show_map(html):
+    components.html(html, width=MAP_WIDTH, height=MAP_HEIGHT + 10)
+
+def _apply_cache_limit():
+    computation_cache.set_limit(st.session_state['cache_limit_mb'] * 2**20)
+
+def show_cache_controls():
+    stats = computation_cache.stats()
+    # The limit is process-wide: sessions start from it and only an edit in the widget changes it
+    if 'cache_limit_mb' not in st.session_state:
+        st.session_state['cache_limit_mb'] = int(stats['max_bytes'] // 2**20)
+    with st.sidebar.expander("Computation cache"):
+        st.write(f"{stats['entries']} entries, {stats['bytes'] / 2**20:.1f} of {stats['max_bytes'] / 2**20:.0f} MB; "
+                 f"hit rate {stats['hit_rate']:.0%}, {stats['evictions']} evictions")
+        st.number_input("Memory limit (MB)", 16, 16384, step=16, key="cache_limit_mb", on_change=_apply_cache_limit)
+        if st.button("Clear cache", key="cache_clear"):
+            computation_cache.evict()
+
+def urban_planning_optimization():
+    st.header("Cairo Urban Planning Optimization")
+    # Everything derived from the source tables is shared across reruns and sessions,
+    # keyed on the versions of the tables it was built from
+    versions = table_versions(nodes=all_nodes, existing=df_existing, potential=df_potential, traffic=df_traffic)
+    nodes_key = versions['nodes']
+    roads_key = (versions['nodes'], versions['existing'])
+    plan_key = (versions['nodes'], versions['existing'], versions['potential'])
+    name_to_id = computation_cache.get_or_build('name_to_id', nodes_key, lambda: dict(zip(all_nodes['Name'], all_nodes['ID'])))
+    id_to_name = computation_cache.get_or_build('id_to_name', nodes_key, lambda: {v: k for k, v in name_to_id.items()})
+    location_names = sorted(name_to_id.keys())
+    
+    # Create MST for the infrastructure network
+    all_edges = computation_cache.get_or_build('all_edges', plan_key, lambda: build_all_edges(df_existing, df_potential))
+    show_cache_controls()
     
     st.subheader(" Infrastructure Network Design")
     
@@ -54,66 +192,33 @@ def urban_planning_optimization():
     )
     
     if algorithm == "Infrastructure Network Design":
+        # Potential roads follow the existing ones in all_edges, so their edge IDs start at len(df_existing)
+        potential_ids = {f"{id_to_name.get(u, u)}-{id_to_name.get(v, v)}": len(df_existing) + i
+                         for i, (u, v) in enumerate(zip(df_potential['FromID'], df_potential['ToID']))}
+        left_out = st.multiselect("What-if: leave out potential roads", list(potential_ids), key="mst_excluded")
+        excluded = frozenset(potential_ids[road] for road in left_out)
+        mst_key = plan_key + (excluded,)
+        mst_edges, total_cost = computation_cache.get_or_build('mst', mst_key, lambda: mst_for_exclusions(all_edges, excluded))
 
-        cairo_map = folium.Map(location=[30.0444, 31.2357], zoom_start=11)
-    
-    # Add neighborhoods
-        for _, row in df_neighborhoods.iterrows():
-            folium.CircleMarker(
-                location=[row['Y'], row['X']],
-                radius=6,
-                color='blue',
-                fill=True,
-                fill_color='blue',
-                popup=f"{row['Name']} (Population: {row['Population']})"
-            ).add_to(cairo_map)
-    
-    # Add facilities
-        for _, row in df_facilities.iterrows():
-            folium.Marker(
-                location=[row['Y'], row['X']],
-                popup=row['Name'],
-                icon=folium.Icon(color='red', icon='info-sign')
-            ).add_to(cairo_map)
-    
-    # Add MST edges instead of all existing edges
-        for u, v, cost in mst_edges:
-            from_coord = all_nodes[all_nodes['ID'] == u][['Y', 'X']].values
-            to_coord = all_nodes[all_nodes['ID'] == v][['Y', 'X']].values
-            if len(from_coord) > 0 and len(to_coord) > 0:
-                folium.PolyLine(
-                    locations=[from_coord[0], to_coord[0]],
-                    color='red' if (u, v) in [(row['FromID'], row['ToID']) for _, row in df_potential.iterrows()] else 'green',
-                    weight=3,
-                    tooltip=f"Cost: {cost} million EGP"
-                ).add_to(cairo_map)
-    
-        folium_static(cairo_map)
+        # Add MST edges instead of all existing edges
+        potential_pairs = frozenset(zip(df_potential['FromID'], df_potential['ToID']))
+        show_map(computation_cache.get_or_build('mst_map', mst_key, lambda: map_html(base_map(mst_edges, potential_pairs))))
         st.subheader("Optimal Road Network")
-        fig, ax = plt.subplots(figsize=(12, 10))
-        G = nx.Graph()
-        for _, row in all_nodes.iterrows():
-            G.add_node(row['ID'], pos=(row['X'], row['Y']))
-        for _, row in df_existing.iterrows():
-            G.add_edge(row['FromID'], row['ToID'])
-        for _, row in df_potential.iterrows():
-            G.add_edge(row['FromID'], row['ToID'])
-        pos = nx.get_node_attributes(G, 'pos')
-        mst_graph = nx.Graph()
-        for u, v, cost in mst_edges:
-            mst_graph.add_edge(u, v)
-        nx.draw_networkx_edges(G, pos, edge_color='lightgray', width=0.5, alpha=0.3, ax=ax)
-        nx.draw_networkx_edges(mst_graph, pos, edge_color='red', width=2, ax=ax)
-        node_sizes = [row['Population']/5000 for _, row in all_nodes.iterrows()]
-        nx.draw_networkx_nodes(G, pos, node_size=node_sizes, node_color='skyblue', ax=ax)
-        important_nodes = all_nodes[(all_nodes['Population'] > 200000) | (all_nodes['Type'].isin(['Medical', 'Airport']))]
-        labels = {row['ID']: row['Name'] for _, row in important_nodes.iterrows()}
-        nx.draw_networkx_labels(G, pos, labels, font_size=8, ax=ax)
-        plt.title("Optimal Road Network (Minimum Spanning Tree)")
-        plt.xlabel("Longitude")
-        plt.ylabel("Latitude")
-        plt.grid(True)
-        st.pyplot(fig)
+
+        def draw_network(ax):
+            G = nx.Graph([*zip(df_existing['FromID'], df_existing['ToID']), *zip(df_potential['FromID'], df_potential['ToID'])])
+            pos = dict(zip(all_nodes['ID'], zip(all_nodes['X'], all_nodes['Y'])))
+            mst_graph = nx.Graph([(u, v) for u, v, _ in mst_edges])
+            nx.draw_networkx_edges(G, pos, edge_color='lightgray', width=0.5, alpha=0.3, ax=ax)
+            nx.draw_networkx_edges(mst_graph, pos, edge_color='red', width=2, ax=ax)
+            nodes = all_nodes['ID'].tolist()
+            nx.draw_networkx_nodes(G, pos, nodelist=nodes, node_size=(all_nodes['Population'] / 5000).tolist(), node_color='skyblue', ax=ax)
+            important_nodes = all_nodes[(all_nodes['Population'] > 200000) | (all_nodes['Type'].isin(['Medical', 'Airport']))]
+            labels = dict(zip(important_nodes['ID'], important_nodes['Name']))
+            nx.draw_networkx_labels(G, pos, labels, font_size=8, ax=ax)
+            ax.set_title("Optimal Road Network (Minimum Spanning Tree)")
+
+        st.image(computation_cache.get_or_build('mst_figure', mst_key, lambda: figure_png(draw_network)))
         
         st.subheader("Cost Analysis")
         mst_df = pd.DataFrame(mst_edges, columns=['FromID', 'ToID', 'Cost'])
@@ -124,40 +229,25 @@ def urban_planning_optimization():
         st.write(f"**Total Network Cost:** {total_cost:,.2f} million EGP")
         st.write(f"**Existing Roads Used:** {existing_km} segments")
         st.write(f"**New Roads Constructed:** {new_km} segments")
+
+        st.subheader("Candidate Road Benefits")
+        congestion_table = get_congestion_table(df_traffic, df_existing, name_to_id)
+        road_network = get_road_network(all_nodes, df_existing)
+        ranking = get_candidate_ranking(get_travel_matrix(road_network, congestion_table, "Morning"), df_potential, all_nodes)
+        st.write("Morning peak travel time saved, weighted by trips between neighborhoods, per million EGP of construction cost.")
+        st.dataframe(pd.DataFrame({
+            'Road': [f"{id_to_name.get(u, u)} - {id_to_name.get(v, v)}" for u, v in zip(ranking['FromID'], ranking['ToID'])],
+            'Cost (million EGP)': ranking['Cost'],
+            'Person-minutes Saved': ranking['TimeSaved'].round(0),
+            'Saved per Million EGP': ranking['BenefitPerCost'].round(1),
+        }))
     
     elif algorithm == "Traffic Flow Optimization":
 
 
         # Visualize the route on a new Folium map
-        cairo_map = folium.Map(location=[30.0444, 31.2357], zoom_start=11)
-        for _, row in df_neighborhoods.iterrows():
-            folium.CircleMarker(
-                location=[row['Y'], row['X']],
-                radius=6,
-                color='blue',
-                fill=True,
-                fill_color='blue',
-                popup=f"{row['Name']} (Population: {row['Population']})"
-            ).add_to(cairo_map)
-        for _, row in df_facilities.iterrows():
-            folium.Marker(
-                location=[row['Y'], row['X']],
-                popup=row['Name'],
-                icon=folium.Icon(color='red', icon='info-sign')
-            ).add_to(cairo_map)
-        for _, row in df_existing.iterrows():
-            from_id = row['FromID']
-            to_id = row['ToID']
-            from_coord = all_nodes[all_nodes['ID'] == from_id][['Y', 'X']].values
-            to_coord = all_nodes[all_nodes['ID'] == to_id][['Y', 'X']].values
-            if len(from_coord) > 0 and len(to_coord) > 0:
-                folium.PolyLine(
-                    locations=[from_coord[0], to_coord[0]],
-                    color='green',
-                    weight=2,
-                    tooltip=f"Distance: {row['Distance']} km"
-                ).add_to(cairo_map)
-        folium_static(cairo_map)
+        show_map(computation_cache.get_or_build('road_map', roads_key, lambda: map_html(base_map(
+            zip(df_existing['FromID'], df_existing['ToID'], df_existing['Distance']), tooltip="Distance: {} km", weight=2))))
 
         st.subheader("Traffic Flow Optimization")
         col1, col2, col3 = st.columns(3)
@@ -168,17 +258,25 @@ def urban_planning_optimization():
         with col3:
             time_of_day = st.selectbox("Time of Day", ["Morning", "Afternoon", "Evening", "Night"], key="traffic_time")
         closed_roads = st.multiselect("Select roads to close", df_traffic['RoadName'].unique(), key="traffic_roads")
-        traffic_graph = build_traffic_graph()
+        departure = st.time_input("Departure Time", datetime.time(8, 0), key="traffic_departure")
+        traffic_graph = computation_cache.get_or_build('traffic_graph', roads_key, build_traffic_graph)
         
         if start_location and end_location and start_location != end_location:
-            normal_time, normal_path = time_dependent_dijkstra(traffic_graph, start_location, end_location, time_of_day, df_traffic, df_existing, name_to_id, id_to_name)
+            congestion_table = get_congestion_table(df_traffic, df_existing, name_to_id)
+            road_network = get_road_network(all_nodes, df_existing)
+            travel_matrix = get_travel_matrix(road_network, congestion_table, time_of_day)
+            normal_time, normal_path = travel_matrix.route(start_location, end_location)
             if closed_roads:
-                alt_time, alt_path = recommend_alternate_route(traffic_graph, start_location, end_location, closed_roads, time_of_day, df_traffic, df_existing, name_to_id, id_to_name)
+                closure_router = get_closure_router(road_network, congestion_table, time_of_day)
+                alt_time, alt_path = closure_router.route(start_location, end_location, closed_road_pairs(closed_roads, name_to_id))
             
             st.subheader("Routing Results")
             if not closed_roads:
                 st.write(f"**Optimal Route:** {' → '.join(normal_path)}")
                 st.write(f"**Estimated Travel Time:** {normal_time:.1f} minutes")
+                profile_time, profile_path = profile_dijkstra(get_travel_time_profiles(road_network, congestion_table), start_location, end_location, departure)
+                if profile_path:
+                    st.write(f"**Leaving at {departure.strftime('%H:%M')}:** {profile_time:.1f} minutes via {' → '.join(profile_path)}")
             else:
                 col1, col2 = st.columns(2)
                 with col1:
@@ -191,77 +289,55 @@ def urban_planning_optimization():
                     st.write(f"Time: {alt_time:.1f} minutes")
             
             st.subheader("Traffic Network Visualization")
-            fig, ax = plt.subplots(figsize=(12, 10))
-            pos = nx.get_node_attributes(traffic_graph, 'pos')
-            for u, v in traffic_graph.edges():
-                road_name = get_road_name(u, v, id_to_name)
-                congestion = get_traffic_speed(road_name, time_of_day,name_to_id)
-                color = 'red' if congestion > 1.5 else 'orange' if congestion > 1.2 else 'green'
-                nx.draw_networkx_edges(traffic_graph, pos, edgelist=[(u, v)], edge_color=color, width=1.5, ax=ax)
-            route_edges = [(name_to_id[normal_path[i]], name_to_id[normal_path[i+1]]) for i in range(len(normal_path)-1)]
-            nx.draw_networkx_edges(traffic_graph, pos, edgelist=route_edges, edge_color='blue', width=3, ax=ax)
-            nx.draw_networkx_nodes(traffic_graph, pos, node_size=200, node_color='lightblue', ax=ax)
-            labels = {name_to_id[start_location]: start_location, name_to_id[end_location]: end_location}
-            nx.draw_networkx_labels(traffic_graph, pos, labels, font_size=10, font_weight='bold', ax=ax)
-            plt.title(f"Traffic Conditions ({time_of_day})")
-            plt.xlabel("Longitude")
-            plt.ylabel("Latitude")
-            plt.grid(True)
-            st.pyplot(fig)
+
+            def draw_traffic(ax):
+                pos = nx.get_node_attributes(traffic_graph, 'pos')
+                edges = list(traffic_graph.edges())
+                colors = []
+                for u, v in edges:
+                    congestion = congestion_table.factor(u, v, time_of_day)
+                    colors.append('red' if congestion > 1.5 else 'orange' if congestion > 1.2 else 'green')
+                nx.draw_networkx_edges(traffic_graph, pos, edgelist=edges, edge_color=colors, width=1.5, ax=ax)
+                route_edges = [(name_to_id[normal_path[i]], name_to_id[normal_path[i+1]]) for i in range(len(normal_path)-1)]
+                nx.draw_networkx_edges(traffic_graph, pos, edgelist=route_edges, edge_color='blue', width=3, ax=ax)
+                nx.draw_networkx_nodes(traffic_graph, pos, node_size=200, node_color='lightblue', ax=ax)
+                labels = {name_to_id[start_location]: start_location, name_to_id[end_location]: end_location}
+                nx.draw_networkx_labels(traffic_graph, pos, labels, font_size=10, font_weight='bold', ax=ax)
+                ax.set_title(f"Traffic Conditions ({time_of_day})")
+
+            # The congestion table version changes on every rebuild or in-place traffic update
+            figure_key = roads_key + (congestion_table.version, time_of_day, start_location, end_location, tuple(normal_path))
+            st.image(computation_cache.get_or_build('traffic_figure', figure_key, lambda: figure_png(draw_traffic)))
     
     else:
         st.subheader("Road Maintenance Optimization")
         budget = st.slider("Maintenance Budget (million EGP)", 0, 1000, 500, key="maintenance_budget")
-        if st.button("Optimize Maintenance"):
-            improvement, selected_roads = optimize_maintenance(df_existing, budget)
-            st.success(f"Total Condition Improvement: {improvement:.2f} units")
-            st.write("**Selected Roads for Maintenance:**")
-            roads_df = pd.DataFrame(selected_roads, columns=['FromID', 'ToID'])
-            roads_df = roads_df.merge(all_nodes[['ID', 'Name']], left_on='FromID', right_on='ID', how='left').rename(columns={'Name': 'From'})
-            roads_df = roads_df.merge(all_nodes[['ID', 'Name']], left_on='ToID', right_on='ID', how='left').rename(columns={'Name': 'To'})
-            st.table(roads_df[['From', 'To']])
-            
-            st.subheader("Road Condition Visualization")
-            fig, ax = plt.subplots(figsize=(12, 10))
-            G = nx.Graph()
-            for _, row in all_nodes.iterrows():
-                G.add_node(row['ID'], pos=(row['X'], row['Y']))
-            for _, row in df_existing.iterrows():
-                G.add_edge(row['FromID'], row['ToID'], condition=row['Condition'])
+        curve = get_budget_curve(df_existing, 1000)
+        improvement, selected_roads = curve.improvement(budget), curve.selected_roads(budget)
+        st.success(f"Total Condition Improvement: {improvement:.2f} units")
+        st.write("**Selected Roads for Maintenance:**")
+        roads_df = pd.DataFrame(selected_roads, columns=['FromID', 'ToID'])
+        roads_df = roads_df.merge(all_nodes[['ID', 'Name']], left_on='FromID', right_on='ID', how='left').rename(columns={'Name': 'From'})
+        roads_df = roads_df.merge(all_nodes[['ID', 'Name']], left_on='ToID', right_on='ID', how='left').rename(columns={'Name': 'To'})
+        st.table(roads_df[['From', 'To']])
+
+        st.subheader("Budget vs Benefit")
+        st.line_chart(pd.DataFrame({'Budget (million EGP)': curve.budgets, 'Condition Improvement': curve.improvements}).set_index('Budget (million EGP)'))
+        frontier = get_pareto_frontier(df_existing, df_traffic, id_to_name, 1000)
+        plans = frontier.within(budget)
+        st.write("**Trade-offs within budget** (condition vs traffic-weighted improvement, per 1000 daily vehicles)")
+        st.table(pd.DataFrame([plan[:3] for plan in plans], columns=['Cost', 'Condition Improvement', 'Traffic-weighted Improvement']))
+        
+        st.subheader("Road Condition Visualization")
+
+        def draw_condition(ax):
+            G = computation_cache.get_or_build('traffic_graph', roads_key, build_traffic_graph)
             pos = nx.get_node_attributes(G, 'pos')
             nx.draw_networkx_edges(G, pos, edge_color='lightgray', width=1, alpha=0.5, ax=ax)
-            selected_edges = [(row['FromID'], row['ToID']) for _, row in roads_df.iterrows()]
-            nx.draw_networkx_edges(G, pos, edgelist=selected_edges, edge_color='red', width=3, ax=ax)
+            nx.draw_networkx_edges(G, pos, edgelist=selected_roads, edge_color='red', width=3, ax=ax)
             nx.draw_networkx_nodes(G, pos, node_size=200, node_color='skyblue', ax=ax)
             nx.draw_networkx_labels(G, pos, font_size=8, ax=ax)
-            plt.title("Roads Selected for Maintenance")
-            plt.xlabel("Longitude")
-            plt.ylabel("Latitude")
-            plt.grid(True)
-            st.pyplot(fig)
-
-def optimize_maintenance(df_existing, budget):
-    roads = df_existing[["FromID", "ToID", "Maintenance_Cost", "Condition"]].to_dict('records')
-    dp = {(0, budget): 0}
-    choices = {}
-    for i in range(len(roads)):
-        for curr_budget in list(dp.keys()):
-            idx, budget_left = curr_budget
-            if idx != i:
-                continue
-            dp[(i + 1, budget_left)] = dp.get((i + 1, budget_left), 0)
-            cost = roads[i]["Maintenance_Cost"]
-            if budget_left >= cost:
-                improvement = 10 - roads[i]["Condition"]
-                new_state = (i + 1, budget_left - cost)
-                new_value = dp[curr_budget] + improvement
-                if new_value > dp.get(new_state, 0):
-                    dp[new_state] = new_value
-                    choices[new_state] = (roads[i]["FromID"], roads[i]["ToID"])
-    max_improvement = max(dp.values())
-    selected_roads = []
-    curr_state = max(dp, key=lambda k: dp[k])
-    while curr_state in choices:
-        selected_roads.append(choices[curr_state])
-        curr_state = (curr_state[0] - 1, curr_state[1] + roads[curr_state[0] - 1]["Maintenance_Cost"])
-    return max_improvement, selected_roads
\ No newline at end of file
+            ax.set_title("Roads Selected for Maintenance")
+
+        figure_key = roads_key + (tuple(selected_roads),)
+        st.image(computation_cache.get_or_build('maintenance_figure', figure_key, lambda: figure_png(draw_condition)))